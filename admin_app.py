@@ -0,0 +1,120 @@
+# admin_app.py
+"""Internal analytics page over many exported budgets.
+
+Run separately from the client app, so it never shows up in its navigation::
+
+    FINANTHROPE_EXPORTS=/data/exports streamlit run admin_app.py --server.port 8502
+
+Set ``FINANTHROPE_ADMIN_TOKEN`` to require a token before anything is shown.
+"""
+from __future__ import annotations
+import hmac
+import os
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from analytics import GROUPINGS, PERCENTILES, BudgetMatrix, budget_metrics, cohort_stats, load_matrix, type_shares
+from budget_io import BudgetImportError, iter_payloads
+
+st.set_page_config(page_title="Finanthrope — Analytics", page_icon="📊", layout="wide")
+st.title("📊 Finanthrope — Analytics")
+
+token = os.environ.get("FINANTHROPE_ADMIN_TOKEN")
+if token and not hmac.compare_digest(st.text_input("Admin token", type="password"), token):
+    st.stop()
+
+# -----------------------------
+# Sources
+# -----------------------------
+@st.cache_data(show_spinner="Loading budgets…", max_entries=4)
+def load_paths(paths: Tuple[str, ...], stamp: Tuple[float, ...]) -> BudgetMatrix:
+    # ``stamp`` only keys the cache, so added, removed or edited exports are reloaded
+    return load_matrix(paths)
+
+
+def mtimes(paths: Tuple[str, ...]) -> Tuple[float, ...]:
+    """Per path, the newest mtime of the path and, for a directory, of the exports in it.
+
+    A directory's own mtime changes when files are added or removed, not
+    when one of them is edited.
+    """
+    out = []
+    for p in paths:
+        try:
+            stamp = os.stat(p).st_mtime
+            if os.path.isdir(p):
+                with os.scandir(p) as entries:
+                    for e in entries:
+                        if e.name.endswith((".json", ".jsonl")):
+                            stamp = max(stamp, e.stat().st_mtime)
+        except OSError:
+            stamp = 0.0
+        out.append(stamp)
+    return tuple(out)
+
+
+default_paths = os.environ.get("FINANTHROPE_EXPORTS", "")
+paths_text = st.text_area("Export directories or JSON/JSONL files (one per line)", value=default_paths.replace(os.pathsep, "\n"))
+uploads = st.file_uploader("…or upload exports", type=["json", "jsonl"], accept_multiple_files=True)
+
+paths = tuple(p.strip() for p in paths_text.splitlines() if p.strip())
+if not paths and not uploads:
+    st.info("Add an export directory or upload exports to see statistics.")
+    st.stop()
+
+items = []
+skipped = 0
+for up in uploads or ():
+    try:
+        items.extend((f"{up.name}-{i}", p) for i, p in enumerate(iter_payloads(up)))
+    except BudgetImportError:
+        skipped += 1
+parts = [BudgetMatrix.from_payloads(items, skipped)]
+if paths:
+    parts.insert(0, load_paths(paths, mtimes(paths)))
+m = BudgetMatrix.concat(parts)
+if not len(m):
+    st.warning(f"No valid budgets found ({m.skipped} files skipped).")
+    st.stop()
+
+# -----------------------------
+# Overview
+# -----------------------------
+overall = cohort_stats(m, "all")[0]
+c1, c2, c3, c4, c5 = st.columns(5)
+c1.metric("Budgets", f"{len(m):,}", help=f"{m.skipped} skipped" if m.skipped else None)
+c2.metric("Median savings capacity", f"{overall['capacite_epargne_p50']:,.0f} €")
+c3.metric("Negative capacity", f"{overall['negative_share'] * 100:.1f}%")
+c4.metric("Median credits share", f"{overall['credits_share_p50'] * 100:.1f}%")
+c5.metric("Median taxes share", f"{overall['impots_share_p50'] * 100:.1f}%")
+
+capacity = budget_metrics(m)["capacite_epargne"]
+counts, edges = np.histogram(capacity, bins=40)
+st.markdown("#### Savings capacity distribution")
+st.bar_chart(pd.DataFrame({"budgets": counts}, index=np.round(edges[:-1])), x_label="€ / month", y_label="budgets")
+
+# -----------------------------
+# Cohorts
+# -----------------------------
+st.markdown("#### Cohorts")
+by = st.selectbox("Group by", GROUPINGS, index=GROUPINGS.index("income_band"))
+metric = st.selectbox("Metric", ("capacite_epargne", "savings_rate", "credits_share", "impots_share"))
+rows = cohort_stats(m, by)
+st.dataframe(
+    [
+        {"group": r["group"], "budgets": r["budgets"], "negative %": round(r["negative_share"] * 100, 1),
+         "mean": r[f"{metric}_mean"], **{f"P{q}": r[f"{metric}_p{q}"] for q in PERCENTILES}}
+        for r in rows
+    ],
+    hide_index=True,
+)
+
+st.markdown("#### Line types")
+st.dataframe(
+    [{**r, "share": round(r["share"] * 100, 1)} for r in type_shares(m) if r["share"] > 0],
+    hide_index=True,
+    column_config={"share": st.column_config.NumberColumn("used by %"), "median": st.column_config.NumberColumn("median €")},
+)
@@ -0,0 +1,249 @@
+# analytics.py
+"""Cohort statistics across many exported budgets.
+
+Payloads are loaded into a ``BudgetMatrix``: one row per budget, one float64
+column per ``(section, type)`` key of ``budgetLabels`` and one per
+``payload["totals"]`` field. Totals are recomputed from the type columns, so
+hand-edited exports cannot skew the results. Amounts in other currencies
+are converted to euros with the rates the payload was exported with, and
+weekly, quarterly or annual ones to their monthly equivalent. Every statistic is computed
+over whole columns at once. That includes grouped percentiles, which sort
+once by (group, value) and then index into each group's slice::
+
+    m = load_matrix(["exports/", "more.jsonl"])
+    cohort_stats(m, by="income_band")
+"""
+from __future__ import annotations
+import os
+import warnings
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from budget_engine import EXPENSE_SECTIONS, SECTIONS, TOTAL_KEYS, monthly_factor
+from budget_io import BudgetImportError, iter_payloads
+from currency import DEFAULT_CURRENCY, RateTable, rate_table
+from i18n import budgetLabels
+
+# (section, type) columns in budgetLabels order
+TYPE_COLUMNS: Tuple[Tuple[str, str], ...] = tuple(
+    (s, t) for s in SECTIONS for t in budgetLabels["fr"][s]
+)
+TYPE_INDEX = {key: i for i, key in enumerate(TYPE_COLUMNS)}
+# (types, sections) 0/1 matrix: types @ _TYPE_SECTION gives per-section sums
+_TYPE_SECTION = np.eye(len(SECTIONS))[[SECTIONS.index(s) for s, _ in TYPE_COLUMNS]]
+
+TOTAL_FIELDS = ("revenus", "depenses", "capacite_epargne") + tuple(TOTAL_KEYS[s] for s in EXPENSE_SECTIONS)
+
+PERCENTILES = (10, 25, 50, 75, 90)
+GROUPINGS = ("all", "lang", "income_band")
+INCOME_BANDS = 5
+
+
+@dataclass
+class BudgetMatrix:
+    names: List[str]
+    lang: np.ndarray    # (n,) str
+    types: np.ndarray   # (n, len(TYPE_COLUMNS)) monthly amount per type
+    totals: np.ndarray  # (n, len(TOTAL_FIELDS))
+    skipped: int = 0    # payloads that failed to parse
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def total(self, field: str) -> np.ndarray:
+        return self.totals[:, TOTAL_FIELDS.index(field)]
+
+    @classmethod
+    def concat(cls, parts: Sequence["BudgetMatrix"]) -> "BudgetMatrix":
+        return cls(
+            [name for p in parts for name in p.names],
+            np.concatenate([p.lang for p in parts]),
+            np.vstack([p.types for p in parts]),
+            np.vstack([p.totals for p in parts]),
+            sum(p.skipped for p in parts),
+        )
+
+    @classmethod
+    def from_payloads(cls, items: Iterable[Tuple[str, Dict]], skipped: int = 0) -> "BudgetMatrix":
+        names: List[str] = []
+        langs: List[str] = []
+        # Flat (budget, column, amount) triples, summed by one bincount at the end
+        rows_b: List[int] = []
+        rows_c: List[int] = []
+        amounts: List[float] = []
+        current = rate_table()
+        for name, payload in items:
+            sections = payload.get("sections") if isinstance(payload, dict) else None
+            if not isinstance(sections, dict):
+                skipped += 1
+                continue
+            # A malformed budget (a section that is not a list, a row that is
+            # not an object, an unhashable type, currency or frequency) is
+            # counted in ``skipped``; nothing of it reaches the matrix
+            try:
+                section_rows = [(s, sections.get(s) or []) for s in SECTIONS]
+                if not all(isinstance(rows, list) and all(isinstance(r, dict) for r in rows) for _, rows in section_rows):
+                    raise TypeError("sections must be lists of row objects")
+                rows_all = [row for _, rows in section_rows for row in rows]
+                # One factor per currency used (from the payload's own rates
+                # when it has them) and one per frequency
+                rates = RateTable.from_dict(payload["rates"]) if isinstance(payload.get("rates"), dict) else current
+                factors = {c: rates.factor(c, DEFAULT_CURRENCY) for c in {row.get("currency") for row in rows_all}}
+                per_month = {f: monthly_factor(f) for f in {row.get("frequency") for row in rows_all}}
+                cols: List[int] = []
+                vals: List[float] = []
+                for s, rows in section_rows:
+                    other = TYPE_INDEX[(s, "autre")]
+                    for row in rows:
+                        amt = row.get("montant", 0.0)
+                        if isinstance(amt, (int, float)) and not isinstance(amt, bool):
+                            cols.append(TYPE_INDEX.get((s, row.get("type")), other))
+                            vals.append(amt * factors[row.get("currency")] * per_month[row.get("frequency")])
+            except (ValueError, TypeError):
+                skipped += 1
+                continue
+            rows_b.extend([len(names)] * len(cols))
+            rows_c.extend(cols)
+            amounts.extend(vals)
+            names.append(name)
+            langs.append(str(payload.get("lang", "fr")))
+
+        n, k = len(names), len(TYPE_COLUMNS)
+        flat = np.asarray(rows_b, dtype=np.intp) * k + np.asarray(rows_c, dtype=np.intp)
+        types = np.bincount(flat, weights=np.asarray(amounts, dtype=np.float64), minlength=n * k).reshape(n, k)
+        return cls(names, np.asarray(langs, dtype=object), types, totals_from_types(types), skipped)
+
+
+def totals_from_types(types: np.ndarray) -> np.ndarray:
+    """``payload["totals"]`` fields for every budget, in ``TOTAL_FIELDS`` order."""
+    by_section = types @ _TYPE_SECTION
+    revenus = by_section[:, 0]
+    expenses = by_section[:, 1:]
+    depenses = expenses.sum(axis=1)
+    return np.column_stack([revenus, depenses, revenus - depenses, expenses])
+
+
+def iter_sources(paths: Sequence[str]) -> Iterable[Tuple[str, Dict]]:
+    """(name, payload) from directories of .json exports and JSON/JSONL files.
+
+    Files that fail to decode are reported as ``(name, None)`` so the caller
+    can count them.
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            files = [os.path.join(path, f) for f in sorted(os.listdir(path)) if f.endswith((".json", ".jsonl"))]
+        else:
+            files = [path]
+        for file in files:
+            stem = os.path.splitext(os.path.basename(file))[0]
+            try:
+                with open(file, "rb") as f:
+                    for i, payload in enumerate(iter_payloads(f)):
+                        yield (stem if i == 0 else f"{stem}-{i:06d}"), payload
+            except (BudgetImportError, OSError):
+                yield stem, None
+
+
+def load_matrix(paths: Sequence[str]) -> BudgetMatrix:
+    items = list(iter_sources(paths))
+    bad = sum(1 for _, p in items if p is None)
+    return BudgetMatrix.from_payloads(((n, p) for n, p in items if p is not None), skipped=bad)
+
+
+# -----------------------------
+# Vectorized statistics
+# -----------------------------
+def group_codes(m: BudgetMatrix, by: str) -> Tuple[np.ndarray, List[str]]:
+    """Integer group per budget and the group names."""
+    if by == "all":
+        return np.zeros(len(m), dtype=np.intp), ["all"]
+    if by == "lang":
+        names, codes = np.unique(m.lang.astype(str), return_inverse=True)
+        return codes.astype(np.intp), [str(x) for x in names]
+    if by == "income_band":
+        income = m.total("revenus")
+        edges = np.percentile(income, np.linspace(0, 100, INCOME_BANDS + 1)[1:-1]) if len(m) else []
+        codes = np.searchsorted(edges, income, side="right")
+        bounds = np.concatenate([[0.0], edges, [np.inf]]) if len(m) else np.array([0.0, np.inf])
+        return codes.astype(np.intp), [
+            f"Q{i + 1} ({bounds[i]:,.0f}–{bounds[i + 1]:,.0f})" for i in range(len(bounds) - 1)
+        ]
+    raise ValueError(f"unknown grouping {by!r}; expected one of {GROUPINGS}")
+
+
+def grouped_percentiles(values: np.ndarray, groups: np.ndarray, n_groups: int,
+                        qs: Sequence[float] = PERCENTILES) -> np.ndarray:
+    """(n_groups, len(qs)) linear-interpolated percentiles, NaN values ignored."""
+    keep = ~np.isnan(values)
+    values, groups = values[keep], groups[keep]
+    if values.size == 0:
+        return np.full((n_groups, len(qs)), np.nan)
+    v = values[np.lexsort((values, groups))]
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    last = starts + np.maximum(counts - 1, 0)
+    # Fractional rank of each percentile inside its group's sorted slice
+    pos = starts[:, None] + (np.asarray(qs, dtype=np.float64) / 100)[None, :] * (last - starts)[:, None]
+    lo = np.minimum(np.floor(pos).astype(np.intp), v.size - 1)
+    hi = np.minimum(np.minimum(lo + 1, last[:, None]), v.size - 1)
+    frac = pos - lo
+    out = v[lo] * (1 - frac) + v[hi] * frac
+    out[counts == 0] = np.nan
+    return out
+
+
+def grouped_mean(values: np.ndarray, groups: np.ndarray, n_groups: int) -> np.ndarray:
+    keep = ~np.isnan(values)
+    counts = np.bincount(groups[keep], minlength=n_groups)
+    sums = np.bincount(groups[keep], weights=values[keep], minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts
+
+
+def budget_metrics(m: BudgetMatrix) -> Dict[str, np.ndarray]:
+    """Per-budget derived columns; ratios are NaN where the denominator is 0."""
+    revenus, depenses, capacite = m.total("revenus"), m.total("depenses"), m.total("capacite_epargne")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        dep = np.where(depenses > 0, depenses, np.nan)
+        return {
+            "capacite_epargne": capacite,
+            "savings_rate": capacite / np.where(revenus > 0, revenus, np.nan),
+            "credits_share": m.total("credits") / dep,
+            "impots_share": m.total("impots") / dep,
+            "negative": (capacite < 0).astype(np.float64),
+        }
+
+
+def cohort_stats(m: BudgetMatrix, by: str = "all") -> List[Dict]:
+    """One dict per group: size, share negative, and percentiles of each metric."""
+    codes, names = group_codes(m, by)
+    g = len(names)
+    metrics = budget_metrics(m)
+    sizes = np.bincount(codes, minlength=g)
+    negative = grouped_mean(metrics.pop("negative"), codes, g)
+    out = [{"group": names[i], "budgets": int(sizes[i]), "negative_share": float(negative[i])} for i in range(g)]
+    for name, values in metrics.items():
+        pct = grouped_percentiles(values, codes, g)
+        mean = grouped_mean(values, codes, g)
+        for i in range(g):
+            out[i][f"{name}_mean"] = float(mean[i])
+            for j, q in enumerate(PERCENTILES):
+                out[i][f"{name}_p{q}"] = float(pct[i, j])
+    return out
+
+
+def type_shares(m: BudgetMatrix) -> List[Dict]:
+    """Per (section, type): share of budgets using it and median amount among them."""
+    used = m.types > 0
+    counts = used.sum(axis=0)
+    masked = np.where(used, m.types, np.nan)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN columns for unused types
+        medians = np.nanmedian(masked, axis=0) if len(m) else np.full(len(TYPE_COLUMNS), np.nan)
+    n = max(len(m), 1)
+    return [
+        {"section": s, "type": t, "share": float(counts[i] / n), "median": float(medians[i])}
+        for i, (s, t) in enumerate(TYPE_COLUMNS)
+    ]
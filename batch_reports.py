@@ -0,0 +1,175 @@
+# batch_reports.py
+"""Render many exported budgets to PDF (and optionally JSON) in parallel.
+
+Input is either a directory of ``finanthrope_budget.json`` exports or a JSONL
+stream with one exported payload per line (``-`` reads stdin)::
+
+    python batch_reports.py exports/ -o reports/ --workers 8 --chunksize 16
+    cat budgets.jsonl | python batch_reports.py - -o reports/ --formats pdf,json
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# (document name, JSON text); decoded in the worker, so a bad document
+# fails on its own instead of aborting the batch
+Job = Tuple[str, str]
+# (document name, milliseconds, error message or None)
+Result = Tuple[str, float, Optional[str]]
+
+FORMATS = ("pdf", "json")
+
+
+def iter_directory(path: str) -> Iterator[Job]:
+    for name in sorted(os.listdir(path)):
+        if name.endswith(".json"):
+            with open(os.path.join(path, name), encoding="utf-8") as f:
+                yield os.path.splitext(name)[0], f.read()
+
+
+def iter_jsonl(stream, stem: str) -> Iterator[Job]:
+    for lineno, line in enumerate(stream, 1):
+        line = line.strip()
+        if line:
+            yield f"{stem}-{lineno:06d}", line
+
+
+def iter_jobs(source: str) -> Iterator[Job]:
+    if source == "-":
+        yield from iter_jsonl(sys.stdin, "budget")
+    elif os.path.isdir(source):
+        yield from iter_directory(source)
+    else:
+        with open(source, encoding="utf-8") as f:
+            yield from iter_jsonl(f, os.path.splitext(os.path.basename(source))[0])
+
+
+def render_chunk(chunk: List[Job], out_dir: str, formats: Tuple[str, ...], lang: Optional[str], chart: str,
+                 layout: str = "auto", collapse_below: float = 0.0) -> List[Result]:
+    """Worker entry point: render one chunk of documents to ``out_dir``."""
+    from budget_engine import with_converted
+    from budget_io import BudgetImportError, validate_sections
+    from currency import payload_currency, payload_rates
+    from i18n import labels
+    from pdf_report import create_pdf
+
+    results: List[Result] = []
+    for name, text in chunk:
+        t0 = time.perf_counter()
+        try:
+            payload = json.loads(text)
+            if not isinstance(payload, dict):
+                raise BudgetImportError("each budget must be a JSON object")
+            payload["sections"] = validate_sections(payload)
+            doc_lang = lang or payload.get("lang", "fr")
+            if "pdf" in formats:
+                # Render before opening the file: a failed document leaves no file
+                data = create_pdf(payload, labels, doc_lang, chart=chart,
+                                  layout=layout, collapse_below=collapse_below)
+                with open(os.path.join(out_dir, name + ".pdf"), "wb") as f:
+                    f.write(data)
+            if "json" in formats:
+                currency = payload_currency(payload)
+                sections, totals = with_converted(payload["sections"], payload_rates(payload), currency)
+                out = {
+                    "lang": doc_lang,
+                    "currency": currency,
+                    "sections": sections,
+                    "totals": totals.as_payload_totals(),
+                }
+                if "rates" in payload:
+                    out["rates"] = payload["rates"]
+                with open(os.path.join(out_dir, name + ".json"), "w", encoding="utf-8") as f:
+                    json.dump(out, f, ensure_ascii=False, indent=2)
+            err = None
+        except Exception as e:  # one bad payload must not abort the batch
+            err = f"{type(e).__name__}: {e}"
+        results.append((name, (time.perf_counter() - t0) * 1000, err))
+    return results
+
+
+def chunked(jobs: Iterable[Job], size: int) -> Iterator[List[Job]]:
+    chunk: List[Job] = []
+    for job in jobs:
+        chunk.append(job)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_batch(jobs: Iterable[Job], out_dir: str, workers: int, chunksize: int,
+              formats: Tuple[str, ...] = ("pdf",), lang: Optional[str] = None,
+              chart: str = "vector", layout: str = "auto", collapse_below: float = 0.0) -> List[Result]:
+    """Render ``jobs`` on a process pool, keeping at most ``2 * workers`` chunks in flight."""
+    os.makedirs(out_dir, exist_ok=True)
+    results: List[Result] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for chunk in chunked(jobs, chunksize):
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    results.extend(fut.result())
+            pending.add(pool.submit(render_chunk, chunk, out_dir, formats, lang, chart, layout, collapse_below))
+        for fut in pending:
+            results.extend(fut.result())
+    return results
+
+
+def percentile(sorted_vals: List[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    idx = min(len(sorted_vals) - 1, max(0, int(round(q / 100 * (len(sorted_vals) - 1)))))
+    return sorted_vals[idx]
+
+
+def summarize(results: List[Result], elapsed: float) -> str:
+    ok = sorted(ms for _, ms, err in results if err is None)
+    failed = [(name, err) for name, _, err in results if err is not None]
+    lines = [
+        f"documents: {len(ok)} ok, {len(failed)} failed in {elapsed:.2f}s",
+        f"throughput: {len(results) / elapsed if elapsed > 0 else 0.0:.1f} docs/sec",
+        f"per document: p50 {percentile(ok, 50):.1f} ms, p95 {percentile(ok, 95):.1f} ms",
+    ]
+    for name, err in failed[:20]:
+        lines.append(f"  failed {name}: {err}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    from pdf_report import CHART_BACKENDS, LAYOUTS
+
+    ap = argparse.ArgumentParser(description="Render exported Finanthrope budgets to PDF/JSON in parallel.")
+    ap.add_argument("source", help="directory of .json exports, a .jsonl file, or - for JSONL on stdin")
+    ap.add_argument("-o", "--out", default="reports", help="output directory (default: reports)")
+    ap.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("-c", "--chunksize", type=int, default=8, help="documents per worker task")
+    ap.add_argument("--formats", default="pdf", help="comma-separated subset of: " + ",".join(FORMATS))
+    ap.add_argument("--lang", choices=["fr", "en"], help="override the payload language")
+    ap.add_argument("--chart", choices=CHART_BACKENDS, default="vector")
+    ap.add_argument("--layout", choices=LAYOUTS, default="auto", help="section tables; large pages long budgets linearly")
+    ap.add_argument("--collapse-below", type=float, default=0.0, metavar="EUR",
+                    help="replace lines under this amount with per-type subtotals")
+    args = ap.parse_args(argv)
+
+    formats = tuple(f.strip() for f in args.formats.split(",") if f.strip())
+    unknown = set(formats) - set(FORMATS)
+    if unknown or not formats:
+        ap.error(f"--formats must be a subset of {','.join(FORMATS)}")
+
+    t0 = time.perf_counter()
+    results = run_batch(iter_jobs(args.source), args.out, max(1, args.workers), max(1, args.chunksize),
+                        formats, args.lang, args.chart, args.layout, args.collapse_below)
+    print(summarize(results, time.perf_counter() - t0))
+    return 1 if any(err for _, _, err in results) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,68 @@
+# benchmarks/bench_editor.py
+"""Compare rerun time and delta size of the row editor and the grid editor.
+
+Drives streamlit_app.py headlessly with AppTest. "delta KB" is the summed
+protobuf size of every element the rerun sends to the browser.
+
+    python benchmarks/bench_editor.py [--rows 10 50 200] [--repeat 5]
+"""
+from __future__ import annotations
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from budget_engine import SECTION_KEYS  # noqa: E402
+from budget_rows import Row  # noqa: E402
+from i18n import budgetLabels  # noqa: E402
+
+
+def delta_bytes(node) -> int:
+    proto = getattr(node, "proto", None)
+    total = proto.ByteSize() if proto is not None else 0
+    for child in getattr(node, "children", {}).values():
+        total += delta_bytes(child)
+    return total
+
+
+def measure(rows_per_section: int, grid: bool, repeat: int):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, "streamlit_app.py"), default_timeout=600)
+    for section, state_key in SECTION_KEYS.items():
+        keys = list(budgetLabels["fr"][section])
+        at.session_state[state_key] = [Row(keys[i % len(keys)], float(i)) for i in range(rows_per_section)]
+    at.session_state["grid_mode"] = grid
+    at.run()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        at.run()
+        times.append((time.perf_counter() - t0) * 1000)
+    if at.exception:
+        raise RuntimeError(at.exception)
+    return statistics.median(times), delta_bytes(at._tree) / 1024
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, nargs="+", default=[10, 50, 200], help="rows per section")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args(argv)
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    print(f"{'rows/section':>12} {'mode':>6} {'rerun ms':>10} {'delta KB':>10}")
+    for n in args.rows:
+        for grid in (False, True):
+            ms, kb = measure(n, grid, args.repeat)
+            print(f"{n:>12} {'grid' if grid else 'rows':>6} {ms:>10.1f} {kb:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
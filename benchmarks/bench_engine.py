@@ -0,0 +1,56 @@
+# benchmarks/bench_engine.py
+"""Time BudgetEngine against the old per-section generator sums.
+
+    python benchmarks/bench_engine.py [--rows 100000]
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from budget_engine import SECTIONS, BudgetEngine  # noqa: E402
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, default=100_000, help="total rows across all sections")
+    args = ap.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    codes = rng.integers(0, len(SECTIONS), args.rows)
+    amounts = np.round(rng.uniform(0, 1000, args.rows), 2)
+    sections = {s: [] for s in SECTIONS}
+    for c, a in zip(codes.tolist(), amounts.tolist()):
+        sections[SECTIONS[c]].append({"type": "autre", "montant": a})
+
+    t0 = time.perf_counter()
+    legacy = {s: sum(float(r.get("montant", 0.0)) for r in rows) for s, rows in sections.items()}
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    engine = BudgetEngine(sections)
+    t_load = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    totals = engine.compute()
+    t_compute = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    BudgetEngine.from_arrays(codes, amounts).compute()
+    t_arrays = time.perf_counter() - t0
+
+    assert all(np.isclose(legacy[s], totals.section_totals[s]) for s in SECTIONS)
+    print(f"rows={args.rows}")
+    print(f"  generator sums        {t_legacy*1000:8.2f} ms")
+    print(f"  engine load (dicts)   {t_load*1000:8.2f} ms")
+    print(f"  engine compute        {t_compute*1000:8.2f} ms")
+    print(f"  from_arrays + compute {t_arrays*1000:8.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,125 @@
+# benchmarks/bench_export.py
+"""Export size and speed: indented JSON vs minified, gzip and the compact format.
+
+Also checks the round trip on every size before timing anything, and exits
+1 on a mismatch; ``--check`` runs only the checks. Payloads are built the
+way the app exports them (``with_converted``, so foreign-currency and
+non-monthly rows carry ``montant_converti``, plus the rate subset), in the
+default and in a foreign reporting currency. The checks are:
+
+* ``decode_compact(encode_compact(p))`` dumps to the same JSON text as ``p``;
+* ``load_compact`` returns exactly what ``budget_io.load_budgets`` returns for
+  the JSON export.
+
+    python benchmarks/bench_export.py [--rows 10 1000 50000] [--repeat 5] [--check]
+"""
+from __future__ import annotations
+import argparse
+import gzip
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_pdf_chart import synthetic_payload  # noqa: E402
+from budget_engine import EXPENSE_SECTIONS, with_converted  # noqa: E402
+from budget_export import decode_compact, encode_compact, export_json, load_compact  # noqa: E402
+from budget_io import load_budgets  # noqa: E402
+from currency import DEFAULT_CURRENCY, rate_table  # noqa: E402
+from projection import ProjectionParams, simulate  # noqa: E402
+
+
+def sample_payload(rows: int, currency: str = DEFAULT_CURRENCY) -> Dict:
+    """A payload as the app exports it (see ``render_downloads``): custom
+    labels on "autre" rows, some annual or quarterly rows, some rows in
+    other currencies, converted amounts, rates and a projection."""
+    rates = rate_table()
+    foreign = [c for c in rates.codes if c != DEFAULT_CURRENCY]
+    sections = synthetic_payload(rows)["sections"]
+    for section in sections.values():
+        for i, r in enumerate(section):
+            if r["type"] == "autre":
+                r["custom_label"] = f"ligne {i}" if i % 3 else ""
+            if foreign and i % 7 == 3:
+                r["currency"] = foreign[(i // 7) % len(foreign)]
+            if i % 5 == 4:
+                r["frequency"] = "annual" if i % 2 else "quarterly"
+    export_sections, totals = with_converted(sections, rates, currency)
+    payload = {"lang": "fr", "currency": currency, "sections": export_sections, "totals": totals.as_payload_totals()}
+    used = {r.get("currency") or DEFAULT_CURRENCY for rows in sections.values() for r in rows}
+    if used - {currency}:
+        payload["rates"] = rates.subset(used | {currency})
+    expenses = {s: totals.section_totals[s] for s in EXPENSE_SECTIONS}
+    payload["projection"] = simulate(totals.revenus, expenses, ProjectionParams(years=10)).as_dict()
+    return payload
+
+
+def check_round_trip(payload: Dict) -> None:
+    data = encode_compact(payload)
+    if json.dumps(decode_compact(data), ensure_ascii=False, indent=2) != export_json(payload).decode("utf-8"):
+        raise AssertionError("decode_compact does not reproduce the JSON export")
+    if load_compact(io.BytesIO(data)) != load_budgets(io.BytesIO(export_json(payload))):
+        raise AssertionError("load_compact differs from load_budgets on the JSON export")
+
+
+def median_ms(fn: Callable[[], object], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def check_all(sizes: List[int]) -> bool:
+    """Round-trip every size in the default and, when rates allow, a foreign currency."""
+    currencies = [DEFAULT_CURRENCY] + [c for c in rate_table().codes if c != DEFAULT_CURRENCY][:1]
+    for n in sizes:
+        for currency in currencies:
+            try:
+                check_round_trip(sample_payload(n, currency))
+            except AssertionError as e:
+                print(f"round trip failed at {n} rows ({currency}): {e}", file=sys.stderr)
+                return False
+    return True
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, nargs="+", default=[10, 1000, 50000], help="rows per section")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--check", action="store_true", help="only run the round-trip checks")
+    args = ap.parse_args(argv)
+
+    if not check_all(args.rows):
+        return 1
+    if args.check:
+        print(f"round trip ok at {', '.join(map(str, args.rows))} rows/section")
+        return 0
+    print(f"{'rows/section':>12} {'format':<10} {'size KB':>9} {'encode ms':>10} {'import ms':>10}")
+    for n in args.rows:
+        payload = sample_payload(n)
+        formats = {
+            "json": (export_json, lambda b: load_budgets(io.BytesIO(b))),
+            "minified": (lambda p: json.dumps(p, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+                         lambda b: load_budgets(io.BytesIO(b))),
+            "json.gz": (lambda p: gzip.compress(export_json(p), mtime=0),
+                        lambda b: load_budgets(io.BytesIO(gzip.decompress(b)))),
+            "compact": (encode_compact, lambda b: load_compact(io.BytesIO(b))),
+        }
+        for name, (encode, load) in formats.items():
+            data = encode(payload)
+            enc = median_ms(lambda: encode(payload), args.repeat)
+            dec = median_ms(lambda: load(data), args.repeat)
+            print(f"{n:>12} {name:<10} {len(data) / 1024:>9.1f} {enc:>10.1f} {dec:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,76 @@
+# benchmarks/bench_memory.py
+"""Per-session memory of budget rows: dict rows vs budget_rows.Row.
+
+Counts the bytes allocated for the six section lists a session keeps in
+st.session_state, alone and with the two snapshots grid mode adds
+(``grid-base-*`` rows and last). Types are parsed from JSON, as they are
+after an import, so the dict numbers include one string per row.
+
+    python benchmarks/bench_memory.py [--rows 10 100 1000] [--sessions 200]
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_pdf_chart import synthetic_payload  # noqa: E402
+from budget_engine import SECTION_KEYS  # noqa: E402
+from budget_rows import rows_from_dicts  # noqa: E402
+
+
+def allocated(build: Callable[[], object]) -> int:
+    """Bytes still allocated by ``build()``'s result."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        keep = build()
+        size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del keep
+    return size
+
+
+def dict_state(sections: Dict[str, List[Dict]], grid: bool) -> Dict:
+    state = {k: json.loads(json.dumps(sections[s])) for s, k in SECTION_KEYS.items()}
+    if grid:
+        for k in list(state):
+            state[f"grid-base-{k}"] = {"rows": [dict(r) for r in state[k]], "last": [dict(r) for r in state[k]]}
+    return state
+
+
+def row_state(sections: Dict[str, List[Dict]], grid: bool) -> Dict:
+    state = {k: rows_from_dicts(json.loads(json.dumps(sections[s]))) for s, k in SECTION_KEYS.items()}
+    if grid:
+        for k in list(state):
+            state[f"grid-base-{k}"] = {"rows": [r.copy() for r in state[k]], "last": [r.copy() for r in state[k]]}
+    return state
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000], help="rows per section")
+    ap.add_argument("--sessions", type=int, default=200, help="sessions per pod, for the MB column")
+    args = ap.parse_args(argv)
+
+    print(f"{'rows/section':>12} {'mode':>5} {'dict KB':>10} {'Row KB':>10} {'saved':>7} {'MB/pod before':>14} {'after':>8}")
+    for n in args.rows:
+        sections = synthetic_payload(n)["sections"]
+        for grid in (False, True):
+            before = allocated(lambda: dict_state(sections, grid))
+            after = allocated(lambda: row_state(sections, grid))
+            print(
+                f"{n:>12} {'grid' if grid else 'rows':>5} {before / 1024:>10.1f} {after / 1024:>10.1f} "
+                f"{1 - after / before:>6.0%} {before * args.sessions / 2**20:>14.1f} {after * args.sessions / 2**20:>8.1f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,67 @@
+# benchmarks/bench_pdf_chart.py
+"""Compare create_pdf build time and size across donut chart backends.
+
+    python benchmarks/bench_pdf_chart.py [--repeat 20] [--rows 10]
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from i18n import budgetLabels, labels  # noqa: E402
+from pdf_report import CHART_BACKENDS, create_pdf  # noqa: E402
+
+TOTAL_KEYS = {
+    "depensesQuotidiennes": "quotidiennes",
+    "depensesAdministratives": "administratives",
+    "depensesFamiliales": "familiales",
+    "credits": "credits",
+    "impots": "impots",
+}
+
+
+def synthetic_payload(rows_per_section: int, lang: str = "fr", seed: int = 0) -> Dict:
+    rng = random.Random(seed)
+    sections = {}
+    for section, mapping in budgetLabels[lang].items():
+        keys = list(mapping.keys())
+        sections[section] = [
+            {"type": rng.choice(keys), "montant": round(rng.uniform(5, 900), 2)}
+            for _ in range(rows_per_section)
+        ]
+    sums = {s: sum(r["montant"] for r in rows) for s, rows in sections.items()}
+    dep = sum(sums[s] for s in TOTAL_KEYS)
+    totals = {"revenus": sums["revenus"], "depenses": dep, "capacite_epargne": sums["revenus"] - dep}
+    totals.update({TOTAL_KEYS[s]: sums[s] for s in TOTAL_KEYS})
+    return {"lang": lang, "sections": sections, "totals": totals}
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--rows", type=int, default=10, help="rows per section")
+    args = ap.parse_args(argv)
+
+    payload = synthetic_payload(args.rows)
+    print(f"{'backend':<12} {'median ms':>10} {'p95 ms':>10} {'size KB':>10}")
+    for backend in CHART_BACKENDS:
+        create_pdf(payload, labels, "fr", chart=backend)  # warm imports
+        times = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            data = create_pdf(payload, labels, "fr", chart=backend)
+            times.append((time.perf_counter() - t0) * 1000)
+        times.sort()
+        p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+        print(f"{backend:<12} {statistics.median(times):>10.1f} {p95:>10.1f} {len(data)/1024:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
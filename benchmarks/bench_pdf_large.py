@@ -0,0 +1,62 @@
+# benchmarks/bench_pdf_large.py
+"""create_pdf build time against row count, per section-table layout.
+
+Rows go into one expense section, as after importing a long bank statement.
+The "us/row" column should stay flat for the large layout; the standard
+layout re-splits the remaining table on every page and grows quadratically,
+so it is only run up to ``--standard-limit`` rows.
+
+    python benchmarks/bench_pdf_large.py [--rows 1000 5000 20000 50000] [--collapse-below 50]
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from i18n import budgetLabels, labels  # noqa: E402
+from pdf_report import create_pdf  # noqa: E402
+
+
+def statement_payload(rows: int, lang: str = "fr", seed: int = 0) -> Dict:
+    rng = random.Random(seed)
+    sections = {s: [] for s in budgetLabels[lang]}
+    sections["revenus"] = [{"type": "salaire", "montant": 3000.0}]
+    keys = list(budgetLabels[lang]["depensesQuotidiennes"])
+    sections["depensesQuotidiennes"] = [
+        {"type": rng.choice(keys), "montant": round(rng.uniform(1, 200), 2)} for _ in range(rows)
+    ]
+    return {"lang": lang, "sections": sections}
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, nargs="+", default=[1000, 5000, 20000, 50000])
+    ap.add_argument("--collapse-below", type=float, default=0.0, help="also time per-type subtotals for lines under this amount")
+    ap.add_argument("--standard-limit", type=int, default=5000, help="skip the standard layout above this many rows")
+    args = ap.parse_args(argv)
+
+    runs = [("standard", 0.0), ("large", 0.0)]
+    if args.collapse_below > 0:
+        runs.append(("large", args.collapse_below))
+    create_pdf(statement_payload(10), labels, "fr")  # warm imports
+
+    print(f"{'rows':>8} {'layout':<9} {'collapse':>8} {'seconds':>8} {'us/row':>7} {'size KB':>8}")
+    for n in args.rows:
+        payload = statement_payload(n)
+        for layout, below in runs:
+            if layout == "standard" and n > args.standard_limit:
+                continue
+            t0 = time.perf_counter()
+            data = create_pdf(payload, labels, "fr", chart="none", layout=layout, collapse_below=below)
+            dt = time.perf_counter() - t0
+            print(f"{n:>8} {layout:<9} {below:>8g} {dt:>8.2f} {dt / n * 1e6:>7.0f} {len(data) / 1024:>8.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,150 @@
+# benchmarks/bench_service.py
+"""Load test for budget_service.py: throughput and tail latency per endpoint.
+
+Starts the service in-process on a free port, with its own PDF pool and
+cache, or targets a running one with ``--url``. Client threads then send
+``--requests`` requests over fresh connections, cycling through
+``--distinct`` different budgets, so a PDF is rendered once per budget and
+then served from the cache. A 202 is followed up on its ``Location``
+until the PDF is ready; that time counts as the request's latency.
+Rejected requests (503) are counted, not retried.
+
+    python benchmarks/bench_service.py [--endpoint totals pdf] [--requests 400]
+        [--concurrency 8] [--rows 10] [--distinct 40] [--url http://127.0.0.1:8600]
+
+The in-process server shares the GIL with the client threads; use
+``--url`` against ``python budget_service.py`` for numbers closer to a
+deployment.
+"""
+from __future__ import annotations
+import argparse
+import http.client
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from batch_reports import percentile  # noqa: E402
+from bench_pdf_chart import synthetic_payload  # noqa: E402
+from budget_service import BudgetServer  # noqa: E402
+from pdf_cache import PdfCache  # noqa: E402
+from pdf_jobs import PdfJobs  # noqa: E402
+
+ENDPOINTS = ("totals", "pdf")
+POLL_SECONDS = 0.05
+
+
+def request(host: str, port: int, method: str, path: str, body: bytes = None) -> Tuple[int, Dict[str, str], bytes]:
+    conn = http.client.HTTPConnection(host, port, timeout=300)
+    try:
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        conn.request(method, path, body=body, headers=headers)
+        resp = conn.getresponse()
+        return resp.status, dict(resp.getheaders()), resp.read()
+    finally:
+        conn.close()
+
+
+def call(host: str, port: int, endpoint: str, body: bytes) -> int:
+    """One logical request; PDFs answered with 202 are polled until final."""
+    status, headers, _ = request(host, port, "POST", f"/{endpoint}", body)
+    while status == 202:
+        time.sleep(POLL_SECONDS)
+        status, headers, _ = request(host, port, "GET", headers["Location"])
+    return status
+
+
+def run(host: str, port: int, endpoint: str, bodies: List[bytes], total: int, concurrency: int) -> Dict:
+    counter = itertools.count()
+    lock = threading.Lock()
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+
+    def client():
+        while True:
+            i = next(counter)
+            if i >= total:
+                return
+            t0 = time.perf_counter()
+            try:
+                status = call(host, port, endpoint, bodies[i % len(bodies)])
+            except (OSError, http.client.HTTPException):
+                status = 0
+            ms = (time.perf_counter() - t0) * 1000
+            with lock:
+                statuses[status] += 1
+                if status == 200:
+                    latencies.append(ms)
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    return {
+        "endpoint": endpoint,
+        "ok": statuses[200],
+        "busy": statuses[503],
+        "errors": sum(n for s, n in statuses.items() if s not in (200, 503)),
+        "rps": statuses[200] / elapsed if elapsed > 0 else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "max": latencies[-1] if latencies else 0.0,
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--endpoint", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    ap.add_argument("--requests", type=int, default=400)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--rows", type=int, default=10, help="rows per section")
+    ap.add_argument("--distinct", type=int, default=40, help="different budgets cycled through")
+    ap.add_argument("--url", help="running service to target instead of an in-process one")
+    ap.add_argument("--workers", type=int, default=2, help="in-process PDF workers")
+    ap.add_argument("--queue", type=int, default=16, help="in-process PDF queue bound")
+    ap.add_argument("--max-requests", type=int, default=32, help="in-process concurrent request bound")
+    args = ap.parse_args(argv)
+
+    bodies = [
+        json.dumps(synthetic_payload(args.rows, seed=i)["sections"]).encode("utf-8")
+        for i in range(max(1, args.distinct))
+    ]
+    print(f"{'endpoint':<8} {'ok':>6} {'503':>5} {'err':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    failed = False
+    for endpoint in args.endpoint:
+        server = None
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port or 80
+        else:
+            jobs = PdfJobs(PdfCache(), workers=args.workers, max_pending=args.queue)
+            server = BudgetServer(("127.0.0.1", 0), jobs=jobs, max_requests=args.max_requests)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            host, port = server.server_address[:2]
+        try:
+            r = run(host, port, endpoint, bodies, args.requests, max(1, args.concurrency))
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+        failed |= r["errors"] > 0
+        print(f"{r['endpoint']:<8} {r['ok']:>6} {r['busy']:>5} {r['errors']:>5} {r['rps']:>8.1f} "
+              f"{r['p50']:>8.1f} {r['p95']:>8.1f} {r['p99']:>8.1f} {r['max']:>8.1f}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,192 @@
+# benchmarks/bench_suite.py
+"""Scaling benchmark: rerun latency, PDF build, JSON/compact export and peak memory.
+
+Drives streamlit_app.py headlessly with AppTest on synthetic budgets of
+0, 10, 100 and 1000 rows per section and writes the results as JSON.
+With ``--baseline`` the run is compared against a stored result and
+exits 1 when a metric regressed by more than ``--threshold``::
+
+    python benchmarks/bench_suite.py -o bench.json
+    python benchmarks/bench_suite.py --baseline bench.json
+
+The row editor creates three widgets per row, which AppTest cannot drive
+in reasonable time past a few hundred rows per section, so rerun latency
+in row mode is only measured up to ``--row-mode-limit``; grid mode is
+measured at every size.
+"""
+from __future__ import annotations
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_export import sample_payload  # noqa: E402
+from bench_pdf_chart import synthetic_payload  # noqa: E402
+from budget_engine import SECTION_KEYS  # noqa: E402
+from budget_export import encode_compact, export_json  # noqa: E402
+from budget_rows import rows_from_dicts  # noqa: E402
+from i18n import labels  # noqa: E402
+from pdf_report import create_pdf  # noqa: E402
+
+DEFAULT_ROWS = [0, 10, 100, 1000]
+SCHEMA = 1
+
+
+def timed(fn: Callable[[], object], repeat: int) -> Tuple[float, float]:
+    """Median wall time in ms over ``repeat`` calls, then peak traced KB of one more call."""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return statistics.median(times), peak / 1024
+
+
+def app_rerun(payload: Dict, grid: bool, timeout: float):
+    from streamlit.testing.v1 import AppTest
+
+    # Seeding session state outside a script run warns once per key
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+    at = AppTest.from_file(os.path.join(ROOT, "streamlit_app.py"), default_timeout=timeout)
+    for section, state_key in SECTION_KEYS.items():
+        at.session_state[state_key] = rows_from_dicts(payload["sections"][section])
+    at.session_state["grid_mode"] = grid
+    at.run()  # first run builds widgets and warms caches
+
+    def rerun():
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+    return rerun
+
+
+def measure(rows: int, repeat: int, row_mode_limit: int, timeout: float) -> Dict[str, Optional[float]]:
+    payload = synthetic_payload(rows)
+    out: Dict[str, Optional[float]] = {}
+
+    modes = [("grid", True)] + ([("rows", False)] if rows <= row_mode_limit else [])
+    for name, grid in modes:
+        out[f"rerun_{name}_ms"], out[f"rerun_{name}_peak_kb"] = timed(app_rerun(payload, grid, timeout), repeat)
+    if rows > row_mode_limit:
+        out["rerun_rows_ms"] = out["rerun_rows_peak_kb"] = None
+
+    for name, chart in (("pdf_ms", "vector"), ("pdf_nochart_ms", "none")):
+        create_pdf(payload, labels, "fr", chart=chart)  # warm imports
+        out[name], out[name.replace("_ms", "_peak_kb")] = timed(
+            lambda: create_pdf(payload, labels, "fr", chart=chart), repeat)
+
+    # The downloads encode the exported payload: converted rows, rates, projection
+    exported = sample_payload(rows)
+    out["json_ms"], out["json_peak_kb"] = timed(lambda: export_json(exported), repeat)
+    out["compact_ms"], out["compact_peak_kb"] = timed(lambda: encode_compact(exported), repeat)
+    return out
+
+
+def run_suite(rows: List[int], repeat: int, row_mode_limit: int, timeout: float) -> Dict:
+    results = {}
+    for n in rows:
+        results[str(n)] = measure(n, repeat, row_mode_limit, timeout)
+        print(format_row(n, results[str(n)]), file=sys.stderr)
+    try:
+        import resource
+        max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except ImportError:  # Windows
+        max_rss_kb = None
+    return {
+        "schema": SCHEMA,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "max_rss_kb": max_rss_kb,
+        "results": results,
+    }
+
+
+def fmt(v: Optional[float]) -> str:
+    return "—" if v is None else f"{v:.1f}"
+
+
+COLUMNS = ("rerun_grid_ms", "rerun_rows_ms", "pdf_ms", "pdf_nochart_ms", "json_ms", "compact_ms", "pdf_peak_kb")
+
+
+def format_row(rows: int, r: Dict[str, Optional[float]]) -> str:
+    return f"{rows:>8} " + " ".join(f"{fmt(r.get(c)):>15}" for c in COLUMNS)
+
+
+def compare(current: Dict, baseline: Dict, threshold: float, min_ms: float, min_kb: float) -> List[str]:
+    """Metrics slower or larger than the baseline by more than ``threshold`` (relative).
+
+    Differences under ``min_ms`` / ``min_kb`` are ignored so small
+    measurements do not flag on noise.
+    """
+    regressions = []
+    for rows, metrics in current["results"].items():
+        base = baseline.get("results", {}).get(rows, {})
+        for name, value in metrics.items():
+            old = base.get(name)
+            if value is None or old is None or old <= 0:
+                continue
+            if value - old < (min_ms if name.endswith("_ms") else min_kb):
+                continue
+            change = value / old - 1
+            if change > threshold:
+                regressions.append(f"rows={rows} {name}: {fmt(old)} -> {fmt(value)} (+{change * 100:.0f}%)")
+    return regressions
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS, help="rows per section")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--row-mode-limit", type=int, default=100,
+                    help="largest rows/section to rerun in row-editor mode (default: 100)")
+    ap.add_argument("--timeout", type=float, default=600, help="AppTest timeout per run, in seconds")
+    ap.add_argument("-o", "--out", help="write results JSON here (default: stdout)")
+    ap.add_argument("--baseline", help="results JSON to compare against")
+    ap.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown (default: 0.25)")
+    ap.add_argument("--min-ms", type=float, default=2.0, help="ignore time differences below this")
+    ap.add_argument("--min-kb", type=float, default=64.0, help="ignore memory differences below this")
+    args = ap.parse_args(argv)
+    os.chdir(ROOT)  # the app reads logo.png relative to the working directory
+
+    print(f"{'rows':>8} " + " ".join(f"{c:>15}" for c in COLUMNS), file=sys.stderr)
+    current = run_suite(args.rows, max(1, args.repeat), args.row_mode_limit, args.timeout)
+
+    text = json.dumps(current, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    elif not args.baseline:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold, args.min_ms, args.min_kb)
+        for line in regressions:
+            print("REGRESSION " + line)
+        if regressions:
+            return 1
+        print(f"no regressions against {args.baseline} (threshold {args.threshold * 100:.0f}%)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,251 @@
+# budget_engine.py
+"""Headless budget computation shared by the app, the JSON export and the PDF.
+
+All amounts of a budget are held in one float64 array with a parallel array
+of section codes, so every section total comes out of a single
+``np.bincount`` pass regardless of row count::
+
+    engine = BudgetEngine(payload["sections"])
+    totals = engine.compute()
+    totals.capacite_epargne, totals.as_payload_totals()
+
+Rows may carry a ``currency``. Pass ``rates`` and the reporting
+``currency`` and every amount is converted in one vectorized pass before
+the totals (``currency.RateTable.convert``).
+
+Rows may also carry a ``frequency``. Amounts are then turned into monthly
+equivalents with one multiply by ``MONTHLY_FACTORS``, so every total is
+monthly; ``BudgetTotals.annual()`` scales the same sums by twelve.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from budget_rows import rows_to_dicts
+from currency import DEFAULT_CURRENCY, RateTable, rate_table
+
+# Payload section key -> st.session_state key
+SECTION_KEYS = {
+    "revenus": "revenus",
+    "depensesQuotidiennes": "dep_q",
+    "depensesAdministratives": "dep_a",
+    "depensesFamiliales": "dep_f",
+    "credits": "credits",
+    "impots": "impots",
+}
+
+SECTIONS = tuple(SECTION_KEYS)
+EXPENSE_SECTIONS = SECTIONS[1:]
+SECTION_CODES = {s: i for i, s in enumerate(SECTIONS)}
+
+# Payload section key -> payload["totals"] key
+TOTAL_KEYS = {
+    "revenus": "revenus",
+    "depensesQuotidiennes": "quotidiennes",
+    "depensesAdministratives": "administratives",
+    "depensesFamiliales": "familiales",
+    "credits": "credits",
+    "impots": "impots",
+}
+
+# Row frequency -> factor to its monthly equivalent. Rows without one are monthly.
+FREQUENCIES = ("monthly", "weekly", "quarterly", "annual")
+DEFAULT_FREQUENCY = "monthly"
+FREQUENCY_CODES = {f: i for i, f in enumerate(FREQUENCIES)}
+MONTHLY_FACTORS = np.array([1.0, 52 / 12, 1 / 3, 1 / 12], dtype=np.float64)
+MONTHS_PER_YEAR = 12
+
+
+def monthly_factor(frequency: Optional[str]) -> float:
+    try:
+        return float(MONTHLY_FACTORS[FREQUENCY_CODES[frequency or DEFAULT_FREQUENCY]])
+    except KeyError:
+        raise ValueError(f"unknown frequency {frequency!r}") from None
+
+
+@dataclass(frozen=True)
+class BudgetTotals:
+    section_totals: Dict[str, float]
+    revenus: float
+    depenses: float
+    capacite_epargne: float
+    delta_pct: float
+    shares: Dict[str, float]
+
+    @classmethod
+    def from_section_totals(cls, section_totals: Mapping[str, float]) -> "BudgetTotals":
+        """Derive everything else from the six section sums (O(1))."""
+        revenus = float(section_totals["revenus"])
+        dep = [float(section_totals[s]) for s in EXPENSE_SECTIONS]
+        depenses = sum(dep)
+        capacite = revenus - depenses
+        denom = depenses if depenses > 0 else 1.0
+        return cls(
+            section_totals={s: float(section_totals[s]) for s in SECTIONS},
+            revenus=revenus,
+            depenses=depenses,
+            capacite_epargne=capacite,
+            delta_pct=(capacite / revenus * 100) if revenus > 0 else 0.0,
+            shares={s: v / denom for s, v in zip(EXPENSE_SECTIONS, dep)},
+        )
+
+    def annual(self) -> "BudgetTotals":
+        """The same budget over a year; shares and percentages are unchanged (O(1))."""
+        return BudgetTotals.from_section_totals({s: v * MONTHS_PER_YEAR for s, v in self.section_totals.items()})
+
+    def as_payload_totals(self) -> Dict[str, float]:
+        """Same keys and order as the app's ``payload["totals"]``."""
+        st = self.section_totals
+        return {
+            "revenus": self.revenus,
+            "depenses": self.depenses,
+            "capacite_epargne": self.capacite_epargne,
+            "quotidiennes": st["depensesQuotidiennes"],
+            "administratives": st["depensesAdministratives"],
+            "familiales": st["depensesFamiliales"],
+            "credits": st["credits"],
+            "impots": st["impots"],
+        }
+
+
+class BudgetEngine:
+    """Array-backed budget: ``codes[i]`` is the section of ``amounts[i]``.
+
+    ``amounts`` are monthly and in ``currency``; ``rates`` defaults to the
+    current ``rate_table()`` and is only consulted when a row is in another
+    currency.
+    """
+
+    def __init__(self, sections: Mapping[str, Sequence[Dict]], rates: Optional[RateTable] = None,
+                 currency: str = DEFAULT_CURRENCY):
+        counts = [len(sections.get(s, ())) for s in SECTIONS]
+        n = sum(counts)
+        # (index, currency, frequency) of the rows that set either. Gathered
+        # in the same pass as the amounts; most budgets have none, and then
+        # no per-row currency or frequency array is built at all.
+        tagged: List[Tuple[int, Optional[str], Optional[str]]] = []
+
+        def amounts():
+            i = 0
+            for s in SECTIONS:
+                for r in sections.get(s, ()):
+                    c, f = r.get("currency"), r.get("frequency")
+                    if c or f:
+                        tagged.append((i, c, f))
+                    i += 1
+                    yield float(r.get("montant", 0.0))
+
+        self.amounts = np.fromiter(amounts(), dtype=np.float64, count=n)
+        self.codes = np.repeat(np.arange(len(SECTIONS), dtype=np.int8), counts)
+        self.currency = currency
+        if currency != DEFAULT_CURRENCY or any(c and c != currency for _, c, _ in tagged):
+            currencies: List[Optional[str]] = [None] * n
+            for i, c, _ in tagged:
+                currencies[i] = c
+            self.amounts = (rates or rate_table()).convert(self.amounts, currencies, currency)
+        if any(f and f != DEFAULT_FREQUENCY for _, _, f in tagged):
+            codes = np.full(n, FREQUENCY_CODES[DEFAULT_FREQUENCY], dtype=np.intp)
+            for i, _, f in tagged:
+                if f:
+                    try:
+                        codes[i] = FREQUENCY_CODES[f]
+                    except KeyError:
+                        raise ValueError(f"unknown frequency {f!r}") from None
+            self.amounts = self.amounts * MONTHLY_FACTORS[codes]
+
+    @classmethod
+    def from_arrays(cls, codes: np.ndarray, amounts: np.ndarray) -> "BudgetEngine":
+        engine = cls.__new__(cls)
+        engine.codes = np.asarray(codes, dtype=np.int8)
+        engine.amounts = np.asarray(amounts, dtype=np.float64)
+        if engine.codes.shape != engine.amounts.shape:
+            raise ValueError("codes and amounts must have the same shape")
+        return engine
+
+    def __len__(self) -> int:
+        return int(self.amounts.size)
+
+    def section_array(self) -> np.ndarray:
+        """Per-section sums in ``SECTIONS`` order."""
+        return np.bincount(self.codes, weights=self.amounts, minlength=len(SECTIONS))
+
+    def compute(self) -> BudgetTotals:
+        return BudgetTotals.from_section_totals(dict(zip(SECTIONS, self.section_array().tolist())))
+
+
+class RunningTotals:
+    """Per-section sums kept current by deltas, so the summary costs O(1) per edit.
+
+    Callers apply ``add`` when a row amount changes, a row is added or one is
+    deleted, and ``set`` when a whole section is replaced. ``check`` compares
+    against a full recompute for debugging.
+    """
+
+    def __init__(self, section_totals: Optional[Mapping[str, float]] = None, basis: Optional[Tuple[str, str]] = None):
+        self.section_totals = {s: 0.0 for s in SECTIONS}
+        if section_totals:
+            self.section_totals.update({s: float(v) for s, v in section_totals.items()})
+        # (rate table version, reporting currency) the sums were converted with
+        self.basis = basis
+
+    @classmethod
+    def from_sections(cls, sections: Mapping[str, Sequence[Dict]], rates: Optional[RateTable] = None,
+                      currency: str = DEFAULT_CURRENCY) -> "RunningTotals":
+        rates = rates or rate_table()
+        engine = BudgetEngine(sections, rates, currency)
+        return cls(dict(zip(SECTIONS, engine.section_array().tolist())), basis=(rates.version, currency))
+
+    def add(self, section: str, delta: float) -> None:
+        if delta:
+            self.section_totals[section] += delta
+
+    def set(self, section: str, value: float) -> None:
+        self.section_totals[section] = float(value)
+
+    def totals(self) -> BudgetTotals:
+        return BudgetTotals.from_section_totals(self.section_totals)
+
+    def check(self, sections: Mapping[str, Sequence[Dict]], rates: Optional[RateTable] = None,
+              currency: str = DEFAULT_CURRENCY, tol: float = 1e-6) -> Dict[str, Tuple[float, float]]:
+        """Sections whose running sum drifted from a full recompute: {section: (running, actual)}."""
+        actual = BudgetEngine(sections, rates, currency).compute().section_totals
+        return {
+            s: (self.section_totals[s], actual[s])
+            for s in SECTIONS
+            if abs(self.section_totals[s] - actual[s]) > tol * max(1.0, abs(actual[s]))
+        }
+
+
+def compute_totals(sections: Mapping[str, Sequence[Dict]], rates: Optional[RateTable] = None,
+                   currency: str = DEFAULT_CURRENCY) -> BudgetTotals:
+    return BudgetEngine(sections, rates, currency).compute()
+
+
+def with_converted(sections: Mapping[str, Sequence[Dict]], rates: Optional[RateTable] = None,
+                   currency: str = DEFAULT_CURRENCY) -> Tuple[Dict[str, List[Dict]], BudgetTotals]:
+    """Export rows plus monthly totals in ``currency``.
+
+    Rows in another currency or at another frequency keep their original
+    ``montant``, ``currency`` and ``frequency`` and gain ``montant_converti``,
+    their monthly equivalent in ``currency``.
+    """
+    engine = BudgetEngine(sections, rates, currency)
+    converted = engine.amounts.tolist()
+    out: Dict[str, List[Dict]] = {}
+    i = 0
+    for s in SECTIONS:
+        rows = []
+        for r in sections.get(s, ()):
+            if (r.get("currency") or DEFAULT_CURRENCY) != currency or (r.get("frequency") or DEFAULT_FREQUENCY) != DEFAULT_FREQUENCY:
+                r = {**r, "montant_converti": converted[i]}
+            rows.append(r)
+            i += 1
+        out[s] = rows
+    return out, engine.compute()
+
+
+def sections_from_state(state: Mapping) -> Dict[str, List[Dict]]:
+    """Build ``payload["sections"]`` from the ``Row`` lists in the app's session state."""
+    return {s: rows_to_dicts(state[k]) for s, k in SECTION_KEYS.items()}
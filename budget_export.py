@@ -0,0 +1,247 @@
+# budget_export.py
+"""Downloadable budget files: the JSON export and a compact columnar one.
+
+The JSON export is the app's interchange format (``budget_io`` reads it
+back). For budgets imported from long statements it is large and slow to
+build, so there is also a compact ``.fbz`` file: gzip over a small header
+and one column per field and section::
+
+    b"FNB1" | uint32 header length | header (minified JSON) | columns
+
+The header keeps every payload key except the rows (lang, totals,
+projection, ...) in the original order. For each section it records the row
+count, the type names used (``types``) and the custom labels by row index.
+The columns follow in section order: a ``<u2`` array of codes into
+``types``, then a ``<f8`` array of amounts. Sections whose rows carry a
+``currency`` or ``frequency`` add a ``<u2`` column of codes into the
+header's ``currencies`` or ``frequencies`` (0 = no key), and sections with
+``montant_converti`` add a ``<f8`` column of it (NaN where absent).
+
+``decode_compact`` rebuilds the payload exactly, so dumping it as JSON
+gives the same file as ``export_json``. ``load_compact`` validates it in
+the same way as ``budget_io.load_budgets``, but type checks run once per
+section rather than once per row.
+
+Both encoders are cheap to call lazily. The app hands them to
+``st.download_button`` as callables and caches the bytes by payload digest
+in ``export_cache``.
+"""
+from __future__ import annotations
+import gzip
+import json
+import os
+import struct
+import zlib
+from typing import IO, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from budget_engine import DEFAULT_FREQUENCY, FREQUENCIES, SECTIONS
+from budget_io import BudgetImportError
+from currency import DEFAULT_CURRENCY, rate_table
+from i18n import budgetLabels
+from pdf_cache import PdfCache
+
+MAGIC = b"FNB1"
+COMPACT_EXTENSION = ".fbz"
+COMPACT_MIME = "application/gzip"
+_CODE = np.dtype("<u2")
+_AMOUNT = np.dtype("<f8")
+_HEADER_LEN = struct.Struct("<I")
+# Optional row keys stored as code columns: row key -> header vocabulary key
+_TAGS = {"currency": "currencies", "frequency": "frequencies"}
+
+
+def export_json(payload: Dict) -> bytes:
+    """The regular JSON download (indented, UTF-8)."""
+    return json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+# -----------------------------
+# Compact columnar format
+# -----------------------------
+def encode_compact(payload: Dict, level: int = 6) -> bytes:
+    header: Dict = {}
+    columns: List[bytes] = []
+    for key, value in payload.items():
+        if key != "sections":
+            header[key] = value
+            continue
+        header[key] = {}
+        for section, rows in value.items():
+            vocab: Dict[str, int] = {}
+            codes = [vocab.setdefault(r.get("type", ""), len(vocab)) for r in rows]
+            if len(vocab) > np.iinfo(_CODE).max:
+                raise ValueError(f"{section}: too many distinct types for the compact format")
+            meta = {
+                "rows": len(rows),
+                "types": list(vocab),
+                "custom": {str(i): r["custom_label"] for i, r in enumerate(rows) if "custom_label" in r},
+            }
+            columns.append(np.asarray(codes, dtype=_CODE).tobytes())
+            columns.append(np.fromiter((r.get("montant", 0.0) for r in rows), dtype=_AMOUNT, count=len(rows)).tobytes())
+            # Optional columns, only for sections that use them
+            for tag, vocab_key in _TAGS.items():
+                if any(tag in r for r in rows):
+                    tags: Dict[Optional[str], int] = {None: 0}  # 0: no such key
+                    codes = [tags.setdefault(r.get(tag), len(tags)) for r in rows]
+                    meta[vocab_key] = list(tags)
+                    columns.append(np.asarray(codes, dtype=_CODE).tobytes())
+            if any("montant_converti" in r for r in rows):
+                meta["converted"] = True
+                columns.append(np.fromiter(
+                    (r.get("montant_converti", np.nan) for r in rows), dtype=_AMOUNT, count=len(rows)
+                ).tobytes())
+            header[key][section] = meta
+    head = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    # mtime=0 keeps the bytes a pure function of the payload
+    return gzip.compress(MAGIC + _HEADER_LEN.pack(len(head)) + head + b"".join(columns), compresslevel=level, mtime=0)
+
+
+class _Section:
+    """Decoded columns of one section; the optional ones are None when absent."""
+
+    __slots__ = ("types", "codes", "amounts", "custom", "tags", "converted", "end")
+
+    def __init__(self, raw: bytes, pos: int, n: int, meta: Dict):
+        types, custom = meta.get("types", []), meta.get("custom") or {}
+        if not isinstance(types, list):
+            raise BudgetImportError("'types' must be a list")
+        if not isinstance(custom, dict) or not all(k.isdecimal() and int(k) < n for k in custom):
+            raise BudgetImportError("'custom' must map row indices to labels")
+        self.types = types
+        self.custom = custom
+        self.codes, pos = self._column(raw, pos, n, _CODE)
+        self.amounts, pos = self._column(raw, pos, n, _AMOUNT)
+        # Row key -> (vocabulary, codes), for the tag columns present
+        self.tags: Dict[str, Tuple[List, np.ndarray]] = {}
+        for tag, vocab_key in _TAGS.items():
+            if meta.get(vocab_key) is not None:
+                vocab = meta[vocab_key]
+                if not isinstance(vocab, list):
+                    raise BudgetImportError(f"'{vocab_key}' must be a list")
+                codes, pos = self._column(raw, pos, n, _CODE)
+                if n and int(codes.max()) >= len(vocab):
+                    raise BudgetImportError(f"{tag} code out of range")
+                self.tags[tag] = (vocab, codes)
+        self.converted = None
+        if meta.get("converted"):
+            self.converted, pos = self._column(raw, pos, n, _AMOUNT)
+        self.end = pos
+        if n and int(self.codes.max()) >= len(self.types):
+            raise BudgetImportError("type code out of range")
+
+    @staticmethod
+    def _column(raw: bytes, pos: int, n: int, dtype: np.dtype) -> Tuple[np.ndarray, int]:
+        end = pos + n * dtype.itemsize
+        if end > len(raw):
+            raise BudgetImportError("truncated columns")
+        return np.frombuffer(raw, dtype=dtype, count=n, offset=pos), end
+
+    def rows(self) -> List[Dict]:
+        types = self.types
+        return [{"type": types[c], "montant": a} for c, a in zip(self.codes.tolist(), self.amounts.tolist())]
+
+
+def _read_columns(data: bytes) -> Tuple[Dict, Dict[str, _Section]]:
+    """Header and sections of a compact file; any damage is a ``BudgetImportError``."""
+    try:
+        raw = gzip.decompress(data)
+    except (OSError, EOFError, zlib.error) as e:
+        raise BudgetImportError(f"not a compact export: {e}") from None
+    if raw[:4] != MAGIC or len(raw) < 8:
+        raise BudgetImportError("not a compact export (bad magic)")
+    (size,) = _HEADER_LEN.unpack_from(raw, 4)
+    pos = 8 + size
+    try:
+        header = json.loads(raw[8:pos].decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise BudgetImportError(f"corrupt compact header: {e}") from None
+    if not isinstance(header, dict):
+        raise BudgetImportError("corrupt compact header: not an object")
+    meta = header.get("sections")
+    if not isinstance(meta, dict):
+        raise BudgetImportError("missing 'sections' object")
+    out = {}
+    for section, m in meta.items():
+        if not isinstance(m, dict):
+            raise BudgetImportError(f"{section}: section header must be an object")
+        n = m.get("rows", 0)
+        if isinstance(n, bool) or not isinstance(n, int) or n < 0:
+            raise BudgetImportError(f"{section}: row count must be a non-negative integer")
+        try:
+            out[section] = _Section(raw, pos, n, m)
+        except BudgetImportError as e:
+            raise BudgetImportError(f"{section}: {e}") from None
+        pos = out[section].end
+    return header, out
+
+
+def decode_compact(data: bytes) -> Dict:
+    """The payload ``encode_compact`` was given, unvalidated."""
+    header, columns = _read_columns(data)
+    sections = {}
+    for section, col in columns.items():
+        rows = col.rows()
+        for i, label in col.custom.items():
+            rows[int(i)]["custom_label"] = label
+        for tag, (vocab, codes) in col.tags.items():
+            for row, c in zip(rows, codes.tolist()):
+                if c:
+                    row[tag] = vocab[c]
+        if col.converted is not None:
+            for row, v in zip(rows, col.converted.tolist()):
+                if v == v:  # NaN marks rows without a converted amount
+                    row["montant_converti"] = v
+        sections[section] = rows
+    header["sections"] = sections
+    return header
+
+
+def load_compact(fp: IO[bytes]) -> List[Dict[str, List[Dict]]]:
+    """Validated sections from a compact export, shaped like ``budget_io.load_budgets``."""
+    _, columns = _read_columns(fp.read())
+    unknown = set(columns) - set(budgetLabels["fr"])
+    if unknown:
+        raise BudgetImportError(f"unknown sections: {', '.join(sorted(unknown))}")
+    # Known values per tag, and the one that is the same as no key
+    known = {
+        "currency": (rate_table().rates, DEFAULT_CURRENCY),
+        "frequency": (FREQUENCIES, DEFAULT_FREQUENCY),
+    }
+    out = {}
+    for section in SECTIONS:
+        if section not in columns:
+            out[section] = []
+            continue
+        col = columns[section]
+        bad = [t for t in col.types if not isinstance(t, str) or t not in budgetLabels["fr"][section]]
+        if bad:
+            raise BudgetImportError(f"{section}: unknown type {bad[0]!r}")
+        if not np.all(np.isfinite(col.amounts) & (col.amounts >= 0)):
+            raise BudgetImportError(f"{section}: montant must be a finite, non-negative number")
+        if any(not isinstance(v, str) for v in col.custom.values()):
+            raise BudgetImportError(f"{section}: custom label must be a string")
+        rows = col.rows()
+        if "autre" in col.types:
+            other = col.types.index("autre")
+            for i in np.flatnonzero(col.codes == other).tolist():
+                rows[i]["custom_label"] = col.custom.get(str(i), "")
+        for tag, (vocab, codes) in col.tags.items():
+            values, default = known[tag]
+            bad = [v for v in vocab[1:] if not isinstance(v, str) or v not in values]
+            if bad:
+                raise BudgetImportError(f"{section}: unknown {tag} {bad[0]!r}")
+            for row, c in zip(rows, codes.tolist()):
+                if c and vocab[c] != default:
+                    row[tag] = vocab[c]
+        out[section] = rows
+    return [out]
+
+
+def is_compact(name: str) -> bool:
+    return name.lower().endswith(COMPACT_EXTENSION)
+
+
+# Encoded downloads by "<format>:<payload digest>", shared by all sessions
+export_cache = PdfCache(int(os.environ.get("FINANTHROPE_EXPORT_CACHE", 64)))
@@ -0,0 +1,153 @@
+# budget_io.py
+"""Read budgets back from the app's JSON export.
+
+``iter_payloads`` decodes a byte stream one top-level JSON value at a time,
+so a file holding many budgets (JSONL, concatenated objects, or a top-level
+array of payloads) never has to be decoded with a single ``json.loads``.
+``validate_sections`` checks a payload against ``budgetLabels`` and returns
+rows in the shape the app keeps in session state.
+"""
+from __future__ import annotations
+import codecs
+import json
+import sys
+from typing import IO, Container, Dict, Iterator, List
+
+from budget_engine import DEFAULT_FREQUENCY, FREQUENCIES, SECTIONS
+from currency import DEFAULT_CURRENCY, rate_table
+from i18n import budgetLabels
+
+CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_WS = " \t\r\n"
+
+
+class BudgetImportError(ValueError):
+    """Raised when an uploaded file is not a valid Finanthrope export."""
+
+
+def _iter_values(fp: IO[bytes], chunk_size: int) -> Iterator[object]:
+    """Yield top-level JSON values, descending one level into a top-level array."""
+    utf8 = codecs.getincrementaldecoder("utf-8-sig")()
+    buf = ""
+    eof = False
+    need = chunk_size
+    in_array = None  # unknown until the first non-space character
+
+    def fill(n: int) -> bool:
+        nonlocal buf, eof
+        if eof:
+            return False
+        data = fp.read(n)
+        if not data:
+            buf += utf8.decode(b"", final=True)
+            eof = True
+            return False
+        buf += utf8.decode(data)
+        return True
+
+    pos = 0
+    while True:
+        # Skip whitespace and, inside an array, the separators between values
+        while True:
+            while pos < len(buf) and buf[pos] in _WS:
+                pos += 1
+            if pos < len(buf):
+                break
+            buf, pos = "", 0
+            if not fill(chunk_size):
+                if in_array:
+                    raise BudgetImportError("unterminated JSON array")
+                return
+        ch = buf[pos]
+        if in_array is None:
+            in_array = ch == "["
+            if in_array:
+                pos += 1
+                continue
+        if in_array and ch == ",":
+            pos += 1
+            continue
+        if in_array and ch == "]":
+            return
+
+        try:
+            value, end = _decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError as e:
+            # Probably a value cut by the chunk boundary: read more, growing the
+            # read size so one huge budget is decoded in O(n) amortized.
+            if fill(need):
+                need *= 2
+                continue
+            raise BudgetImportError(f"invalid JSON: {e.msg} (char {e.pos})") from None
+        need = chunk_size
+        yield value
+        buf, pos = buf[end:], 0
+
+
+def iter_payloads(fp: IO[bytes], chunk_size: int = CHUNK_SIZE) -> Iterator[Dict]:
+    for value in _iter_values(fp, chunk_size):
+        if not isinstance(value, dict):
+            raise BudgetImportError("each budget must be a JSON object")
+        yield value
+
+
+def _validate_row(section: str, row: object, where: str, currencies: Container[str]) -> Dict:
+    if not isinstance(row, dict):
+        raise BudgetImportError(f"{where}: row must be an object")
+    t = row.get("type")
+    if not isinstance(t, str) or t not in budgetLabels["fr"][section]:
+        raise BudgetImportError(f"{where}: unknown type {t!r}")
+    amt = row.get("montant", 0.0)
+    # json accepts NaN and Infinity, which would poison every total; the
+    # chained comparison is False for both (and for ints beyond a float)
+    if isinstance(amt, bool) or not isinstance(amt, (int, float)) or not 0 <= amt <= sys.float_info.max:
+        raise BudgetImportError(f"{where}: montant must be a finite, non-negative number")
+    out = {"type": t, "montant": float(amt)}
+    if t == "autre":
+        custom = row.get("custom_label") or row.get("customLabel") or ""
+        if not isinstance(custom, str):
+            raise BudgetImportError(f"{where}: custom label must be a string")
+        out["custom_label"] = custom
+    # montant_converti is informational; totals are always reconverted
+    currency = row.get("currency")
+    if currency is not None and currency != DEFAULT_CURRENCY:
+        if not isinstance(currency, str) or currency not in currencies:
+            raise BudgetImportError(f"{where}: unknown currency {currency!r}")
+        out["currency"] = currency
+    frequency = row.get("frequency")
+    if frequency is not None and frequency != DEFAULT_FREQUENCY:
+        if frequency not in FREQUENCIES:
+            raise BudgetImportError(f"{where}: unknown frequency {frequency!r}")
+        out["frequency"] = frequency
+    return out
+
+
+def validate_sections(payload: Dict) -> Dict[str, List[Dict]]:
+    """Return ``payload["sections"]`` normalized to the app's row dicts."""
+    sections = payload.get("sections")
+    if not isinstance(sections, dict):
+        raise BudgetImportError("missing 'sections' object")
+    unknown = set(sections) - set(budgetLabels["fr"])
+    if unknown:
+        raise BudgetImportError(f"unknown sections: {', '.join(sorted(unknown))}")
+    currencies = rate_table().rates
+    out = {}
+    for section in SECTIONS:
+        rows = sections.get(section, [])
+        if not isinstance(rows, list):
+            raise BudgetImportError(f"{section}: expected a list of rows")
+        out[section] = [_validate_row(section, r, f"{section}[{i}]", currencies) for i, r in enumerate(rows)]
+    return out
+
+
+def load_budgets(fp: IO[bytes], chunk_size: int = CHUNK_SIZE) -> List[Dict[str, List[Dict]]]:
+    """Decode and validate every budget in ``fp``."""
+    budgets = []
+    for n, payload in enumerate(iter_payloads(fp, chunk_size), 1):
+        try:
+            budgets.append(validate_sections(payload))
+        except BudgetImportError as e:
+            raise BudgetImportError(f"budget {n}: {e}") from None
+    return budgets
@@ -0,0 +1,297 @@
+# budget_service.py
+"""Headless HTTP API: budget totals and the branded PDF, without the UI.
+
+Standard library only; run it next to the app::
+
+    python budget_service.py --host 127.0.0.1 --port 8600
+
+Request bodies are JSON: either ``payload["sections"]`` itself or a whole
+exported payload (``{"sections": ..., "currency": ..., "rates": ...}``).
+Rows are validated like an import (``budget_io.validate_sections``), and
+totals come from ``BudgetEngine``, as in the app and the PDF. An invalid
+payload or an unknown reporting ``currency`` answers 400; any other error
+is logged and answers 500 with a JSON body.
+
+* ``POST /totals``: ``{"currency", "totals", "annual", "shares"}``. Totals
+  are monthly, with the same keys as ``payload["totals"]``.
+* ``POST /pdf?lang=fr&wait=30``: the PDF bytes. Renders run on the shared
+  ``pdf_jobs`` executor (``FINANTHROPE_PDF_WORKERS``, ``FINANTHROPE_PDF_QUEUE``).
+  Identical payloads share one render and are then served from ``pdf_cache``.
+  A full queue answers 503 with ``Retry-After``. A render still running
+  after ``wait`` seconds answers 202 with ``Location: /pdf/<digest>``.
+* ``GET /pdf/<digest>``: 200 with the PDF once ready, 202 while queued or
+  rendering, 500 if it failed, 404 if unknown.
+* ``GET /health``: queue and cache counters.
+
+At most ``--max-requests`` requests are handled at once (one thread
+each); connections beyond that get an immediate 503. See
+``benchmarks/bench_service.py`` for a load test.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import socket
+import threading
+import traceback
+from concurrent.futures import wait as wait_futures
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from budget_engine import BudgetEngine
+from budget_io import BudgetImportError, validate_sections
+from currency import CurrencyError, payload_currency, payload_rates
+from i18n import LANGS
+from pdf_cache import payload_digest
+from pdf_jobs import PdfJobs, pdf_jobs
+
+DEFAULT_PORT = 8600
+DEFAULT_MAX_REQUESTS = int(os.environ.get("FINANTHROPE_SERVICE_REQUESTS", 32))
+DEFAULT_PDF_WAIT = float(os.environ.get("FINANTHROPE_SERVICE_PDF_WAIT", 30))
+MAX_BODY = int(os.environ.get("FINANTHROPE_SERVICE_MAX_BODY", 16 * 1024 * 1024))
+RETRY_AFTER = "1"
+
+_BUSY = (
+    b"HTTP/1.0 503 Service Unavailable\r\nContent-Type: application/json\r\n"
+    b"Retry-After: " + RETRY_AFTER.encode() + b"\r\nConnection: close\r\n\r\n"
+    b'{"error": "server busy"}'
+)
+
+
+class RequestError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_payload(body: object) -> Dict:
+    """A payload with validated sections, from sections alone or a whole export."""
+    if not isinstance(body, dict):
+        raise RequestError(400, "expected a JSON object")
+    payload = dict(body) if "sections" in body else {"sections": body}
+    try:
+        payload["sections"] = validate_sections(payload)
+    except BudgetImportError as e:
+        raise RequestError(400, str(e)) from None
+    currency = payload.get("currency")
+    if currency is not None:
+        try:
+            codes = payload_rates(payload).codes
+        except CurrencyError as e:
+            raise RequestError(400, str(e)) from None
+        if not isinstance(currency, str) or currency not in codes:
+            raise RequestError(400, f"unknown currency {currency!r}")
+    return payload
+
+
+def compute(payload: Dict) -> Dict:
+    currency = payload_currency(payload)
+    try:
+        budget = BudgetEngine(payload["sections"], payload_rates(payload), currency).compute()
+    except CurrencyError as e:
+        raise RequestError(400, str(e)) from None
+    return {
+        "currency": currency,
+        "totals": budget.as_payload_totals(),
+        "annual": budget.annual().as_payload_totals(),
+        "shares": budget.shares,
+    }
+
+
+class BudgetHandler(BaseHTTPRequestHandler):
+    server: "BudgetServer"
+    server_version = "Finanthrope"
+
+    # ---- plumbing ----
+    def log_message(self, format: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, status: int, obj: object, headers: Optional[Dict[str, str]] = None) -> None:
+        self._send(status, json.dumps(obj, ensure_ascii=False).encode("utf-8"), "application/json", headers)
+
+    def _body(self) -> object:
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            raise RequestError(411, "Content-Length required") from None
+        if length < 0:
+            # rfile.read(-1) would block until the client closes
+            raise RequestError(400, "negative Content-Length")
+        if length > MAX_BODY:
+            raise RequestError(413, f"body larger than {MAX_BODY} bytes")
+        try:
+            return json.loads(self.rfile.read(length))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise RequestError(400, f"invalid JSON: {e}") from None
+
+    def _route(self, method: str) -> None:
+        url = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            if method == "GET" and url.path == "/health":
+                self._json(200, {"jobs": self.server.jobs.stats(), "cache": self.server.jobs.cache.stats()})
+            elif method == "POST" and url.path == "/totals":
+                self._json(200, compute(parse_payload(self._body())))
+            elif method == "POST" and url.path == "/pdf":
+                self._post_pdf(query)
+            elif method == "GET" and url.path.startswith("/pdf/"):
+                self._get_pdf(url.path[len("/pdf/"):])
+            else:
+                raise RequestError(404, f"no route for {method} {url.path}")
+        except RequestError as e:
+            self._json(e.status, {"error": str(e)})
+        except Exception:
+            # Always logged, whatever --verbose says: a 500 is a bug
+            super().log_message("%s %s failed\n%s", method, url.path, traceback.format_exc())
+            self._json(500, {"error": "internal error"})
+
+    def do_GET(self) -> None:
+        self._route("GET")
+
+    def do_POST(self) -> None:
+        self._route("POST")
+
+    # ---- PDF ----
+    def _post_pdf(self, query: Dict[str, str]) -> None:
+        payload = parse_payload(self._body())
+        lang = query.get("lang") or payload.get("lang") or "fr"
+        if lang not in LANGS:
+            raise RequestError(400, f"unknown language {lang!r}")
+        try:
+            timeout = min(float(query.get("wait", self.server.pdf_wait)), self.server.pdf_wait)
+        except ValueError:
+            raise RequestError(400, "wait must be a number of seconds") from None
+        # Totals are recomputed, never taken from the request
+        payload = {**payload, "lang": lang}
+        payload["totals"] = compute(payload)["totals"]
+        key = payload_digest(payload, lang)
+
+        data = self.server.jobs.cache.get(key)
+        if data is not None:
+            return self._pdf(data)
+        job = self.server.jobs.submit(key, payload, lang)
+        if job is None:
+            return self._json(503, {"error": "PDF queue full"}, {"Retry-After": RETRY_AFTER})
+        wait_futures([job.future], timeout=max(0.0, timeout))
+        self._pdf_job(key, job)
+
+    def _get_pdf(self, key: str) -> None:
+        data = self.server.jobs.cache.get(key)
+        if data is not None:
+            return self._pdf(data)
+        job = self.server.jobs.get(key)
+        if job is None:
+            raise RequestError(404, "unknown PDF")
+        self._pdf_job(key, job)
+
+    def _pdf_job(self, key: str, job) -> None:
+        state = job.state
+        if state == "done":
+            # Read the future, not the cache: its callback may not have run yet
+            return self._pdf(job.result())
+        if state == "failed":
+            self.server.jobs.discard(key)
+            raise RequestError(500, job.error or "render failed")
+        self._json(202, {"state": state, "elapsed": round(job.elapsed, 3)},
+                   {"Location": f"/pdf/{key}", "Retry-After": RETRY_AFTER})
+
+    def _pdf(self, data: bytes) -> None:
+        self._send(200, data, "application/pdf")
+
+
+class BudgetServer(ThreadingHTTPServer):
+    """One thread per request, at most ``max_requests`` at a time."""
+
+    daemon_threads = True
+    request_queue_size = 128  # listen backlog
+
+    def __init__(self, address: Tuple[str, int], jobs: PdfJobs = pdf_jobs,
+                 max_requests: int = DEFAULT_MAX_REQUESTS, pdf_wait: float = DEFAULT_PDF_WAIT,
+                 verbose: bool = False):
+        self.jobs = jobs
+        self.pdf_wait = pdf_wait
+        self.verbose = verbose
+        self.max_requests = max(1, max_requests)
+        self._slots = threading.BoundedSemaphore(self.max_requests)
+        self.rejected = 0
+        super().__init__(address, BudgetHandler)
+
+    def process_request(self, request, client_address) -> None:
+        if not self._slots.acquire(blocking=False):
+            self._reject(request)
+            return
+        try:
+            super().process_request(request, client_address)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _reject(self, request: socket.socket) -> None:
+        """503 without parsing the request, so overload costs no thread."""
+        self.rejected += 1
+        try:
+            request.setblocking(False)
+            # Closing with unread bytes would reset the connection and lose
+            # the 503, so drain what the client has sent so far, twice
+            self._drain(request)
+            request.setblocking(True)
+            request.sendall(_BUSY)
+            request.shutdown(socket.SHUT_WR)
+            request.setblocking(False)
+            self._drain(request)
+        except OSError:
+            pass
+        self.close_request(request)
+
+    @staticmethod
+    def _drain(request: socket.socket) -> None:
+        try:
+            while request.recv(65536):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+
+    def process_request_thread(self, request, client_address) -> None:
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._slots.release()
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Serve Finanthrope totals and PDFs over HTTP.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ap.add_argument("--max-requests", type=int, default=DEFAULT_MAX_REQUESTS,
+                    help="requests handled at once; more get 503 (FINANTHROPE_SERVICE_REQUESTS)")
+    ap.add_argument("--pdf-wait", type=float, default=DEFAULT_PDF_WAIT,
+                    help="longest a PDF request blocks before answering 202 (seconds)")
+    ap.add_argument("-v", "--verbose", action="store_true", help="log every request")
+    args = ap.parse_args(argv)
+
+    server = BudgetServer((args.host, args.port), max_requests=args.max_requests,
+                          pdf_wait=args.pdf_wait, verbose=args.verbose)
+    print(f"Finanthrope service on http://{args.host}:{server.server_address[1]} "
+          f"({pdf_jobs.workers} PDF workers, queue {pdf_jobs.max_pending}, {server.max_requests} requests)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,201 @@
+# budget_store.py
+"""Optional SQLite persistence for budgets.
+
+Set ``FINANTHROPE_STORE=/data/budgets.db`` to keep each user's budget across
+reloads and pod restarts. The database runs in WAL mode so readers never
+block the writer, and all sessions of a process share one small connection
+pool.
+
+Saves are debounced: ``save()`` only records the latest snapshot per user in
+memory, and a background thread writes everything pending in one
+transaction every ``FINANTHROPE_STORE_FLUSH_MS`` (default 1000). Each budget
+is a single row keyed by user id, with one JSON column per section, so
+loading it back is one primary-key lookup. Loaded rows are validated like
+an import (``budget_io.validate_sections``).
+
+To skip no-op saves the store remembers a hash of the last snapshot queued
+per user, for at most ``FINANTHROPE_STORE_SEEN`` users (default 10000,
+least recently saved dropped first).
+"""
+from __future__ import annotations
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from budget_engine import SECTION_KEYS
+from budget_io import BudgetImportError, validate_sections
+
+STORE_ENV = "FINANTHROPE_STORE"
+FLUSH_ENV = "FINANTHROPE_STORE_FLUSH_MS"
+POOL_ENV = "FINANTHROPE_STORE_POOL"
+SEEN_ENV = "FINANTHROPE_STORE_SEEN"
+DEFAULT_SEEN = 10000
+
+# Columns, in the state-key naming the app uses for its six sections
+COLUMNS = tuple(SECTION_KEYS.values())
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS budgets (
+    user_id    TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL,
+    {", ".join(f"{c} TEXT NOT NULL DEFAULT '[]'" for c in COLUMNS)}
+) WITHOUT ROWID
+"""
+_UPSERT = (
+    f"INSERT INTO budgets (user_id, updated_at, {', '.join(COLUMNS)}) "
+    f"VALUES (?, ?, {', '.join('?' for _ in COLUMNS)}) "
+    f"ON CONFLICT(user_id) DO UPDATE SET updated_at = excluded.updated_at, "
+    + ", ".join(f"{c} = excluded.{c}" for c in COLUMNS)
+)
+_SELECT = f"SELECT {', '.join(COLUMNS)} FROM budgets WHERE user_id = ?"
+
+
+class ConnectionPool:
+    """Fixed-size pool of SQLite connections shared across threads."""
+
+    def __init__(self, path: str, size: int = 4):
+        self.path = path
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        for _ in range(max(1, size)):
+            self._idle.put(self._connect())
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints, safe with WAL
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class BudgetStore:
+    """Per-user budget rows with debounced, batched writes.
+
+    ``writes`` counts flushed transactions and ``rows_written`` the budgets in
+    them; the gap to the number of ``save()`` calls is what debouncing saved.
+    """
+
+    def __init__(self, path: str, pool_size: int = 4, flush_interval: float = 1.0, max_seen: int = DEFAULT_SEEN):
+        self.pool = ConnectionPool(path, pool_size)
+        self.flush_interval = flush_interval
+        with self.pool.connection() as conn:
+            conn.execute(_SCHEMA)
+        self._pending: Dict[str, tuple] = {}
+        # Hash of the last snapshot queued per user, to skip no-op saves (LRU)
+        self._last: "OrderedDict[str, int]" = OrderedDict()
+        self.max_seen = max(1, int(max_seen))
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self.writes = 0
+        self.rows_written = 0
+
+    def load(self, user_id: str) -> Optional[Dict[str, List[Dict]]]:
+        """The user's budget as ``payload["sections"]``, or None if never saved.
+
+        Raises ``BudgetImportError`` if the stored rows are not a valid budget.
+        """
+        with self._lock:
+            row = self._pending.get(user_id)
+        if row is None:
+            with self.pool.connection() as conn:
+                row = conn.execute(_SELECT, (user_id,)).fetchone()
+        if row is None:
+            return None
+        try:
+            sections = {s: json.loads(blob) for s, blob in zip(SECTION_KEYS, row)}
+        except (TypeError, ValueError) as e:
+            raise BudgetImportError(f"stored budget is not valid JSON: {e}") from None
+        return validate_sections({"sections": sections})
+
+    def save(self, user_id: str, sections: Dict[str, List[Dict]]) -> bool:
+        """Queue the budget for the next flush; returns False if it is unchanged."""
+        row = tuple(json.dumps(sections.get(s, []), ensure_ascii=False, separators=(",", ":")) for s in SECTION_KEYS)
+        with self._lock:
+            if self._last.get(user_id) == hash(row):
+                self._last.move_to_end(user_id)
+                return False
+            self._last[user_id] = hash(row)
+            self._last.move_to_end(user_id)
+            while len(self._last) > self.max_seen:
+                self._last.popitem(last=False)
+            self._pending[user_id] = row
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="finanthrope-store", daemon=True)
+                self._thread.start()
+        return True
+
+    def flush(self) -> int:
+        """Write every pending budget in one transaction; returns the row count."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        now = time.time()
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(_UPSERT, [(uid, now, *row) for uid, row in pending.items()])
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                with self._lock:  # keep newer saves, retry the rest on the next flush
+                    for uid, row in pending.items():
+                        self._pending.setdefault(uid, row)
+                raise
+        self.writes += 1
+        self.rows_written += len(pending)
+        return len(pending)
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            try:
+                self.flush()
+            except sqlite3.Error:
+                pass  # retried on the next tick
+
+    def close(self) -> None:
+        self._closed = True
+        self._wake.set()
+        self.flush()
+        self.pool.close()
+
+
+def open_store() -> Optional[BudgetStore]:
+    path = os.environ.get(STORE_ENV)
+    if not path:
+        return None
+    store = BudgetStore(
+        path,
+        pool_size=int(os.environ.get(POOL_ENV, "4")),
+        flush_interval=int(os.environ.get(FLUSH_ENV, "1000")) / 1000,
+        max_seen=int(os.environ.get(SEEN_ENV, DEFAULT_SEEN)),
+    )
+    atexit.register(store.close)
+    return store
+
+
+# Process-wide store, or None when persistence is off
+budget_store = open_store()
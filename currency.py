@@ -0,0 +1,134 @@
+# currency.py
+"""Exchange rates from a local file, and vectorized conversion.
+
+Rates come from ``FINANTHROPE_RATES`` (default ``rates.json`` next to this
+module) and never from the network. The file gives the units of each
+currency per one unit of ``base``, as central banks publish them::
+
+    {"base": "EUR", "as_of": "2026-10-01", "rates": {"CHF": 0.93, "GBP": 0.87, "USD": 1.17}}
+
+``rate_table()`` stats the file and re-reads it only when its mtime or size
+changed. ``RateTable.version`` changes with the file, so anything caching
+converted amounts (``RunningTotals``) knows when to recompute.
+
+A row without a currency is in ``DEFAULT_CURRENCY``, the only currency the
+app had before. Old exports therefore keep their meaning.
+"""
+from __future__ import annotations
+import json
+import math
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_CURRENCY = "EUR"
+DEFAULT_RATES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rates.json")
+SYMBOLS = {"EUR": "€", "USD": "$", "GBP": "£", "CHF": "CHF", "JPY": "¥", "CAD": "CA$"}
+
+
+class CurrencyError(ValueError):
+    """Unknown currency, or a rate file that cannot be used."""
+
+
+def currency_symbol(code: str) -> str:
+    return SYMBOLS.get(code, code)
+
+
+@dataclass(frozen=True)
+class RateTable:
+    base: str
+    as_of: str
+    rates: Dict[str, float]  # units of each currency per 1 ``base``
+    version: str = ""
+
+    @classmethod
+    def from_dict(cls, d: Mapping, version: str = "") -> "RateTable":
+        base = d.get("base", DEFAULT_CURRENCY)
+        raw = d.get("rates")
+        if not isinstance(base, str) or not isinstance(raw, dict):
+            raise CurrencyError("rate file needs a 'base' code and a 'rates' object")
+        rates = {base: 1.0}
+        for code, rate in raw.items():
+            if isinstance(rate, bool) or not isinstance(rate, (int, float)) or not math.isfinite(rate) or rate <= 0:
+                raise CurrencyError(f"rate for {code!r} must be a positive number")
+            rates[str(code)] = float(rate)
+        if DEFAULT_CURRENCY not in rates:
+            raise CurrencyError(f"rate file must include {DEFAULT_CURRENCY}")
+        return cls(base, str(d.get("as_of", "")), rates, version)
+
+    @property
+    def codes(self) -> Tuple[str, ...]:
+        """Default currency first, then the rest alphabetically."""
+        return (DEFAULT_CURRENCY,) + tuple(sorted(c for c in self.rates if c != DEFAULT_CURRENCY))
+
+    def rate(self, code: str) -> float:
+        try:
+            return self.rates[code]
+        except KeyError:
+            raise CurrencyError(f"no exchange rate for {code!r}") from None
+
+    def factor(self, src: Optional[str], dst: str) -> float:
+        """Multiply an amount in ``src`` (None = default currency) by this to get ``dst``."""
+        src = src or DEFAULT_CURRENCY
+        return 1.0 if src == dst else self.rate(dst) / self.rate(src)
+
+    def convert(self, amounts: np.ndarray, currencies: Sequence[Optional[str]], to: str) -> np.ndarray:
+        """``amounts[i]`` from ``currencies[i]`` into ``to``: one lookup per distinct currency."""
+        index: Dict[str, int] = {}
+        codes = np.fromiter(
+            (index.setdefault(c or DEFAULT_CURRENCY, len(index)) for c in currencies),
+            dtype=np.intp, count=len(currencies),
+        )
+        amounts = np.asarray(amounts, dtype=np.float64)
+        if not index or list(index) == [to]:
+            return amounts
+        factors = np.array([self.factor(c, to) for c in index], dtype=np.float64)
+        return amounts * factors[codes]
+
+    def subset(self, codes: Iterable[str]) -> Dict:
+        """Payload form restricted to ``codes``, enough to redo the conversion later."""
+        codes = set(codes) | {DEFAULT_CURRENCY}
+        return {"base": self.base, "as_of": self.as_of, "rates": {c: self.rate(c) for c in sorted(codes)}}
+
+
+# Without a rate file the app is single-currency, as before
+SINGLE_CURRENCY = RateTable(DEFAULT_CURRENCY, "", {DEFAULT_CURRENCY: 1.0}, "none")
+
+
+def rates_path() -> str:
+    return os.environ.get("FINANTHROPE_RATES") or DEFAULT_RATES_PATH
+
+
+@lru_cache(maxsize=4)
+def _load(path: str, mtime_ns: int, size: int) -> RateTable:
+    # (mtime_ns, size) only key the cache, so an edited file is re-read
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise CurrencyError(f"cannot read rate file {path}: {e}") from None
+    return RateTable.from_dict(data, version=f"{mtime_ns}:{size}")
+
+
+def rate_table(path: Optional[str] = None) -> RateTable:
+    path = path or rates_path()
+    try:
+        st = os.stat(path)
+    except OSError:
+        return SINGLE_CURRENCY
+    return _load(path, st.st_mtime_ns, st.st_size)
+
+
+def payload_rates(payload: Mapping) -> RateTable:
+    """The rates a payload was exported with, or the current table for older payloads."""
+    rates = payload.get("rates")
+    if isinstance(rates, dict):
+        return RateTable.from_dict(rates, version="payload")
+    return rate_table()
+
+
+def payload_currency(payload: Mapping) -> str:
+    return payload.get("currency") or DEFAULT_CURRENCY
@@ -0,0 +1,170 @@
+# history.py
+"""Per-session undo/redo over the six section lists.
+
+Nothing is deep-copied. Each step records only what changed:
+
+* ``RowEdit``: one row's fields before and after (two small tuples);
+* ``RowInsert`` / ``RowDelete``: the index, the row's fields and its id,
+  so a restored row gets its widget keys back;
+* ``SectionsReplace``: the old and new list objects of whole sections
+  (grid edits, import, reset). The lists are shared with session state,
+  not copied. Every later in-place edit is itself a step, so by the time
+  this step is undone the new lists hold exactly what they held when it
+  was recorded.
+
+Both stacks are deques, so push and pop are O(1). ``depth`` bounds the
+number of undo steps (``FINANTHROPE_UNDO_DEPTH``, default 50). The
+estimated bytes held by both stacks stay under ``max_bytes``
+(``FINANTHROPE_UNDO_BYTES``, default 2 MiB); the oldest steps are dropped
+first.
+"""
+from __future__ import annotations
+import os
+from collections import deque
+from typing import Deque, Dict, List, MutableMapping, Tuple
+
+from budget_rows import Row
+
+DEFAULT_DEPTH = int(os.environ.get("FINANTHROPE_UNDO_DEPTH", 50))
+DEFAULT_MAX_BYTES = int(os.environ.get("FINANTHROPE_UNDO_BYTES", 2 * 1024 * 1024))
+
+# Rough per-object costs used for the memory cap (CPython, 64-bit)
+_STEP_BYTES = 120
+_FIELDS_BYTES = 80
+_ROW_BYTES = 72
+
+
+class RowEdit:
+    __slots__ = ("state_key", "index", "before", "after")
+
+    def __init__(self, state_key: str, index: int, before: Tuple, after: Tuple):
+        self.state_key, self.index, self.before, self.after = state_key, index, before, after
+
+    @property
+    def size(self) -> int:
+        return _STEP_BYTES + 2 * _FIELDS_BYTES
+
+    def undo(self, state: MutableMapping) -> None:
+        state[self.state_key][self.index].assign(self.before)
+
+    def redo(self, state: MutableMapping) -> None:
+        state[self.state_key][self.index].assign(self.after)
+
+
+class RowInsert:
+    __slots__ = ("state_key", "index", "fields", "row_id")
+
+    def __init__(self, state_key: str, index: int, fields: Tuple, row_id: int):
+        self.state_key, self.index, self.fields, self.row_id = state_key, index, fields, row_id
+
+    @property
+    def size(self) -> int:
+        return _STEP_BYTES + _FIELDS_BYTES
+
+    def undo(self, state: MutableMapping) -> None:
+        del state[self.state_key][self.index]
+
+    def redo(self, state: MutableMapping) -> None:
+        state[self.state_key].insert(self.index, Row(*self.fields, id=self.row_id))
+
+
+class RowDelete(RowInsert):
+    __slots__ = ()
+
+    def undo(self, state: MutableMapping) -> None:
+        RowInsert.redo(self, state)
+
+    def redo(self, state: MutableMapping) -> None:
+        RowInsert.undo(self, state)
+
+
+class SectionsReplace:
+    __slots__ = ("before", "after")
+
+    def __init__(self, before: Dict[str, List[Row]], after: Dict[str, List[Row]]):
+        self.before, self.after = before, after
+
+    @property
+    def size(self) -> int:
+        # Only the old lists are kept alive by the history alone
+        return _STEP_BYTES + _ROW_BYTES * sum(len(rows) for rows in self.before.values())
+
+    def undo(self, state: MutableMapping) -> None:
+        for key, rows in self.before.items():
+            state[key] = rows
+
+    def redo(self, state: MutableMapping) -> None:
+        for key, rows in self.after.items():
+            state[key] = rows
+
+
+class History:
+    """Bounded undo/redo stacks of the steps above."""
+
+    def __init__(self, depth: int = DEFAULT_DEPTH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.depth = max(1, int(depth))
+        self.max_bytes = max(0, int(max_bytes))
+        self._undo: Deque = deque()
+        self._redo: Deque = deque()
+        self.bytes = 0
+        self.dropped = 0
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def push(self, step) -> None:
+        """Record a step that was just applied; the redo stack is discarded."""
+        while self._redo:
+            self.bytes -= self._redo.pop().size
+        if step.size > self.max_bytes:
+            # Cannot be kept; older steps would no longer line up with the state
+            self.clear()
+            self.dropped += 1
+            return
+        self._undo.append(step)
+        self.bytes += step.size
+        while len(self._undo) > self.depth or self.bytes > self.max_bytes:
+            self.bytes -= self._undo.popleft().size
+            self.dropped += 1
+
+    def edit(self, state_key: str, index: int, before: Tuple, after: Tuple) -> None:
+        if before != after:
+            self.push(RowEdit(state_key, index, before, after))
+
+    def insert(self, state_key: str, index: int, row: Row) -> None:
+        self.push(RowInsert(state_key, index, row.fields(), row.id))
+
+    def delete(self, state_key: str, index: int, row: Row) -> None:
+        self.push(RowDelete(state_key, index, row.fields(), row.id))
+
+    def replace(self, before: Dict[str, List[Row]], after: Dict[str, List[Row]]) -> None:
+        self.push(SectionsReplace(before, after))
+
+    def undo(self, state: MutableMapping) -> bool:
+        if not self._undo:
+            return False
+        step = self._undo.pop()
+        step.undo(state)
+        self._redo.append(step)
+        return True
+
+    def redo(self, state: MutableMapping) -> bool:
+        if not self._redo:
+            return False
+        step = self._redo.pop()
+        step.redo(state)
+        self._undo.append(step)
+        return True
+
+    def clear(self) -> None:
+        self._undo.clear()
+        self._redo.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"undo": len(self._undo), "redo": len(self._redo), "bytes": self.bytes, "dropped": self.dropped}
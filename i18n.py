@@ -0,0 +1,343 @@
+# i18n.py
+"""UI and category labels shared by the app and the PDF report.
+
+A new language only needs an entry in ``labels``, ``budgetLabels`` and
+``LANG_NAMES``; ``registry`` indexes it at import time.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+labels = {
+    "fr": {
+        "app_title": "Finanthrope — Calculateur d'Épargne",
+        "app_sub": "Calculez votre capacité d'épargne mensuelle",
+        "revenus": "Revenus mensuels",
+        "revenus_desc": "Ajoutez vos différentes sources de revenus",
+        "dep_q": "Dépenses quotidiennes",
+        "dep_q_desc": "Abonnements, nourriture, téléphone, loisirs, voyages",
+        "dep_a": "Dépenses administratives",
+        "dep_a_desc": "Assurances habitation, auto, décès, mutuelle, frais bancaires",
+        "dep_f": "Dépenses familiales",
+        "dep_f_desc": "Frais scolaires, cantine, sport, loisirs enfants",
+        "credits": "Crédits et prêts",
+        "credits_desc": "Crédit auto, immobilier, travaux, consommation, prêt étudiant",
+        "impots": "Impôts",
+        "impots_desc": "Sur le salaire, fonciers, PFU",
+        "type": "Type",
+        "amount": "Montant",
+        "add": "Ajouter une ligne",
+        "remove": "Supprimer",
+        "no_rows": "Aucune entrée. Ajoutez une ligne pour commencer.",
+        "totals": "Résumé",
+        "total_rev": "Total revenus",
+        "total_dep": "Total dépenses",
+        "capacity": "Capacité d'épargne",
+        "breakdown": "Répartition des dépenses",
+        "download": "Télécharger les données",
+        "download_compact": "Télécharger (format compact)",
+        "download_compact_help": "Fichier .fbz compressé, bien plus petit pour les gros budgets ; réimportable ici.",
+        "download_pdf": "Télécharger le PDF",
+        "prepare_pdf": "Générer le PDF",
+        "file_saved": "Fichier prêt",
+        "euros": "€",
+        "positive": "Capacité positive",
+        "negative": "Capacité négative",
+        "per_month": "par mois",
+        "section_total": "Total",
+        "reset": "Tout réinitialiser",
+        "undo": "Annuler",
+        "redo": "Rétablir",
+        "grid_mode": "Mode tableau",
+        "custom_label": "Libellé",
+        "import": "Importer un budget",
+        "import_file": "Fichier exporté (finanthrope_budget.json ou .fbz) ou relevé bancaire CSV",
+        "import_pick": "Budget à importer",
+        "import_btn": "Importer",
+        "import_error": "Fichier invalide",
+        "store_error": "Le budget enregistré n'a pas pu être chargé",
+        "pdf_title": "Résumé budgétaire",
+        "pdf_rev": "Revenus",
+        "pdf_dep": "Dépenses",
+        "pdf_chart": "Répartition des dépenses",
+        "pdf_capacity": "Capacité d’épargne",
+        "projection": "Projection de l'épargne",
+        "projection_show": "Lancer la simulation",
+        "proj_years": "Horizon (années)",
+        "proj_initial": "Épargne initiale",
+        "proj_income_growth": "Croissance des revenus (%/an)",
+        "proj_return": "Rendement de l'épargne (%/an)",
+        "proj_shock": "Probabilité d'imprévu (%/an)",
+        "proj_inflation": "Inflation par poste (%/an)",
+        "proj_negative": "Scénarios finissant en négatif",
+        "proj_year": "Année",
+        "pdf_projection": "Projection de l'épargne (percentiles)",
+        "diagnostics": "Diagnostics (derniers rerun, ms)",
+        "pdf_queued": "PDF en attente…",
+        "pdf_rendering": "Préparation du PDF…",
+        "pdf_busy": "Serveur occupé, réessayez dans un instant.",
+        "pdf_failed": "Échec de la génération du PDF",
+        "pdf_collapsed": "{label} — {n} lignes < {limit}",
+        "currency": "Devise",
+        "rates_as_of": "Taux de change du {date}",
+        "rates_error": "Fichier de taux de change illisible, montants en euros uniquement",
+        "pdf_original": "Montant d'origine",
+        "pdf_rates": "Taux de change du {date} : {rates}",
+        "frequency": "Fréquence",
+        "freq_monthly": "Mensuel",
+        "freq_weekly": "Hebdomadaire",
+        "freq_quarterly": "Trimestriel",
+        "freq_annual": "Annuel",
+        "frequency_help": "Les montants sont ramenés au mois pour les totaux",
+        "period": "Période",
+        "period_monthly": "Par mois",
+        "period_annual": "Par an",
+        "pdf_monthly_amount": "Montant mensuel",
+        "pdf_annual": "Sur un an : revenus {rev}, dépenses {dep}, capacité d'épargne {cap}",
+    },
+    "en": {
+        "app_title": "Finanthrope — Savings Capacity Calculator",
+        "app_sub": "Estimate your monthly savings capacity",
+        "revenus": "Monthly income",
+        "revenus_desc": "Add your different income sources",
+        "dep_q": "Everyday expenses",
+        "dep_q_desc": "Subscriptions, food, phone, leisure, travel",
+        "dep_a": "Administrative expenses",
+        "dep_a_desc": "Home, car, life insurance, health cover, bank fees",
+        "dep_f": "Family expenses",
+        "dep_f_desc": "School, canteen, sports, kids leisure",
+        "credits": "Loans and credit",
+        "credits_desc": "Car, mortgage, renovation, consumer, student",
+        "impots": "Taxes",
+        "impots_desc": "On salary, property, flat tax",
+        "type": "Type",
+        "amount": "Amount",
+        "add": "Add a row",
+        "remove": "Remove",
+        "no_rows": "No entries yet. Add a row to get started.",
+        "totals": "Summary",
+        "total_rev": "Total income",
+        "total_dep": "Total expenses",
+        "capacity": "Savings capacity",
+        "breakdown": "Expense breakdown",
+        "download": "Download data",
+        "download_compact": "Download (compact format)",
+        "download_compact_help": "Compressed .fbz file, much smaller for large budgets; can be imported back here.",
+        "download_pdf": "Download PDF",
+        "prepare_pdf": "Generate PDF",
+        "file_saved": "File ready",
+        "euros": "€",
+        "positive": "Positive capacity",
+        "negative": "Negative capacity",
+        "per_month": "per month",
+        "section_total": "Total",
+        "reset": "Reset all",
+        "undo": "Undo",
+        "redo": "Redo",
+        "grid_mode": "Grid editor",
+        "custom_label": "Label",
+        "import": "Import a budget",
+        "import_file": "Exported file (finanthrope_budget.json or .fbz) or bank statement CSV",
+        "import_pick": "Budget to import",
+        "import_btn": "Import",
+        "import_error": "Invalid file",
+        "store_error": "The saved budget could not be loaded",
+        "pdf_title": "Budget summary",
+        "pdf_rev": "Income",
+        "pdf_dep": "Expenses",
+        "pdf_chart": "Expense breakdown",
+        "pdf_capacity": "Savings capacity",
+        "projection": "Savings projection",
+        "projection_show": "Run simulation",
+        "proj_years": "Horizon (years)",
+        "proj_initial": "Initial savings",
+        "proj_income_growth": "Income growth (%/yr)",
+        "proj_return": "Return on savings (%/yr)",
+        "proj_shock": "Unexpected expense probability (%/yr)",
+        "proj_inflation": "Inflation per category (%/yr)",
+        "proj_negative": "Scenarios ending negative",
+        "proj_year": "Year",
+        "pdf_projection": "Savings projection (percentiles)",
+        "diagnostics": "Diagnostics (last reruns, ms)",
+        "pdf_queued": "PDF queued…",
+        "pdf_rendering": "Preparing PDF…",
+        "pdf_busy": "Server busy, please retry in a moment.",
+        "pdf_failed": "PDF generation failed",
+        "pdf_collapsed": "{label} — {n} lines under {limit}",
+        "currency": "Currency",
+        "rates_as_of": "Exchange rates as of {date}",
+        "rates_error": "Unreadable exchange rate file, amounts in euros only",
+        "pdf_original": "Original amount",
+        "pdf_rates": "Exchange rates as of {date}: {rates}",
+        "frequency": "Frequency",
+        "freq_monthly": "Monthly",
+        "freq_weekly": "Weekly",
+        "freq_quarterly": "Quarterly",
+        "freq_annual": "Annual",
+        "frequency_help": "Amounts are converted to monthly equivalents for the totals",
+        "period": "Period",
+        "period_monthly": "Per month",
+        "period_annual": "Per year",
+        "pdf_monthly_amount": "Monthly amount",
+        "pdf_annual": "Over a year: income {rev}, expenses {dep}, savings capacity {cap}",
+    },
+}
+
+budgetLabels = {
+  "fr": {
+    "revenus": {
+      "salaire": "Salaire",
+      "prime_salaire": "Prime du salaire",
+      "prime_activite": "Prime d'activité",
+      "allocation_logement": "Allocation logement",
+      "revenu_immobilier": "Revenu immobilier",
+      "activite_secondaire": "Activité secondaire net",
+      "autre": "Autre",
+    },
+    "depensesQuotidiennes": {
+      "abonnement": "Abonnements",
+      "nourriture": "Nourriture",
+      "telephone": "Téléphone",
+      "loisirs": "Loisirs",
+      "voyage": "Voyages",
+      "loyer": "Loyer",
+      "autre": "Autre",
+    },
+    "depensesAdministratives": {
+      "assurance_habitation": "Assurance habitation",
+      "assurance_auto": "Assurance auto",
+      "assurance_deces": "Assurance décès",
+      "mutuelle": "Mutuelle",
+      "frais_bancaires": "Frais bancaires",
+      "autre": "Autre",
+    },
+    "depensesFamiliales": {
+      "scolaire": "Frais scolaires",
+      "cantine": "Cantine",
+      "sport": "Sport",
+      "loisirs_enfants": "Loisirs enfants",
+      "autre": "Autre",
+    },
+    "credits": {
+      "credit_auto": "Crédit auto",
+      "credit_immobilier": "Crédit immobilier",
+      "credit_travaux": "Crédit travaux",
+      "credit_consommation": "Crédit consommation",
+      "pret_etudiant": "Prêt étudiant",
+      "autre": "Autre",
+    },
+    "impots": {
+      "impot_salaire": "Impôts sur le salaire",
+      "impot_foncier": "Impôts fonciers",
+      "impot_pfu": "Impôts PFU",
+      "autre": "Autre",
+    },
+  },
+  "en": {
+    "revenus": {
+      "salaire": "Salary",
+      "prime_salaire": "Salary bonus",
+      "prime_activite": "Activity bonus",
+      "allocation_logement": "Housing allowance",
+      "revenu_immobilier": "Property income",
+      "activite_secondaire": "Side activity net",
+      "autre": "Other income",
+    },
+    "depensesQuotidiennes": {
+      "abonnement": "Subscriptions",
+      "nourriture": "Food",
+      "telephone": "Phone",
+      "loisirs": "Leisure",
+      "voyage": "Travel",
+      "loyer": "Rent",
+      "autre": "Other",
+    },
+    "depensesAdministratives": {
+      "assurance_habitation": "Home insurance",
+      "assurance_auto": "Car insurance",
+      "assurance_deces": "Life insurance",
+      "mutuelle": "Health cover",
+      "frais_bancaires": "Bank fees",
+      "autre": "Other",
+    },
+    "depensesFamiliales": {
+      "scolaire": "School fees",
+      "cantine": "Canteen",
+      "sport": "Sports",
+      "loisirs_enfants": "Kids leisure",
+      "autre": "Other",
+    },
+    "credits": {
+      "credit_auto": "Car loan",
+      "credit_immobilier": "Mortgage",
+      "credit_travaux": "Renovation loan",
+      "credit_consommation": "Consumer loan",
+      "pret_etudiant": "Student loan",
+      "autre": "Other",
+    },
+    "impots": {
+      "impot_salaire": "Salary tax",
+      "impot_foncier": "Property tax",
+      "impot_pfu": "Flat tax",
+      "autre": "Other",
+    },
+  },
+}
+
+LANGS = list(labels)
+
+LANG_NAMES = {
+    "fr": "Français",
+    "en": "English",
+}
+
+# -----------------------------
+# Label registry
+# -----------------------------
+@dataclass(frozen=True)
+class SectionLabels:
+    """All lookups for one (language, section), precomputed."""
+    keys: Tuple[str, ...]
+    options: List[str]
+    key_to_label: Dict[str, str]
+    label_to_key: Dict[str, str]
+    key_to_index: Dict[str, int]
+
+    @property
+    def default_key(self) -> str:
+        return self.keys[0]
+
+    def label(self, key: str) -> str:
+        return self.key_to_label.get(key, key)
+
+    def key(self, label: str) -> str:
+        return self.label_to_key.get(label, self.keys[0])
+
+    def index(self, key: str) -> int:
+        return self.key_to_index.get(key, 0)
+
+
+class LabelRegistry:
+    """Bidirectional category indexes for every language and section, built once per process."""
+
+    def __init__(self, budget_labels: Dict[str, Dict[str, Dict[str, str]]]):
+        self._sections: Dict[Tuple[str, str], SectionLabels] = {}
+        for lang, sections in budget_labels.items():
+            for section, mapping in sections.items():
+                keys = tuple(mapping)
+                label_to_key: Dict[str, str] = {}
+                for k in keys:
+                    label_to_key.setdefault(mapping[k], k)  # first key wins, as the old linear scan did
+                self._sections[(lang, section)] = SectionLabels(
+                    keys=keys,
+                    options=[mapping[k] for k in keys],
+                    key_to_label=dict(mapping),
+                    label_to_key=label_to_key,
+                    key_to_index={k: i for i, k in enumerate(keys)},
+                )
+
+    def section(self, lang: str, section: str) -> SectionLabels:
+        return self._sections[(lang, section)]
+
+
+registry = LabelRegistry(budgetLabels)
@@ -0,0 +1,126 @@
+# instrumentation.py
+"""Opt-in per-rerun timers for the app's hot paths.
+
+Set ``FINANTHROPE_INSTRUMENT=1`` to time the stages of every rerun
+(section rendering, totals, projection, JSON export, PDF build and the
+chart inside ``create_pdf``). A fragment rerun is timed as a run of its
+own, with ``fragment`` set to the fragment's key (None for full runs).
+Each finished rerun is kept in the session's history and, when
+``FINANTHROPE_INSTRUMENT_LOG`` names a file, appended to it as one JSON
+line::
+
+    {"ts": 1760771234.5, "host": "web-7f9c", "pid": 12, "session": "3b1e...",
+     "rerun": 4, "fragment": "section-revenus", "total_ms": 41.2,
+     "stages": {"render_section": 30.1, ...}}
+
+Disabled timers cost one attribute check: ``stage()`` hands back a shared
+no-op context manager and ``wrap()`` returns the function unchanged.
+Code outside the script (e.g. ``pdf_report``) uses ``timed(name)``, which
+records into the timer activated on the current thread, if any.
+"""
+from __future__ import annotations
+import contextlib
+import functools
+import json
+import os
+import socket
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+INSTRUMENT_ENV = "FINANTHROPE_INSTRUMENT"
+LOG_ENV = "FINANTHROPE_INSTRUMENT_LOG"
+HISTORY_ENV = "FINANTHROPE_INSTRUMENT_HISTORY"
+
+ENABLED = os.environ.get(INSTRUMENT_ENV, "").lower() not in ("", "0", "false", "no")
+LOG_PATH = os.environ.get(LOG_ENV) or None
+HISTORY = int(os.environ.get(HISTORY_ENV, "20"))
+
+_NULL = contextlib.nullcontext()
+_local = threading.local()
+_HOST = socket.gethostname()
+
+_log_lock = threading.Lock()
+_log_file = None
+
+
+class _Stage:
+    __slots__ = ("timings", "name", "t0")
+
+    def __init__(self, timings: "RerunTimings", name: str):
+        self.timings, self.name = timings, name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.timings.add(self.name, (time.perf_counter() - self.t0) * 1000)
+
+
+class RerunTimings:
+    """Milliseconds per stage for one script run; repeated stages accumulate."""
+
+    def __init__(self, enabled: bool = ENABLED):
+        self.enabled = enabled
+        self.stages: Dict[str, float] = {}
+        self._t0 = time.perf_counter()
+
+    def stage(self, name: str):
+        return _Stage(self, name) if self.enabled else _NULL
+
+    def add(self, name: str, ms: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + ms
+
+    def wrap(self, fn: Callable, name: str) -> Callable:
+        if not self.enabled:
+            return fn
+
+        @functools.wraps(fn)
+        def timed_fn(*args, **kwargs):
+            with self.stage(name):
+                return fn(*args, **kwargs)
+        return timed_fn
+
+    def activate(self) -> None:
+        """Make ``timed()`` record into this run for the current thread."""
+        _local.timings = self if self.enabled else None
+
+    def finish(self, session: Optional[str] = None, rerun: int = 0, fragment: Optional[str] = None,
+               job: Optional[str] = None) -> Dict:
+        """Close the run, write it to the JSON-lines log and return the record.
+
+        ``job`` names a background render (see ``pdf_jobs``) timed on its
+        worker rather than in a script run.
+        """
+        if getattr(_local, "timings", None) is self:
+            _local.timings = None
+        record = {
+            "ts": round(time.time(), 3),
+            "host": _HOST,
+            "pid": os.getpid(),
+            "session": session,
+            "rerun": rerun,
+            "fragment": fragment,
+            "total_ms": round((time.perf_counter() - self._t0) * 1000, 3),
+            "stages": {k: round(v, 3) for k, v in self.stages.items()},
+        }
+        if job is not None:
+            record["job"] = job
+        if LOG_PATH:
+            write_log(record)
+        return record
+
+
+def timed(name: str):
+    """Time a block into the thread's active ``RerunTimings`` (no-op otherwise)."""
+    timings = getattr(_local, "timings", None)
+    return timings.stage(name) if timings is not None else _NULL
+
+
+def write_log(record: Dict) -> None:
+    global _log_file
+    line = json.dumps(record, separators=(",", ":")) + "\n"
+    with _log_lock:
+        if _log_file is None:
+            _log_file = open(LOG_PATH, "a", encoding="utf-8", buffering=1)
+        _log_file.write(line)
@@ -0,0 +1,97 @@
+# pdf_cache.py
+"""Content-addressed LRU cache for rendered PDF bytes.
+
+Streamlit re-executes ``streamlit_app.py`` on every widget change, but this
+module is imported once per process, so the cache below survives reruns and
+is shared by all sessions. Entries are keyed by a stable hash of the payload
+and the language, so an unchanged budget is only ever rendered once.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+DEFAULT_MAX_ENTRIES = 64
+
+
+def payload_digest(payload: Dict, lang: str) -> str:
+    """Stable SHA-256 of a budget payload and its language."""
+    blob = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{lang}\x00{blob}".encode("utf-8")).hexdigest()
+
+
+class PdfCache:
+    """Bounded LRU map from payload digest to PDF bytes.
+
+    ``hits`` counts lookups served from the cache, ``misses`` counts actual
+    renders, ``evictions`` counts entries dropped to stay under ``max_entries``.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return data
+
+    def put(self, key: str, data: bytes) -> None:
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def put_rendered(self, key: str, data: bytes) -> None:
+        """Store bytes rendered elsewhere (e.g. by pdf_jobs), counting the render."""
+        with self._lock:
+            self.misses += 1
+        self.put(key, data)
+
+    def get_or_build(self, key: str, build: Callable[[], bytes]) -> bytes:
+        data = self.get(key)
+        if data is not None:
+            return data
+        # Render outside the lock so one slow build does not block other sessions.
+        data = build()
+        with self._lock:
+            self.misses += 1
+        self.put(key, data)
+        return data
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "bytes": sum(len(v) for v in self._entries.values()),
+            }
+
+
+# Process-wide singleton used by the app
+pdf_cache = PdfCache(int(os.environ.get("FINANTHROPE_PDF_CACHE_SIZE", DEFAULT_MAX_ENTRIES)))
@@ -0,0 +1,192 @@
+# pdf_jobs.py
+"""Render PDFs off the script thread on a shared, bounded executor.
+
+``submit`` hands a payload to the pool and returns a ``PdfJob`` that
+sessions poll on later reruns. The finished bytes go into ``pdf_cache``,
+so once a job is done the usual cache lookup serves them. A payload
+already queued or rendering is never submitted twice: every session
+asking for the same digest gets the same job.
+
+Configuration (environment):
+
+* ``FINANTHROPE_PDF_EXECUTOR``: ``thread`` (default) or ``process``. Use
+  ``process`` for heavy budgets; reportlab holds the GIL while it renders.
+* ``FINANTHROPE_PDF_WORKERS``: pool size (default 2).
+* ``FINANTHROPE_PDF_QUEUE``: most jobs queued or running at once (default
+  16). When it is full, ``submit`` returns None and the UI asks the user to
+  retry.
+* ``FINANTHROPE_PDF_FAILED_TTL``: seconds a failed job stays listed so
+  sessions can show its error (default 300). ``submit`` retries it sooner.
+
+Renders are timed in the worker (``pdf.chart``, ``pdf.build`` and the whole
+``pdf``). With ``FINANTHROPE_INSTRUMENT=1`` each render is written to the
+instrumentation log with ``"job"`` set to its digest, and a finished job's
+stages are kept on ``PdfJob.timings``.
+"""
+from __future__ import annotations
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from pdf_cache import PdfCache, pdf_cache
+from pdf_report import DEFAULT_CHART_BACKEND
+
+EXECUTORS = ("thread", "process")
+DEFAULT_WORKERS = 2
+DEFAULT_QUEUE = 16
+DEFAULT_FAILED_TTL = 300.0
+
+
+def render_pdf(payload: Dict, lang: str, chart: str = DEFAULT_CHART_BACKEND,
+               key: Optional[str] = None) -> Tuple[bytes, Dict[str, float]]:
+    """Worker entry point (module level so process pools can pickle it).
+
+    Returns the PDF and its stage timings, which are empty unless
+    instrumentation is on. ``timed()`` in ``pdf_report`` is thread-local, so
+    the timer is activated here, on the worker's thread.
+    """
+    from i18n import labels
+    from instrumentation import RerunTimings
+    from pdf_report import create_pdf
+
+    timings = RerunTimings()
+    timings.activate()
+    try:
+        with timings.stage("pdf"):
+            data = create_pdf(payload, labels, lang, chart=chart)
+    finally:
+        record = timings.finish(job=key) if timings.enabled else {"stages": {}}
+    return data, record["stages"]
+
+
+class PdfJob:
+    """One render in flight: ``state`` is queued, running, done or failed."""
+
+    def __init__(self, key: str, future: Future):
+        self.key = key
+        self.future = future
+        self.submitted = time.monotonic()
+        self.finished: Optional[float] = None
+        self.timings: Dict[str, float] = {}
+
+    @property
+    def state(self) -> str:
+        if not self.future.done():
+            return "running" if self.future.running() else "queued"
+        return "failed" if self.future.exception() is not None else "done"
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.submitted
+
+    @property
+    def error(self) -> Optional[str]:
+        exc = self.future.exception() if self.future.done() else None
+        return f"{type(exc).__name__}: {exc}" if exc is not None else None
+
+    def result(self) -> bytes:
+        """The PDF bytes of a done job."""
+        return self.future.result()[0]
+
+
+class PdfJobs:
+    """Deduplicating front end to a PDF executor with a bounded queue."""
+
+    def __init__(self, cache: PdfCache, kind: str = "thread", workers: int = DEFAULT_WORKERS,
+                 max_pending: int = DEFAULT_QUEUE, failed_ttl: float = DEFAULT_FAILED_TTL):
+        if kind not in EXECUTORS:
+            raise ValueError(f"unknown executor {kind!r}; expected one of {EXECUTORS}")
+        self.cache = cache
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.failed_ttl = max(0.0, failed_ttl)
+        self._executor: Optional[Executor] = None
+        self._jobs: Dict[str, PdfJob] = {}
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def _pool(self) -> Executor:
+        # Created on first use so importing the app does not start workers
+        if self._executor is None:
+            if self.kind == "process":
+                # Never fork the multi-threaded server process
+                ctx = multiprocessing.get_context("spawn")
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=ctx)
+            else:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="finanthrope-pdf")
+        return self._executor
+
+    def get(self, key: str) -> Optional[PdfJob]:
+        with self._lock:
+            return self._jobs.get(key)
+
+    def submit(self, key: str, payload: Dict, lang: str) -> Optional[PdfJob]:
+        """Queue a render for ``key`` unless one exists; None when the queue is full."""
+        with self._lock:
+            self._expire()
+            job = self._jobs.get(key)
+            if job is not None and job.state != "failed":
+                return job
+            pending = sum(1 for j in self._jobs.values() if not j.future.done())
+            if pending >= self.max_pending:
+                self.rejected += 1
+                return None
+            job = PdfJob(key, self._pool().submit(render_pdf, payload, lang, key=key))
+            self._jobs[key] = job
+        job.future.add_done_callback(lambda f, key=key: self._finished(key, f))
+        return job
+
+    def _finished(self, key: str, future: Future) -> None:
+        failed = future.exception() is not None
+        if not failed:
+            data, stages = future.result()
+            self.cache.put_rendered(key, data)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None or job.future is not future:
+                return
+            job.finished = time.monotonic()
+            if failed:
+                # Kept for failed_ttl so the session can show the error;
+                # submit() retries it sooner
+                return
+            job.timings = stages
+            # Served from the cache from now on
+            del self._jobs[key]
+
+    def _expire(self) -> None:
+        """Drop failed jobs older than ``failed_ttl`` (caller holds the lock)."""
+        now = time.monotonic()
+        for key in [k for k, j in self._jobs.items() if j.finished is not None and now - j.finished > self.failed_ttl]:
+            del self._jobs[key]
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._jobs.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            self._expire()
+            states = [j.state for j in self._jobs.values()]
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "queued": states.count("queued"),
+            "running": states.count("running"),
+            "failed": states.count("failed"),
+            "rejected": self.rejected,
+        }
+
+
+# Process-wide job queue used by the app
+pdf_jobs = PdfJobs(
+    pdf_cache,
+    kind=os.environ.get("FINANTHROPE_PDF_EXECUTOR", "thread"),
+    workers=int(os.environ.get("FINANTHROPE_PDF_WORKERS", DEFAULT_WORKERS)),
+    max_pending=int(os.environ.get("FINANTHROPE_PDF_QUEUE", DEFAULT_QUEUE)),
+    failed_ttl=float(os.environ.get("FINANTHROPE_PDF_FAILED_TTL", DEFAULT_FAILED_TTL)),
+)
@@ -0,0 +1,483 @@
+# pdf_report.py
+"""Branded PDF budget summary (Coolors palette + donut)."""
+from __future__ import annotations
+import io
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from budget_engine import DEFAULT_FREQUENCY, SECTIONS, BudgetEngine
+from currency import DEFAULT_CURRENCY, currency_symbol, payload_currency, payload_rates
+from i18n import registry
+from instrumentation import timed
+
+# Donut backends: "vector" draws with reportlab.graphics, "matplotlib" embeds
+# a rasterized PNG, "none" skips the chart. See benchmarks/bench_pdf_chart.py.
+CHART_BACKENDS = ("vector", "matplotlib", "none")
+DEFAULT_CHART_BACKEND = "vector"
+
+# Donut palette (slices)
+CHART_PALETTE = ["#FDE2E4", "#FAD2E1", "#E2ECE9", "#BEE1E6", "#CDDAFD"]
+CHART_TEXT = "#1F2937"
+CHART_RING = "#CDDAFD"
+CHART_INNER_RADIUS = 0.64
+
+# Section tables: "standard" lays out one reportlab Table per section, which
+# re-splits the whole remainder on every page (quadratic in rows). "large"
+# builds one page of rows at a time (see PagedTable); "auto" switches to it
+# once a section has more than LARGE_SECTION_ROWS lines.
+LAYOUTS = ("auto", "standard", "large")
+LARGE_SECTION_ROWS = 300
+HEADER_HEIGHT = 24
+ROW_HEIGHT = 18
+
+
+def pdf_label_from_row(dict_key: str, row: Dict, lang: str) -> str:
+    """For PDF: use custom label when type is 'autre'."""
+    t = row.get("type", "")
+    if t == "autre":
+        custom = row.get("custom_label") or row.get("customLabel")
+        if custom:
+            return custom
+    return registry.section(lang, dict_key).label(t)
+
+def collapse_rows(rows: List[Dict], amounts: List[float], below: float) -> Tuple[List[int], Dict[str, Tuple[int, float]]]:
+    """Indices of the rows kept as lines, and per-type (count, sum) of those under ``below``."""
+    kept: List[int] = []
+    small: Dict[str, Tuple[int, float]] = {}
+    for i, (r, amt) in enumerate(zip(rows, amounts)):
+        if abs(amt) < below:
+            t = r.get("type", "")
+            n, total = small.get(t, (0, 0.0))
+            small[t] = (n + 1, total + amt)
+        else:
+            kept.append(i)
+    return kept, small
+
+# -----------------------------
+# Paged tables for large budgets
+# -----------------------------
+@lru_cache(maxsize=None)
+def _paged_table_class():
+    from reportlab.platypus import Flowable, Table
+
+    class PagedTable(Flowable):
+        """A long table laid out one page at a time.
+
+        Rows have a fixed height, so ``split`` knows how many fit without
+        measuring them. It formats just that page's slice (``cell(i)``)
+        and returns a continuation that shares ``rows`` and only moves
+        ``start``. Work per page is proportional to the rows on that page,
+        and the header repeats at the top of every page.
+        """
+
+        def __init__(self, header: List[str], n_rows: int, cell, style, col_widths, start: int = 0):
+            super().__init__()
+            self.header = header
+            self.n_rows = n_rows
+            self.cell = cell
+            self.style = style
+            self.col_widths = col_widths
+            self.start = start
+
+        def _height(self, n: int) -> float:
+            return HEADER_HEIGHT + n * ROW_HEIGHT
+
+        def _table(self, stop: int):
+            data = [self.header] + [self.cell(i) for i in range(self.start, stop)]
+            # The label column takes the rest of the frame, so every page lines up
+            fixed = sum(w for w in self.col_widths if w is not None)
+            widths = [self.width - fixed if w is None else w for w in self.col_widths]
+            table = Table(data, hAlign="LEFT", colWidths=widths,
+                          rowHeights=[HEADER_HEIGHT] + [ROW_HEIGHT] * (stop - self.start))
+            table.setStyle(self.style)
+            return table
+
+        def wrap(self, availWidth, availHeight):
+            self.width = availWidth
+            self.height = self._height(self.n_rows - self.start)
+            return self.width, self.height
+
+        def split(self, availWidth, availHeight):
+            self.width = availWidth
+            fit = int((availHeight - HEADER_HEIGHT) // ROW_HEIGHT)
+            if fit < 1:
+                return []
+            stop = min(self.n_rows, self.start + fit)
+            parts = [self._table(stop)]
+            if stop < self.n_rows:
+                parts.append(PagedTable(self.header, self.n_rows, self.cell, self.style, self.col_widths, stop))
+            return parts
+
+        def draw(self):
+            table = self._table(self.n_rows)
+            table.wrapOn(self.canv, self.width, self.height)
+            table.drawOn(self.canv, 0, 0)
+
+    return PagedTable
+
+# -----------------------------
+# Donut chart backends
+# -----------------------------
+def donut_series(totals: Dict, labels: Dict, lang: str) -> Tuple[List[float], List[str]]:
+    dep_vals = [
+        totals["quotidiennes"],
+        totals["administratives"],
+        totals["familiales"],
+        totals["credits"],
+        totals["impots"],
+    ]
+    dep_names = [
+        labels[lang]["dep_q"],
+        labels[lang]["dep_a"],
+        labels[lang]["dep_f"],
+        labels[lang]["credits"],
+        labels[lang]["impots"],
+    ]
+    return dep_vals, dep_names
+
+def donut_legend(dep_names: List[str], dep_vals: List[float]) -> List[str]:
+    total = float(sum(dep_vals))
+    return [f"{n} — {int(round(v/total*100))}%" for n, v in zip(dep_names, dep_vals)]
+
+def donut_matplotlib(dep_vals: List[float], dep_names: List[str], title: str, width: float, height: float):
+    from reportlab.platypus import Image
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(5.4, 4.2), dpi=220)
+    fig.patch.set_facecolor("white")
+    ax.set_facecolor("white")
+
+    wedges, _ = ax.pie(
+        dep_vals,
+        radius=1.0,
+        startangle=90,
+        labels=None,
+        autopct=None,
+        colors=CHART_PALETTE,
+        wedgeprops=dict(width=1.0 - CHART_INNER_RADIUS, edgecolor="white")
+    )
+
+    centre_circle = plt.Circle((0, 0), CHART_INNER_RADIUS, color="white")
+    ax.add_artist(centre_circle)
+
+    ring = plt.Circle((0, 0), 1.0, fill=False, linewidth=1.4, color=CHART_RING)
+    ax.add_artist(ring)
+
+    ax.set_title(title, color=CHART_TEXT)
+
+    leg = ax.legend(
+        wedges,
+        donut_legend(dep_names, dep_vals),
+        loc="center left",
+        bbox_to_anchor=(1.02, 0.5),
+        frameon=False
+    )
+    for text in leg.get_texts():
+        text.set_color(CHART_TEXT)
+
+    plt.tight_layout()
+    img_buf = io.BytesIO()
+    fig.savefig(img_buf, format="png", bbox_inches="tight")
+    plt.close(fig)
+    img_buf.seek(0)
+    return Image(img_buf, width=width, height=height)
+
+def donut_vector(dep_vals: List[float], dep_names: List[str], title: str, width: float, height: float):
+    from reportlab.graphics.shapes import Drawing, String, Circle
+    from reportlab.graphics.charts.piecharts import Pie
+    from reportlab.graphics.charts.legends import Legend
+    from reportlab.lib import colors
+
+    palette = [colors.HexColor(c) for c in CHART_PALETTE]
+    text_col = colors.HexColor(CHART_TEXT)
+
+    d = Drawing(width, height)
+    d.add(String(width / 2, height - 14, title, fontName="Helvetica", fontSize=12,
+                 fillColor=text_col, textAnchor="middle"))
+
+    diameter = min(height - 36, width * 0.55)
+    pie = Pie()
+    pie.x = 12
+    pie.y = (height - 24 - diameter) / 2
+    pie.width = pie.height = diameter
+    pie.data = [float(v) for v in dep_vals]
+    pie.labels = None
+    pie.startAngle = 90
+    pie.direction = "anticlockwise"
+    pie.innerRadiusFraction = CHART_INNER_RADIUS
+    pie.slices.strokeColor = colors.white
+    pie.slices.strokeWidth = 1
+    for i, col in enumerate(palette):
+        pie.slices[i].fillColor = col
+    d.add(pie)
+
+    cx, cy, r = pie.x + diameter / 2, pie.y + diameter / 2, diameter / 2
+    d.add(Circle(cx, cy, r, fillColor=None, strokeColor=colors.HexColor(CHART_RING), strokeWidth=1.4))
+
+    legend = Legend()
+    legend.x = pie.x + diameter + 18
+    legend.y = cy
+    legend.boxAnchor = "w"
+    legend.alignment = "right"
+    legend.fontName = "Helvetica"
+    legend.fontSize = 10
+    legend.fillColor = text_col
+    legend.strokeColor = None
+    legend.deltay = 15
+    legend.columnMaximum = len(dep_names)
+    legend.colorNamePairs = list(zip(palette, donut_legend(dep_names, dep_vals)))
+    d.add(legend)
+    return d
+
+# -----------------------------
+# Projection percentile bands
+# -----------------------------
+def projection_chart(projection: Dict, width: float, height: float):
+    from reportlab.graphics.shapes import Drawing
+    from reportlab.graphics.charts.lineplots import LinePlot
+    from reportlab.lib import colors
+
+    years = projection["years"]
+    bands = projection["percentiles"]
+    d = Drawing(width, height)
+    plot = LinePlot()
+    plot.x, plot.y = 46, 20
+    plot.width, plot.height = width - 60, height - 32
+    keys = sorted(bands, key=float)
+    plot.data = [list(zip(years, bands[k])) for k in keys]
+    # Outer percentiles light, median darkest
+    shades = {0: "#CDDAFD", 1: "#BEE1E6", 2: CHART_TEXT}
+    for i, _ in enumerate(keys):
+        dist = min(2, len(keys) // 2 - abs(i - len(keys) // 2))
+        plot.lines[i].strokeColor = colors.HexColor(shades[dist])
+        plot.lines[i].strokeWidth = 1.8 if dist == 2 else 1.0
+    plot.xValueAxis.valueMin, plot.xValueAxis.valueMax = years[0], years[-1]
+    plot.xValueAxis.labels.fontName = plot.yValueAxis.labels.fontName = "Helvetica"
+    plot.xValueAxis.labels.fontSize = plot.yValueAxis.labels.fontSize = 8
+    plot.yValueAxis.labelTextFormat = lambda v: f"{v:,.0f}"
+    d.add(plot)
+    return d
+
+def projection_table(projection: Dict, labels: Dict, lang: str):
+    from reportlab.platypus import Table
+
+    years = projection["years"]
+    bands = projection["percentiles"]
+    keys = sorted(bands, key=float)
+    step = 1 if len(years) <= 11 else 5
+    idx = [i for i in range(len(years)) if i % step == 0 or i == len(years) - 1]
+    data = [[labels[lang]["proj_year"]] + [f"P{k}" for k in keys]]
+    data += [[str(years[i])] + [f"{bands[k][i]:,.0f}" for k in keys] for i in idx]
+    return Table(data, hAlign="LEFT")
+
+# -----------------------------
+# PDF generator (Coolors palette + donut)
+# -----------------------------
+def create_pdf(payload: Dict, labels: Dict, lang: str, chart: str = DEFAULT_CHART_BACKEND,
+               layout: str = "auto", collapse_below: float = 0.0) -> bytes:
+    """Render the budget summary.
+
+    ``layout`` picks how section tables are built (see ``LAYOUTS``).
+    ``collapse_below`` > 0 replaces the lines under that amount with one
+    subtotal line per type, at the end of their section.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import CondPageBreak, SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib import colors
+    from reportlab.lib.units import mm
+
+    if chart not in CHART_BACKENDS:
+        raise ValueError(f"unknown chart backend {chart!r}, expected one of {CHART_BACKENDS}")
+    if layout not in LAYOUTS:
+        raise ValueError(f"unknown layout {layout!r}, expected one of {LAYOUTS}")
+
+    # Coolors palette
+    COL_EAE4E9 = colors.HexColor("#EAE4E9")
+    COL_FFF1E6 = colors.HexColor("#FFF1E6")
+    COL_FDE2E4 = colors.HexColor("#FDE2E4")
+    COL_FAD2E1 = colors.HexColor("#FAD2E1")
+    COL_E2ECE9 = colors.HexColor("#E2ECE9")
+    COL_BEE1E6 = colors.HexColor("#BEE1E6")
+    COL_F0EFEB = colors.HexColor("#F0EFEB")
+    COL_DFE7FD = colors.HexColor("#DFE7FD")
+    COL_CDDAFD = colors.HexColor("#CDDAFD")
+
+    # Text and lines
+    COL_TEXT = colors.HexColor("#1F2937")
+    COL_BORDER = COL_CDDAFD
+    COL_HEADER_BG = COL_DFE7FD
+    COL_HEADER_TEXT = COL_TEXT
+    COL_SECTION_SPACER = 8
+
+    buf = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buf, pagesize=A4,
+        leftMargin=18*mm, rightMargin=18*mm,
+        topMargin=18*mm, bottomMargin=18*mm
+    )
+
+    styles = getSampleStyleSheet()
+    title_style = styles["Title"]
+    h_style = styles["Heading2"]
+    p_style = styles["BodyText"]
+
+    title_style.textColor = COL_TEXT
+    h_style.textColor = COL_TEXT
+    p_style.textColor = COL_TEXT
+
+    story = []
+
+    # Title
+    story.append(Paragraph(f"Finanthrope — {labels[lang]['pdf_title']}", title_style))
+    story.append(Spacer(1, COL_SECTION_SPACER))
+
+    # Top metrics (recomputed from the rows so stale or missing totals never reach
+    # the PDF), in the payload's reporting currency with the rates it was exported with
+    currency = payload_currency(payload)
+    cur = currency_symbol(currency)
+    rates = payload_rates(payload)
+    engine = BudgetEngine(payload["sections"], rates, currency)
+    budget = engine.compute()
+    totals = budget.as_payload_totals()
+    yearly = budget.annual()
+    cap = totals["capacite_epargne"]
+    badge = "✅" if cap >= 0 else "⚠️"
+    for line in [
+        f"{labels[lang]['total_rev']}: {totals['revenus']:,.2f} {cur}",
+        f"{labels[lang]['total_dep']}: {totals['depenses']:,.2f} {cur}",
+        f"{labels[lang]['pdf_capacity']}: {cap:,.2f} {cur} {badge}",
+        labels[lang]["pdf_annual"].format(
+            rev=f"{yearly.revenus:,.2f} {cur}", dep=f"{yearly.depenses:,.2f} {cur}", cap=f"{yearly.capacite_epargne:,.2f} {cur}"
+        ),
+    ]:
+        story.append(Paragraph(line, p_style))
+
+    # Monthly converted amounts per row, sliced per section below
+    converted = engine.amounts.tolist()
+    starts: Dict[str, int] = {}
+    pos = 0
+    for s in SECTIONS:
+        starts[s] = pos
+        pos += len(payload["sections"].get(s, ()))
+    foreign = sorted(
+        {r.get("currency") or DEFAULT_CURRENCY for rows in payload["sections"].values() for r in rows} - {currency}
+    )
+    if foreign:
+        pairs = ", ".join(f"1 {c} = {rates.factor(c, currency):,.4f} {currency}" for c in foreign)
+        story.append(Paragraph(labels[lang]["pdf_rates"].format(date=rates.as_of, rates=pairs), p_style))
+    story.append(Spacer(1, COL_SECTION_SPACER))
+    periodic = any(
+        (r.get("frequency") or DEFAULT_FREQUENCY) != DEFAULT_FREQUENCY for rows in payload["sections"].values() for r in rows
+    )
+
+    # One style shared by every section table (and every page of a paged one)
+    section_style = TableStyle([
+        ("BACKGROUND", (0,0), (-1,0), COL_HEADER_BG),
+        ("TEXTCOLOR", (0,0), (-1,0), COL_HEADER_TEXT),
+        ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
+        ("ALIGN", (1,1), (-1,-1), "RIGHT"),
+        ("INNERGRID", (0,0), (-1,-1), 0.25, COL_BORDER),
+        ("BOX", (0,0), (-1,-1), 0.5, COL_BORDER),
+        ("BOTTOMPADDING", (0,0), (-1,0), 6),
+        ("TOPPADDING", (0,0), (-1,0), 6),
+    ])
+    # With foreign-currency or non-monthly rows, an extra column keeps the original amount
+    original = bool(foreign) or periodic
+    header = [labels[lang]["type"], labels[lang]["pdf_monthly_amount" if periodic else "amount"] + f" ({cur})"]
+    col_widths = [None, 60*mm]
+    if original:
+        header.insert(1, labels[lang]["pdf_original"])
+        col_widths = [None, 50*mm, 40*mm]
+
+    # Section table helper
+    def add_section(title: str, section_key: str, dict_key: str):
+        rows = payload["sections"][section_key]
+        amounts = converted[starts[section_key]:starts[section_key] + len(rows)]
+        kept = range(len(rows))
+        small: Dict[str, Tuple[int, float]] = {}
+        if collapse_below > 0:
+            kept, small = collapse_rows(rows, amounts, collapse_below)
+        subtotal_types = list(small)
+        n_rows = len(kept) + len(subtotal_types)
+        paged = layout == "large" or (layout == "auto" and n_rows > LARGE_SECTION_ROWS)
+
+        def cell(i: int) -> List[str]:
+            if i < len(kept):
+                j = kept[i]
+                r = rows[j]
+                human = pdf_label_from_row(dict_key, r, lang)
+                if paged:
+                    human = " ".join(human.split())  # fixed row height: one line per cell
+                out = [human, f"{amounts[j]:,.2f}"]
+                if original:
+                    code = r.get("currency") or DEFAULT_CURRENCY
+                    frequency = r.get("frequency") or DEFAULT_FREQUENCY
+                    text = ""
+                    if code != currency or frequency != DEFAULT_FREQUENCY:
+                        text = f"{float(r.get('montant', 0.0)):,.2f} {currency_symbol(code)}"
+                    if frequency != DEFAULT_FREQUENCY:
+                        text += f" ({labels[lang]['freq_' + frequency].lower()})"
+                    out.insert(1, text)
+                return out
+            t = subtotal_types[i - len(kept)]
+            n, total = small[t]
+            human = labels[lang]["pdf_collapsed"].format(
+                label=registry.section(lang, dict_key).label(t), n=n, limit=f"{collapse_below:,.0f} {cur}"
+            )
+            return [human, "", f"{total:,.2f}"] if original else [human, f"{total:,.2f}"]
+
+        if paged:
+            # Keep the heading with at least a few rows instead of orphaning it
+            story.append(CondPageBreak(HEADER_HEIGHT + 4 * ROW_HEIGHT + 30))
+        story.append(Paragraph(title, h_style))
+        if paged:
+            story.append(_paged_table_class()(header, n_rows, cell, section_style, col_widths))
+        else:
+            table = Table([header] + [cell(i) for i in range(n_rows)], hAlign="LEFT", colWidths=col_widths, repeatRows=1)
+            table.setStyle(section_style)
+            story.append(table)
+        story.append(Spacer(1, COL_SECTION_SPACER))
+
+    # Income and expense sections
+    add_section(labels[lang]["pdf_rev"], "revenus", "revenus")
+    add_section(labels[lang]["pdf_dep"] + " — " + labels[lang]["dep_q"], "depensesQuotidiennes", "depensesQuotidiennes")
+    add_section(labels[lang]["pdf_dep"] + " — " + labels[lang]["dep_a"], "depensesAdministratives", "depensesAdministratives")
+    add_section(labels[lang]["pdf_dep"] + " — " + labels[lang]["dep_f"], "depensesFamiliales", "depensesFamiliales")
+    add_section(labels[lang]["pdf_dep"] + " — " + labels[lang]["credits"], "credits", "credits")
+    add_section(labels[lang]["pdf_dep"] + " — " + labels[lang]["impots"], "impots", "impots")
+
+    # Donut chart with legend
+    dep_vals, dep_names = donut_series(totals, labels, lang)
+
+    if chart != "none" and sum(dep_vals) > 0:
+        render = donut_vector if chart == "vector" else donut_matplotlib
+        with timed("pdf.chart"):
+            story.append(render(dep_vals, dep_names, labels[lang]["pdf_chart"], 150*mm, 110*mm))
+        story.append(Spacer(1, COL_SECTION_SPACER))
+
+    # Monte Carlo percentile bands, when the app ran a projection
+    projection = payload.get("projection")
+    if projection:
+        story.append(Paragraph(labels[lang]["pdf_projection"], h_style))
+        if chart != "none":
+            with timed("pdf.chart"):
+                story.append(projection_chart(projection, 150*mm, 70*mm))
+            story.append(Spacer(1, COL_SECTION_SPACER))
+        table = projection_table(projection, labels, lang)
+        table.setStyle(TableStyle([
+            ("BACKGROUND", (0,0), (-1,0), COL_HEADER_BG),
+            ("TEXTCOLOR", (0,0), (-1,0), COL_HEADER_TEXT),
+            ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
+            ("ALIGN", (1,0), (-1,-1), "RIGHT"),
+            ("INNERGRID", (0,0), (-1,-1), 0.25, COL_BORDER),
+            ("BOX", (0,0), (-1,-1), 0.5, COL_BORDER),
+        ]))
+        story.append(table)
+        story.append(Paragraph(f"{labels[lang]['proj_negative']}: {projection['prob_negative']*100:.1f}%", p_style))
+        story.append(Spacer(1, COL_SECTION_SPACER))
+
+    with timed("pdf.build"):
+        doc.build(story)
+    buf.seek(0)
+    return buf.read()
@@ -0,0 +1,153 @@
+# projection.py
+"""Monte Carlo projection of savings built on the monthly savings capacity.
+
+Every path is simulated monthly as a (scenarios, months) array, with no
+Python loop over months or scenarios:
+
+* income grows by a random monthly log-return (``cumsum`` then ``exp``)
+* each expense section inflates at its own rate plus a shared random
+  inflation term; credits default to 0% since loan payments are fixed
+* random shocks cost ``shock_months`` months of expenses
+* wealth follows W_t = W_{t-1} * (1 + r_t) + c_t. It is computed in closed
+  form as G_t * (W_0 + cumsum(c / G)) with G = cumprod(1 + r)
+
+Each stage is memoized on its own inputs, so changing the return rate does
+not redraw incomes, and changing inflation does not redraw returns.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Mapping, Tuple
+
+import numpy as np
+
+from budget_engine import EXPENSE_SECTIONS
+
+PERCENTILES = (5, 25, 50, 75, 95)
+MAX_YEARS = 30
+
+DEFAULT_INFLATION = {
+    "depensesQuotidiennes": 0.02,
+    "depensesAdministratives": 0.02,
+    "depensesFamiliales": 0.025,
+    "credits": 0.0,
+    "impots": 0.02,
+}
+
+# Paths are float32: 10k scenarios x 360 months is ~14 MB per array
+DTYPE = np.float32
+_CACHE_SIZE = 2
+
+
+@dataclass(frozen=True)
+class ProjectionParams:
+    years: int = 10
+    scenarios: int = 10_000
+    initial_savings: float = 0.0
+    income_growth: float = 0.02
+    income_volatility: float = 0.03
+    inflation: Tuple[Tuple[str, float], ...] = tuple(DEFAULT_INFLATION.items())
+    inflation_volatility: float = 0.01
+    shock_probability: float = 0.1
+    shock_months: float = 1.0
+    return_rate: float = 0.03
+    return_volatility: float = 0.06
+    seed: int = 0
+
+
+@dataclass(frozen=True)
+class ProjectionResult:
+    years: np.ndarray                  # 0..N
+    bands: Dict[int, np.ndarray] = field(default_factory=dict)  # percentile -> wealth per year
+    prob_negative: float = 0.0         # share of scenarios ending below zero
+
+    def as_dict(self) -> Dict:
+        """JSON-friendly form, stored in the export payload and read by create_pdf."""
+        return {
+            "years": self.years.tolist(),
+            "percentiles": {str(p): np.round(v, 2).tolist() for p, v in self.bands.items()},
+            "prob_negative": round(self.prob_negative, 4),
+        }
+
+# -----------------------------
+# Memoized stages (arguments are all hashable scalars/tuples)
+# -----------------------------
+def _frozen(a: np.ndarray) -> np.ndarray:
+    a.flags.writeable = False  # cached arrays are shared between callers
+    return a
+
+
+@lru_cache(maxsize=4)
+def _draws(stream: str, scenarios: int, seed: int) -> np.ndarray:
+    """Draws for the full 30-year horizon, so changing ``years`` only slices them."""
+    rng = np.random.default_rng([seed, sum(map(ord, stream))])
+    if stream == "shocks":
+        return _frozen(rng.random((scenarios, MAX_YEARS * 12), dtype=DTYPE))
+    return _frozen(rng.standard_normal((scenarios, MAX_YEARS * 12), dtype=DTYPE))
+
+
+def _normals(stream: str, scenarios: int, months: int, seed: int) -> np.ndarray:
+    return _draws(stream, scenarios, seed)[:, :months]
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _income(income0: float, growth: float, vol: float, scenarios: int, months: int, seed: int) -> np.ndarray:
+    mu = float(np.log1p(growth) / 12 - 0.5 * (vol ** 2) / 12)
+    steps = mu + (vol / 12 ** 0.5) * _normals("income", scenarios, months, seed)
+    return _frozen(income0 * np.exp(np.cumsum(steps, axis=1, dtype=DTYPE)))
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _expenses(expenses0: Tuple[float, ...], inflation: Tuple[float, ...], vol: float,
+              scenarios: int, months: int, seed: int) -> np.ndarray:
+    # Shared random inflation term on top of each section's own rate
+    noise = np.cumsum((vol / 12 ** 0.5) * _normals("inflation", scenarios, months, seed), axis=1, dtype=DTYPE)
+    t = np.arange(1, months + 1, dtype=DTYPE)
+    # (sections, months) deterministic growth, combined without looping over months or scenarios
+    drift = np.exp(np.outer(np.log1p(np.asarray(inflation, dtype=DTYPE)) / 12, t))
+    base = np.asarray(expenses0, dtype=DTYPE) @ drift
+    return _frozen(base[None, :] * np.exp(noise))
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _shock_mask(probability: float, scenarios: int, months: int, seed: int) -> np.ndarray:
+    return _frozen(_draws("shocks", scenarios, seed)[:, :months] < (probability / 12))
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _growth_factors(rate: float, vol: float, scenarios: int, months: int, seed: int) -> np.ndarray:
+    r = rate / 12 + (vol / 12 ** 0.5) * _normals("returns", scenarios, months, seed)
+    return _frozen(np.cumprod(1 + np.maximum(r, -0.99), axis=1, dtype=DTYPE))
+
+
+def simulate(income0: float, expenses0: Mapping[str, float], params: ProjectionParams = ProjectionParams()) -> ProjectionResult:
+    """Project wealth from monthly income and per-section monthly expenses."""
+    years = int(min(max(params.years, 1), MAX_YEARS))
+    months, n, seed = years * 12, int(params.scenarios), int(params.seed)
+    inflation = dict(DEFAULT_INFLATION)
+    inflation.update(dict(params.inflation))
+
+    income = _income(float(income0), params.income_growth, params.income_volatility, n, months, seed)
+    expenses = _expenses(
+        tuple(float(expenses0.get(s, 0.0)) for s in EXPENSE_SECTIONS),
+        tuple(float(inflation[s]) for s in EXPENSE_SECTIONS),
+        params.inflation_volatility, n, months, seed,
+    )
+    shocks = _shock_mask(params.shock_probability, n, months, seed)
+    growth = _growth_factors(params.return_rate, params.return_volatility, n, months, seed)
+
+    cash = income - expenses * (1 + params.shock_months * shocks)
+    wealth = growth * (params.initial_savings + np.cumsum(cash / growth, axis=1, dtype=DTYPE))
+
+    yearly = np.concatenate([np.full((n, 1), params.initial_savings, dtype=DTYPE), wealth[:, 11::12]], axis=1)
+    pct = np.percentile(yearly, PERCENTILES, axis=0)
+    return ProjectionResult(
+        years=np.arange(years + 1),
+        bands={p: pct[i].astype(np.float64) for i, p in enumerate(PERCENTILES)},
+        prob_negative=float(np.mean(yearly[:, -1] < 0)),
+    )
+
+
+def clear_cache() -> None:
+    for fn in (_draws, _income, _expenses, _shock_mask, _growth_factors):
+        fn.cache_clear()
@@ -0,0 +1,78 @@
+# startup.py
+"""Opt-in cold-start profile for the Streamlit app.
+
+Set ``FINANTHROPE_PROFILE_STARTUP=1`` and every new session prints a report
+to stderr with wall time and newly imported modules per startup stage, e.g.::
+
+    [finanthrope] startup profile (session 2, process age 41.3s)
+      stage                      ms   new modules
+      imports                   0.0             0
+      page config + css         3.4             0
+      header                    9.4             0
+      ...
+"""
+from __future__ import annotations
+import os
+import sys
+import threading
+import time
+from typing import List, Tuple
+
+PROFILE_ENV = "FINANTHROPE_PROFILE_STARTUP"
+ENABLED = os.environ.get(PROFILE_ENV, "").lower() not in ("", "0", "false", "no")
+
+_PROCESS_T0 = time.perf_counter()
+_session_count = 0
+_count_lock = threading.Lock()
+
+
+class StartupProfile:
+    """Collects (stage, ms, new module count) for one session's first run.
+
+    Call ``mark(name)`` after each block of the script; the stage covers the
+    time since the previous mark (or since construction).
+    """
+
+    def __init__(self, enabled: bool = ENABLED):
+        self.enabled = enabled
+        self.stages: List[Tuple[str, float, int]] = []
+        self._t = time.perf_counter()
+        self._mods = len(sys.modules)
+
+    def mark(self, name: str) -> None:
+        if not self.enabled:
+            return
+        now, mods = time.perf_counter(), len(sys.modules)
+        self.stages.append((name, (now - self._t) * 1000, mods - self._mods))
+        self._t, self._mods = now, mods
+
+    def report(self) -> str:
+        global _session_count
+        with _count_lock:
+            _session_count += 1
+            n = _session_count
+        age = time.perf_counter() - _PROCESS_T0
+        lines = [
+            f"[finanthrope] startup profile (session {n}, process age {age:.1f}s)",
+            f"  {'stage':<24}{'ms':>6}   new modules",
+        ]
+        for name, ms, mods in self.stages:
+            lines.append(f"  {name:<24}{ms:>6.1f}{mods:>14}")
+        total = sum(ms for _, ms, _ in self.stages)
+        lines.append(f"  {'total':<24}{total:>6.1f}")
+        return "\n".join(lines)
+
+    def emit(self) -> None:
+        if self.enabled and self.stages:
+            print(self.report(), file=sys.stderr, flush=True)
+
+
+def prewarm_pdf_backend() -> None:
+    """Import reportlab off the script thread so the first PDF does not pay for it."""
+    def _load():
+        import reportlab.platypus  # noqa: F401
+        import reportlab.graphics.charts.piecharts  # noqa: F401
+        import reportlab.graphics.charts.legends  # noqa: F401
+        import reportlab.lib.styles  # noqa: F401
+
+    threading.Thread(target=_load, name="finanthrope-prewarm", daemon=True).start()
@@ -0,0 +1,275 @@
+# statement_import.py
+"""Turn a bank-statement CSV into budget rows.
+
+Every transaction label is matched against a precompiled rule index that maps
+keywords to the app's section/type keys (``depensesQuotidiennes.nourriture``,
+``credits.credit_immobilier``...). Statements repeat the same merchants, so
+labels are deduplicated with ``np.unique`` first, the distinct labels are
+classified in one regex scan over their joined text, and the result is
+broadcast back and summed per (section, type) with one ``np.bincount``::
+
+    sections = categorize_statement(open("releve.csv", "rb"))
+"""
+from __future__ import annotations
+import csv
+import io
+import re
+import unicodedata
+from typing import IO, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from budget_engine import SECTIONS
+
+# (section, type, keywords). Order is priority: the first rule whose keyword
+# appears anywhere in the label wins. Income rules only apply to credits
+# (positive amounts), expense rules only to debits.
+INCOME_RULES: Sequence[Tuple[str, str, Sequence[str]]] = (
+    ("revenus", "prime_activite", ("prime d activite", "caf prime", "prime activite")),
+    ("revenus", "allocation_logement", ("allocation logement", "apl", "caf")),
+    ("revenus", "prime_salaire", ("prime", "bonus", "13e mois", "13eme mois")),
+    ("revenus", "salaire", ("salaire", "salary", "payroll", "paie", "remuneration")),
+    ("revenus", "revenu_immobilier", ("loyer", "rent", "locataire")),
+    ("revenus", "activite_secondaire", ("urssaf", "malt", "freelance", "facture")),
+)
+
+EXPENSE_RULES: Sequence[Tuple[str, str, Sequence[str]]] = (
+    ("impots", "impot_foncier", ("taxe fonciere", "impot foncier", "property tax")),
+    ("impots", "impot_pfu", ("pfu", "prelevement forfaitaire", "flat tax")),
+    ("impots", "impot_salaire", ("dgfip", "impot", "prelevement a la source", "income tax")),
+    ("credits", "credit_immobilier", ("pret immo", "credit immo", "echeance pret habitat", "mortgage")),
+    ("credits", "credit_auto", ("credit auto", "pret auto", "loa", "lld", "car loan")),
+    ("credits", "credit_travaux", ("pret travaux", "credit travaux")),
+    ("credits", "pret_etudiant", ("pret etudiant", "student loan")),
+    ("credits", "credit_consommation", ("cofidis", "cetelem", "sofinco", "credit conso", "pret perso")),
+    ("depensesFamiliales", "cantine", ("cantine", "restauration scolaire")),
+    ("depensesFamiliales", "scolaire", ("ecole", "college", "lycee", "scolarite", "fournitures")),
+    ("depensesFamiliales", "sport", ("decathlon", "club", "licence", "piscine")),
+    ("depensesFamiliales", "loisirs_enfants", ("centre de loisirs", "colonie", "creche")),
+    ("depensesAdministratives", "assurance_habitation", ("assurance habitation", "mrh", "home insurance")),
+    ("depensesAdministratives", "assurance_auto", ("assurance auto", "car insurance")),
+    ("depensesAdministratives", "assurance_deces", ("assurance deces", "prevoyance", "life insurance")),
+    ("depensesAdministratives", "mutuelle", ("mutuelle", "harmonie", "mgen", "alan")),
+    ("depensesAdministratives", "frais_bancaires", ("frais", "commission", "cotisation carte", "agios", "bank fee")),
+    ("depensesQuotidiennes", "loyer", ("loyer", "rent", "foncia", "nexity")),
+    ("depensesQuotidiennes", "abonnement", ("netflix", "spotify", "deezer", "disney", "canal", "amazon prime", "abonnement")),
+    ("depensesQuotidiennes", "telephone", ("orange", "sfr", "bouygues", "free mobile", "sosh", "red by sfr")),
+    ("depensesQuotidiennes", "voyage", ("sncf", "air france", "easyjet", "ryanair", "booking", "airbnb", "hotel")),
+    ("depensesQuotidiennes", "nourriture", ("carrefour", "leclerc", "auchan", "lidl", "aldi", "intermarche",
+                                           "monoprix", "franprix", "casino", "picard", "boulangerie", "uber eats",
+                                           "deliveroo", "restaurant")),
+    ("depensesQuotidiennes", "loisirs", ("cinema", "fnac", "steam", "concert", "theatre", "musee")),
+)
+
+FALLBACK_INCOME = ("revenus", "autre")
+FALLBACK_EXPENSE = ("depensesQuotidiennes", "autre")
+
+DATE_COLUMNS = ("date", "date operation", "date de l operation", "date valeur", "booking date")
+LABEL_COLUMNS = ("libelle", "label", "description", "libelle operation", "merchant", "details")
+AMOUNT_COLUMNS = ("montant", "amount", "montant eur", "valeur")
+DEBIT_COLUMNS = ("debit", "debit eur")
+CREDIT_COLUMNS = ("credit", "credit eur")
+
+
+class StatementImportError(ValueError):
+    """Raised when a CSV does not look like a bank statement."""
+
+
+_NON_ALNUM = re.compile(r"[^a-z0-9\n]+")
+
+
+def normalize(text: str) -> str:
+    """Lower-case, strip accents and punctuation so rules stay plain ASCII.
+
+    Newlines are kept, so a whole column joined with "\n" can be normalized
+    in one call.
+    """
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+    return _NON_ALNUM.sub(" ", text)
+
+
+def _trie_regex(words: Sequence[str]) -> str:
+    """Alternation factored by common prefix, so the scan tries one branch per character.
+
+    Longer keywords are tried first, so "prime d activite" wins over "prime".
+    """
+    trie: Dict = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class RuleIndex:
+    """Keyword -> rule lookup behind one compiled alternation regex.
+
+    ``classify`` scans all labels joined into a single string, maps each hit
+    back to its label with ``np.searchsorted`` and keeps the highest-priority
+    (lowest) rule code per label with ``np.minimum.at``.
+    """
+
+    def __init__(self, rules: Sequence[Tuple[str, str, Sequence[str]]], fallback: Tuple[str, str]):
+        self.targets: List[Tuple[str, str]] = [(s, t) for s, t, _ in rules] + [fallback]
+        self.fallback_code = len(rules)
+        self.keyword_rule: Dict[str, int] = {}
+        for i, (_, _, keywords) in enumerate(rules):
+            for k in keywords:
+                self.keyword_rule.setdefault(" ".join(normalize(k).split()), i)
+        words = list(self.keyword_rule)
+        self.pattern = re.compile(r"\b(" + _trie_regex(words) + r")\b") if words else None
+
+    def classify(self, labels: Sequence[str]) -> np.ndarray:
+        """Rule code per normalized label (``fallback_code`` when nothing matches)."""
+        out = np.full(len(labels), self.fallback_code, dtype=np.int32)
+        if self.pattern is None or not labels:
+            return out
+        blob = "\n".join(labels)
+        starts = np.cumsum([0] + [len(l) + 1 for l in labels[:-1]])
+        hits = [(m.start(), self.keyword_rule[m.group(1)]) for m in self.pattern.finditer(blob)]
+        if hits:
+            pos, codes = np.array(hits, dtype=np.int64).T
+            np.minimum.at(out, np.searchsorted(starts, pos, side="right") - 1, codes.astype(np.int32))
+        return out
+
+
+INCOME_INDEX = RuleIndex(INCOME_RULES, FALLBACK_INCOME)
+EXPENSE_INDEX = RuleIndex(EXPENSE_RULES, FALLBACK_EXPENSE)
+
+
+def _find_column(header: List[str], names: Sequence[str]) -> Optional[int]:
+    norm = [normalize(h) for h in header]
+    for name in names:
+        if name in norm:
+            return norm.index(name)
+    return None
+
+
+_AMOUNT_JUNK = str.maketrans("", "", " \u00a0\u202f€+")
+_COMMA_DECIMAL = re.compile(r",\d{1,2}$", re.M)
+_DOT_DECIMAL = re.compile(r"\.\d{1,2}$", re.M)
+
+
+def parse_amounts(raw: Sequence[str]) -> np.ndarray:
+    """Parse a column of amount strings ("1 234,56", "-12.30", "") into float64.
+
+    The decimal separator is decided once for the whole column, and the
+    cleanup runs on one joined string rather than per value.
+    """
+    if len(raw) == 0:
+        return np.zeros(0, dtype=np.float64)
+    blob = "\n".join(raw).replace("EUR", "").translate(_AMOUNT_JUNK)
+    if _COMMA_DECIMAL.search(blob) and not _DOT_DECIMAL.search(blob):
+        blob = blob.replace(".", "").replace(",", ".")  # "1.234,56" -> "1234.56"
+    else:
+        blob = blob.replace(",", "")  # "1,234.56" -> "1234.56"
+    values = blob.split("\n")
+    try:
+        return np.array([v or "0" for v in values], dtype=np.float64)
+    except ValueError as e:
+        raise StatementImportError(f"unreadable amount: {e}") from None
+
+
+def read_statement(fp: IO[bytes]) -> Tuple[List[str], np.ndarray, List[str]]:
+    """Return (labels, signed amounts, dates) from a CSV statement."""
+    text = fp.read()
+    if isinstance(text, bytes):
+        try:
+            text = text.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            text = text.decode("latin-1")
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    rows = list(csv.reader(io.StringIO(text), dialect))
+    if not rows:
+        raise StatementImportError("empty file")
+    header, body = rows[0], [r for r in rows[1:] if any(r)]
+
+    label_col = _find_column(header, LABEL_COLUMNS)
+    amount_col = _find_column(header, AMOUNT_COLUMNS)
+    debit_col = _find_column(header, DEBIT_COLUMNS)
+    credit_col = _find_column(header, CREDIT_COLUMNS)
+    date_col = _find_column(header, DATE_COLUMNS)
+    if label_col is None or (amount_col is None and debit_col is None and credit_col is None):
+        raise StatementImportError("expected a label column and an amount (or debit/credit) column")
+
+    width = len(header)
+    if any(len(r) < width for r in body):
+        body = [r + [""] * (width - len(r)) for r in body]
+    cols = list(zip(*body)) if body else [()] * width
+    labels = list(cols[label_col])
+    if amount_col is not None:
+        amounts = parse_amounts(cols[amount_col])
+    else:
+        debit = parse_amounts(cols[debit_col]) if debit_col is not None else 0.0
+        credit = parse_amounts(cols[credit_col]) if credit_col is not None else 0.0
+        amounts = np.abs(credit) - np.abs(debit)
+        amounts = np.broadcast_to(amounts, (len(labels),)).astype(np.float64)
+    dates = list(cols[date_col]) if date_col is not None else []
+    return labels, amounts, dates
+
+
+_MONTH_RE = re.compile(r"(\d{4})[-/.](\d{1,2})|(\d{1,2})[-/.](\d{1,2})[-/.](\d{2,4})")
+
+
+def count_months(dates: Sequence[str]) -> int:
+    """Distinct calendar months covered by the statement (at least 1)."""
+    months = set()
+    for d in set(dates):
+        m = _MONTH_RE.search(d)
+        if m:
+            months.add((m.group(1), m.group(2)) if m.group(1) else (m.group(5), m.group(4)))
+    return max(1, len(months))
+
+
+def categorize(labels: Sequence[str], amounts: np.ndarray, months: int = 1) -> Dict[str, List[Dict]]:
+    """Aggregate transactions into monthly section rows ({"type", "montant"})."""
+    amounts = np.asarray(amounts, dtype=np.float64)
+    uniq, inverse = np.unique(np.asarray(labels, dtype=str), return_inverse=True)
+    # One normalize() call over all labels; a newline inside a quoted CSV
+    # label would split it in two and shift every later label
+    joined = "\n".join(u.replace("\n", " ") for u in uniq.tolist())
+    norm = [" ".join(u.split()) for u in normalize(joined).split("\n")]
+
+    # Each direction only scans the distinct labels it actually has
+    n_in, n_out = len(INCOME_INDEX.targets), len(EXPENSE_INDEX.targets)
+    credit = amounts >= 0
+    codes = np.empty(len(amounts), dtype=np.int64)
+    for index, mask, offset in ((INCOME_INDEX, credit, 0), (EXPENSE_INDEX, ~credit, n_in)):
+        used = np.unique(inverse[mask])
+        rule = np.full(len(uniq), index.fallback_code, dtype=np.int64)
+        rule[used] = index.classify([norm[i] for i in used.tolist()])
+        codes[mask] = rule[inverse[mask]] + offset
+
+    sums = np.bincount(codes, weights=np.abs(amounts), minlength=n_in + n_out) / max(1, months)
+    targets = INCOME_INDEX.targets + EXPENSE_INDEX.targets
+
+    merged: Dict[Tuple[str, str], float] = {}
+    for (section, t), v in zip(targets, sums.tolist()):
+        if v > 0:
+            merged[(section, t)] = merged.get((section, t), 0.0) + v
+    out: Dict[str, List[Dict]] = {s: [] for s in SECTIONS}
+    for (section, t), v in merged.items():
+        row = {"type": t, "montant": round(v, 2)}
+        if t == "autre":
+            row["custom_label"] = ""
+        out[section].append(row)
+    return out
+
+
+def categorize_statement(fp: IO[bytes], months: Optional[int] = None) -> Dict[str, List[Dict]]:
+    labels, amounts, dates = read_statement(fp)
+    if months is None:
+        months = count_months(dates)
+    return categorize(labels, amounts, months)
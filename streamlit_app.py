@@ -1,9 +1,75 @@
 # streamlit_app.py
 from __future__ import annotations
-import io
-import json
-from typing import Dict, List
+import functools
+import os
+import uuid
+from collections import deque
+from typing import Callable, Dict, List, Optional
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from startup import ENABLED as PROFILE_STARTUP, StartupProfile, prewarm_pdf_backend
+
+# Profile only the first run of each session (FINANTHROPE_PROFILE_STARTUP=1)
+startup_profile = StartupProfile(PROFILE_STARTUP and "startup_profiled" not in st.session_state)
+
+from budget_engine import (
+    DEFAULT_FREQUENCY, EXPENSE_SECTIONS, FREQUENCIES, MONTHLY_FACTORS, SECTION_KEYS, RunningTotals, monthly_factor,
+    sections_from_state, with_converted,
+)
+from budget_export import COMPACT_EXTENSION, COMPACT_MIME, encode_compact, export_cache, export_json, is_compact, load_compact
+from budget_io import BudgetImportError, load_budgets
+from budget_rows import Row, rows_from_dicts
+from budget_store import budget_store
+from currency import DEFAULT_CURRENCY, SINGLE_CURRENCY, CurrencyError, currency_symbol, rate_table
+from history import History
+from i18n import LANG_NAMES, LANGS, labels, registry
+from instrumentation import HISTORY as TIMING_HISTORY, RerunTimings
+from pdf_cache import payload_digest, pdf_cache
+from pdf_jobs import pdf_jobs
+from projection import DEFAULT_INFLATION, MAX_YEARS, ProjectionParams, simulate
+from statement_import import StatementImportError, categorize_statement
+
+startup_profile.mark("imports")
+
+# Per-rerun stage timings (FINANTHROPE_INSTRUMENT=1); also picked up by create_pdf
+timings = full_run_timings = RerunTimings()
+timings.activate()
+
+def record_timings(run: RerunTimings, fragment: Optional[str] = None) -> None:
+    """Close ``run`` into the session's timing history (and the JSON log)."""
+    ctx = get_script_run_ctx()
+    timing_history = st.session_state.setdefault("timing-history", deque(maxlen=TIMING_HISTORY))
+    rerun = timing_history[-1]["rerun"] + 1 if timing_history else 0
+    timing_history.append(run.finish(ctx.session_id if ctx else None, rerun, fragment))
+
+def timed_fragment(key: str) -> Callable[[Callable], Callable]:
+    """Time a fragment's own reruns as runs of their own.
+
+    Inside a full run the fragment records into the full run's timings like
+    any other stage. On a fragment rerun the module's ``timings`` is swapped
+    for a fresh ``RerunTimings`` for the length of the call.
+    """
+    def decorate(fn: Callable) -> Callable:
+        if not timings.enabled:
+            return fn
+
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            global timings
+            ctx = get_script_run_ctx()
+            if timings is not full_run_timings or not (ctx and ctx.fragment_ids_this_run):
+                return fn(*args, **kwargs)
+            timings = RerunTimings()
+            timings.activate()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record_timings(timings, key)
+                timings = full_run_timings
+                timings.activate()
+        return run
+    return decorate
 
 # ---------- Page config ----------
 st.set_page_config(
@@ -15,8 +81,6 @@ st.set_page_config(
 # -----------------------------
 # UI language + theme
 # -----------------------------
-LANGS = ["fr", "en"]
-
 if "lang" not in st.session_state:
     st.session_state.lang = "fr"
 
@@ -24,14 +88,14 @@ if "theme" not in st.session_state:
     st.session_state.theme = "dark"  # default to night mode
 
 with st.container():
-    col_lang_1, col_lang_2 = st.columns([1.2, 3], gap="small")
+    col_lang_1, col_lang_2, col_cur = st.columns([1.2, 2, 1], gap="small")
 
     with col_lang_1:
         st.session_state.lang = st.selectbox(
             "Langue • Language",
             LANGS,
-            index=0 if st.session_state.lang == "fr" else 1,
-            format_func=lambda x: "Français" if x == "fr" else "English"
+            index=LANGS.index(st.session_state.lang) if st.session_state.lang in LANGS else 0,
+            format_func=lambda x: LANG_NAMES.get(x, x)
         )
 
     current_lang = st.session_state.lang
@@ -53,11 +117,46 @@ with st.container():
         )
         st.session_state.theme = theme_choice
 
+    # Reporting currency: every total is converted into it (rates.json, FINANTHROPE_RATES)
+    try:
+        RATES = rate_table()
+    except CurrencyError as e:
+        # A broken rate file must not take every session down with it
+        RATES = SINGLE_CURRENCY
+        st.warning(f'{labels[current_lang]["rates_error"]}: {e}')
+    if st.session_state.get("report-currency") not in RATES.codes:
+        st.session_state["report-currency"] = DEFAULT_CURRENCY
+    with col_cur:
+        if len(RATES.codes) > 1:
+            st.session_state["report-currency"] = st.selectbox(
+                labels[current_lang]["currency"], RATES.codes,
+                index=RATES.codes.index(st.session_state["report-currency"]),
+                help=labels[current_lang]["rates_as_of"].format(date=RATES.as_of) if RATES.as_of else None,
+            )
+
 L = st.session_state.lang
 THEME = st.session_state.theme
+REPORT = st.session_state["report-currency"]
+CUR = currency_symbol(REPORT)
+MULTI_CURRENCY = len(RATES.codes) > 1
+
+def to_report(amount: float, currency, frequency=None) -> float:
+    """Monthly equivalent of a row amount, in the reporting currency."""
+    return amount * RATES.factor(currency, REPORT) * monthly_factor(frequency)
+
+def fmt_frequency(frequency: str) -> str:
+    return labels[L][f"freq_{frequency}"]
+
+def frequency_from_label(name) -> str:
+    """Frequency key of a grid cell, which holds the display label."""
+    names = [fmt_frequency(f) for f in FREQUENCIES]
+    return FREQUENCIES[names.index(name)] if name in names else DEFAULT_FREQUENCY
 
 # ---------- Styling (including night mode) ----------
-base_css = """
+# Session-independent resources are built once per process and shared by all sessions
+@st.cache_resource(show_spinner=False)
+def theme_css(theme: str) -> str:
+    base_css = """
 <style>
   .summary-card { position: sticky; top: 1rem; padding: 0.75rem 0.75rem 0.5rem 0.75rem; border-radius: 0.75rem; }
   .block-container { padding-top: 1rem; padding-bottom: 2rem; }
@@ -85,8 +184,8 @@ base_css = """
   .calm-json button:hover { background: #eef0f3; }
 """
 
-if THEME == "dark":
-    base_css += """
+    if theme == "dark":
+        base_css += """
   body, .stApp {
     background-color: #020617;
     color: #e5e7eb;
@@ -109,8 +208,8 @@ if THEME == "dark":
     border: 1px solid rgba(148, 163, 184, 0.45) !important;
   }
 """
-else:
-    base_css += """
+    else:
+        base_css += """
   body, .stApp {
     background-color: #ffffff;
     color: #111827;
@@ -124,413 +223,55 @@ else:
   }
 """
 
-base_css += "</style>"
+    base_css += "</style>"
+    return base_css
 
-st.markdown(base_css, unsafe_allow_html=True)
+@st.cache_resource(show_spinner=False)
+def logo_bytes() -> bytes:
+    with open("logo.png", "rb") as f:
+        return f.read()
 
-# -----------------------------
-# Labels and category options
-# -----------------------------
-labels = {
-    "fr": {
-        "app_title": "Finanthrope — Calculateur d'Épargne",
-        "app_sub": "Calculez votre capacité d'épargne mensuelle",
-        "revenus": "Revenus mensuels",
-        "revenus_desc": "Ajoutez vos différentes sources de revenus",
-        "dep_q": "Dépenses quotidiennes",
-        "dep_q_desc": "Abonnements, nourriture, téléphone, loisirs, voyages",
-        "dep_a": "Dépenses administratives",
-        "dep_a_desc": "Assurances habitation, auto, décès, mutuelle, frais bancaires",
-        "dep_f": "Dépenses familiales",
-        "dep_f_desc": "Frais scolaires, cantine, sport, loisirs enfants",
-        "credits": "Crédits et prêts",
-        "credits_desc": "Crédit auto, immobilier, travaux, consommation, prêt étudiant",
-        "impots": "Impôts",
-        "impots_desc": "Sur le salaire, fonciers, PFU",
-        "type": "Type",
-        "amount": "Montant",
-        "add": "Ajouter une ligne",
-        "remove": "Supprimer",
-        "no_rows": "Aucune entrée. Ajoutez une ligne pour commencer.",
-        "totals": "Résumé",
-        "total_rev": "Total revenus",
-        "total_dep": "Total dépenses",
-        "capacity": "Capacité d'épargne",
-        "breakdown": "Répartition des dépenses",
-        "download": "Télécharger les données",
-        "download_pdf": "Télécharger le PDF",
-        "file_saved": "Fichier prêt",
-        "euros": "€",
-        "positive": "Capacité positive",
-        "negative": "Capacité négative",
-        "per_month": "par mois",
-        "section_total": "Total",
-        "reset": "Tout réinitialiser",
-        "pdf_title": "Résumé budgétaire",
-        "pdf_rev": "Revenus",
-        "pdf_dep": "Dépenses",
-        "pdf_chart": "Répartition des dépenses",
-        "pdf_capacity": "Capacité d’épargne",
-    },
-    "en": {
-        "app_title": "Finanthrope — Savings Capacity Calculator",
-        "app_sub": "Estimate your monthly savings capacity",
-        "revenus": "Monthly income",
-        "revenus_desc": "Add your different income sources",
-        "dep_q": "Everyday expenses",
-        "dep_q_desc": "Subscriptions, food, phone, leisure, travel",
-        "dep_a": "Administrative expenses",
-        "dep_a_desc": "Home, car, life insurance, health cover, bank fees",
-        "dep_f": "Family expenses",
-        "dep_f_desc": "School, canteen, sports, kids leisure",
-        "credits": "Loans and credit",
-        "credits_desc": "Car, mortgage, renovation, consumer, student",
-        "impots": "Taxes",
-        "impots_desc": "On salary, property, flat tax",
-        "type": "Type",
-        "amount": "Amount",
-        "add": "Add a row",
-        "remove": "Remove",
-        "no_rows": "No entries yet. Add a row to get started.",
-        "totals": "Summary",
-        "total_rev": "Total income",
-        "total_dep": "Total expenses",
-        "capacity": "Savings capacity",
-        "breakdown": "Expense breakdown",
-        "download": "Download data",
-        "download_pdf": "Download PDF",
-        "file_saved": "File ready",
-        "euros": "€",
-        "positive": "Positive capacity",
-        "negative": "Negative capacity",
-        "per_month": "per month",
-        "section_total": "Total",
-        "reset": "Reset all",
-        "pdf_title": "Budget summary",
-        "pdf_rev": "Income",
-        "pdf_dep": "Expenses",
-        "pdf_chart": "Expense breakdown",
-        "pdf_capacity": "Savings capacity",
-    },
-}
+@st.cache_resource(show_spinner=False)
+def warm_pdf_backend() -> bool:
+    prewarm_pdf_backend()
+    return True
 
-budgetLabels = {
-  "fr": {
-    "revenus": {
-      "salaire": "Salaire",
-      "prime_salaire": "Prime du salaire",
-      "prime_activite": "Prime d'activité",
-      "allocation_logement": "Allocation logement",
-      "revenu_immobilier": "Revenu immobilier",
-      "activite_secondaire": "Activité secondaire net",
-      "autre": "Autre",
-    },
-    "depensesQuotidiennes": {
-      "abonnement": "Abonnements",
-      "nourriture": "Nourriture",
-      "telephone": "Téléphone",
-      "loisirs": "Loisirs",
-      "voyage": "Voyages",
-      "loyer": "Loyer",
-      "autre": "Autre",
-    },
-    "depensesAdministratives": {
-      "assurance_habitation": "Assurance habitation",
-      "assurance_auto": "Assurance auto",
-      "assurance_deces": "Assurance décès",
-      "mutuelle": "Mutuelle",
-      "frais_bancaires": "Frais bancaires",
-      "autre": "Autre",
-    },
-    "depensesFamiliales": {
-      "scolaire": "Frais scolaires",
-      "cantine": "Cantine",
-      "sport": "Sport",
-      "loisirs_enfants": "Loisirs enfants",
-      "autre": "Autre",
-    },
-    "credits": {
-      "credit_auto": "Crédit auto",
-      "credit_immobilier": "Crédit immobilier",
-      "credit_travaux": "Crédit travaux",
-      "credit_consommation": "Crédit consommation",
-      "pret_etudiant": "Prêt étudiant",
-      "autre": "Autre",
-    },
-    "impots": {
-      "impot_salaire": "Impôts sur le salaire",
-      "impot_foncier": "Impôts fonciers",
-      "impot_pfu": "Impôts PFU",
-      "autre": "Autre",
-    },
-  },
-  "en": {
-    "revenus": {
-      "salaire": "Salary",
-      "prime_salaire": "Salary bonus",
-      "prime_activite": "Activity bonus",
-      "allocation_logement": "Housing allowance",
-      "revenu_immobilier": "Property income",
-      "activite_secondaire": "Side activity net",
-      "autre": "Other income",
-    },
-    "depensesQuotidiennes": {
-      "abonnement": "Subscriptions",
-      "nourriture": "Food",
-      "telephone": "Phone",
-      "loisirs": "Leisure",
-      "voyage": "Travel",
-      "loyer": "Rent",
-      "autre": "Other",
-    },
-    "depensesAdministratives": {
-      "assurance_habitation": "Home insurance",
-      "assurance_auto": "Car insurance",
-      "assurance_deces": "Life insurance",
-      "mutuelle": "Health cover",
-      "frais_bancaires": "Bank fees",
-      "autre": "Other",
-    },
-    "depensesFamiliales": {
-      "scolaire": "School fees",
-      "cantine": "Canteen",
-      "sport": "Sports",
-      "loisirs_enfants": "Kids leisure",
-      "autre": "Other",
-    },
-    "credits": {
-      "credit_auto": "Car loan",
-      "credit_immobilier": "Mortgage",
-      "credit_travaux": "Renovation loan",
-      "credit_consommation": "Consumer loan",
-      "pret_etudiant": "Student loan",
-      "autre": "Other",
-    },
-    "impots": {
-      "impot_salaire": "Salary tax",
-      "impot_foncier": "Property tax",
-      "impot_pfu": "Flat tax",
-      "autre": "Other",
-    },
-  },
-}
+@st.cache_data(show_spinner=False, max_entries=64)
+def run_projection(income0: float, expenses0: tuple, params: ProjectionParams) -> Dict:
+    return simulate(income0, dict(expenses0), params).as_dict()
+
+st.markdown(theme_css(THEME), unsafe_allow_html=True)
+warm_pdf_backend()
+startup_profile.mark("page config + css")
 
 # -----------------------------
 # Helpers
 # -----------------------------
 def options_for(section_key: str) -> List[str]:
-    mapping = budgetLabels[L][section_key]
-    return [mapping[k] for k in mapping.keys()]
+    return registry.section(L, section_key).options
 
 def key_from_label(section_key: str, human_label: str) -> str:
-    mapping = budgetLabels[L][section_key]
-    for k, v in mapping.items():
-        if v == human_label:
-            return k
-    return list(mapping.keys())[0]
+    return registry.section(L, section_key).key(human_label)
 
 def label_from_key(section_key: str, k: str) -> str:
-    return budgetLabels[L][section_key].get(k, k)
-
-def pdf_label_from_row(dict_key: str, row: Dict, lang: str) -> str:
-    """For PDF: use custom label when type is 'autre'."""
-    t = row.get("type", "")
-    if t == "autre":
-        custom = row.get("custom_label") or row.get("customLabel")
-        if custom:
-            return custom
-        return budgetLabels[lang][dict_key].get("autre", "Autre" if lang == "fr" else "Other")
-    return budgetLabels[lang][dict_key].get(t, t)
-
-# -----------------------------
-# PDF generator (Coolors palette + donut)
-# -----------------------------
-def create_pdf(payload: Dict, labels: Dict, lang: str) -> bytes:
-    from reportlab.lib.pagesizes import A4
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-    from reportlab.lib.styles import getSampleStyleSheet
-    from reportlab.lib import colors
-    from reportlab.lib.units import mm
-    import matplotlib.pyplot as plt
-    import io as _io
-
-    # Coolors palette
-    COL_EAE4E9 = colors.HexColor("#EAE4E9")
-    COL_FFF1E6 = colors.HexColor("#FFF1E6")
-    COL_FDE2E4 = colors.HexColor("#FDE2E4")
-    COL_FAD2E1 = colors.HexColor("#FAD2E1")
-    COL_E2ECE9 = colors.HexColor("#E2ECE9")
-    COL_BEE1E6 = colors.HexColor("#BEE1E6")
-    COL_F0EFEB = colors.HexColor("#F0EFEB")
-    COL_DFE7FD = colors.HexColor("#DFE7FD")
-    COL_CDDAFD = colors.HexColor("#CDDAFD")
-
-    # Text and lines
-    COL_TEXT = colors.HexColor("#1F2937")
-    COL_BORDER = COL_CDDAFD
-    COL_HEADER_BG = COL_DFE7FD
-    COL_HEADER_TEXT = COL_TEXT
-    COL_SECTION_SPACER = 8
-
-    # Donut palette (slices)
-    CHART_PALETTE = ["#FDE2E4", "#FAD2E1", "#E2ECE9", "#BEE1E6", "#CDDAFD"]
-
-    buf = io.BytesIO()
-    doc = SimpleDocTemplate(
-        buf, pagesize=A4,
-        leftMargin=18*mm, rightMargin=18*mm,
-        topMargin=18*mm, bottomMargin=18*mm
-    )
-
-    styles = getSampleStyleSheet()
-    title_style = styles["Title"]
-    h_style = styles["Heading2"]
-    p_style = styles["BodyText"]
-
-    title_style.textColor = COL_TEXT
-    h_style.textColor = COL_TEXT
-    p_style.textColor = COL_TEXT
-
-    story = []
-
-    # Title
-    story.append(Paragraph(f"Finanthrope — {labels[lang]['pdf_title']}", title_style))
-    story.append(Spacer(1, COL_SECTION_SPACER))
-
-    # Top metrics
-    totals = payload["totals"]
-    cap = totals["capacite_epargne"]
-    badge = "✅" if cap >= 0 else "⚠️"
-    for line in [
-        f"{labels[lang]['total_rev']}: {totals['revenus']:,.2f} {labels[lang]['euros']}",
-        f"{labels[lang]['total_dep']}: {totals['depenses']:,.2f} {labels[lang]['euros']}",
-        f"{labels[lang]['pdf_capacity']}: {cap:,.2f} {labels[lang]['euros']} {badge}",
-    ]:
-        story.append(Paragraph(line, p_style))
-    story.append(Spacer(1, COL_SECTION_SPACER))
-
-    # Section table helper
-    def add_section(title: str, section_key: str, dict_key: str):
-        rows = payload["sections"][section_key]
-        data = [[labels[lang]["type"], labels[lang]["amount"] + f" ({labels[lang]['euros']})"]]
-        for r in rows:
-            human = pdf_label_from_row(dict_key, r, lang)
-            amt = float(r.get("montant", 0.0))
-            data.append([human, f"{amt:,.2f}"])
-
-        table = Table(data, hAlign="LEFT", colWidths=[None, 60*mm])
-        table.setStyle(TableStyle([
-            ("BACKGROUND", (0,0), (-1,0), COL_HEADER_BG),
-            ("TEXTCOLOR", (0,0), (-1,0), COL_HEADER_TEXT),
-            ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
-            ("ALIGN", (1,1), (-1,-1), "RIGHT"),
-            ("INNERGRID", (0,0), (-1,-1), 0.25, COL_BORDER),
-            ("BOX", (0,0), (-1,-1), 0.5, COL_BORDER),
-            ("BOTTOMPADDING", (0,0), (-1,0), 6),
-            ("TOPPADDING", (0,0), (-1,0), 6),
-        ]))
-
-        story.append(Paragraph(title, h_style))
-        story.append(table)
-        story.append(Spacer(1, COL_SECTION_SPACER))
-
-    # Income and expense sections
-    add_section(labels[lang]["pdf_rev"], "revenus", "revenus")
-    add_section(labels[lang]["pdf_dep"] + " — " + labels[lang]["dep_q"], "depensesQuotidiennes", "depensesQuotidiennes")
-    add_section(labels[lang]["pdf_dep"] + " — " + labels[lang]["dep_a"], "depensesAdministratives", "depensesAdministratives")
-    add_section(labels[lang]["pdf_dep"] + " — " + labels[lang]["dep_f"], "depensesFamiliales", "depensesFamiliales")
-    add_section(labels[lang]["pdf_dep"] + " — " + labels[lang]["credits"], "credits", "credits")
-    add_section(labels[lang]["pdf_dep"] + " — " + labels[lang]["impots"], "impots", "impots")
-
-    # Donut chart with legend
-    dep_vals = [
-        totals["quotidiennes"],
-        totals["administratives"],
-        totals["familiales"],
-        totals["credits"],
-        totals["impots"],
-    ]
-    dep_names = [
-        labels[lang]["dep_q"],
-        labels[lang]["dep_a"],
-        labels[lang]["dep_f"],
-        labels[lang]["credits"],
-        labels[lang]["impots"],
-    ]
-
-    if sum(dep_vals) > 0:
-        import matplotlib.pyplot as plt
-        fig, ax = plt.subplots(figsize=(5.4, 4.2), dpi=220)
-        fig.patch.set_facecolor("white")
-        ax.set_facecolor("white")
-
-        wedges, _ = ax.pie(
-            dep_vals,
-            radius=1.0,
-            startangle=90,
-            labels=None,
-            autopct=None,
-            colors=CHART_PALETTE,
-            wedgeprops=dict(width=0.36, edgecolor="white")
-        )
-
-        centre_circle = plt.Circle((0, 0), 0.64, color="white")
-        ax.add_artist(centre_circle)
-
-        ring = plt.Circle((0, 0), 1.0, fill=False, linewidth=1.4, color="#CDDAFD")
-        ax.add_artist(ring)
-
-        ax.set_title(labels[lang]["pdf_chart"], color="#1F2937")
-
-        total = float(sum(dep_vals))
-        legend_labels = [f"{n} — {int(round(v/total*100))}%"
-                         for n, v in zip(dep_names, dep_vals)]
-        leg = ax.legend(
-            wedges,
-            legend_labels,
-            loc="center left",
-            bbox_to_anchor=(1.02, 0.5),
-            frameon=False
-        )
-        for text in leg.get_texts():
-            text.set_color("#1F2937")
-
-        plt.tight_layout()
-        img_buf = _io.BytesIO()
-        fig.savefig(img_buf, format="png", bbox_inches="tight")
-        plt.close(fig)
-        img_buf.seek(0)
-
-        story.append(Image(img_buf, width=150*mm, height=110*mm))
-        story.append(Spacer(1, COL_SECTION_SPACER))
-
-    doc.build(story)
-    buf.seek(0)
-    return buf.read()
+    return registry.section(L, section_key).label(k)
 
 # -----------------------------
 # App header with logo
 # -----------------------------
 header_logo_col, header_text_col = st.columns([1, 8])
 with header_logo_col:
-    st.image("logo.png", width=56)
+    st.image(logo_bytes(), width=56)
 
 with header_text_col:
     st.title(labels[L]["app_title"])
     st.caption(labels[L]["app_sub"])
 
+startup_profile.mark("header")
+
 # -----------------------------
 # State model
 # -----------------------------
-SECTION_KEYS = {
-    "revenus": "revenus",
-    "depensesQuotidiennes": "dep_q",
-    "depensesAdministratives": "dep_a",
-    "depensesFamiliales": "dep_f",
-    "credits": "credits",
-    "impots": "impots",
-}
-
 default_state = {
     "revenus": [],
     "dep_q": [],
@@ -544,134 +285,464 @@ for k in default_state.keys():
     if k not in st.session_state:
         st.session_state[k] = []
 
+# Persistence (FINANTHROPE_STORE): the budget id lives in the URL, so a reload
+# or a new pod picks the saved budget back up on the session's first run
+if budget_store is not None and "store-user" not in st.session_state:
+    store_user = st.query_params.get("b")
+    try:
+        stored = budget_store.load(store_user) if store_user else None
+    except (BudgetImportError, CurrencyError) as e:
+        stored = None
+        st.warning(f'{labels[L]["store_error"]}: {e}')
+    if stored is not None:
+        st.session_state.update({SECTION_KEYS[s]: rows_from_dicts(rows) for s, rows in stored.items()})
+        st.session_state.running_totals = RunningTotals.from_sections(stored, RATES, REPORT)
+    if not store_user:
+        store_user = st.query_params["b"] = uuid.uuid4().hex
+    st.session_state["store-user"] = store_user
+
+# Per-section sums (in the reporting currency) updated by delta on every edit;
+# the summary card reads these. Rebuilt when the rate file or currency changes.
+if "running_totals" not in st.session_state or st.session_state.running_totals.basis != (RATES.version, REPORT):
+    st.session_state.running_totals = RunningTotals.from_sections(sections_from_state(st.session_state), RATES, REPORT)
+running_totals: RunningTotals = st.session_state.running_totals
+
+# Undo/redo steps for this session (compact diffs, bounded; see history.py)
+if "history" not in st.session_state:
+    st.session_state.history = History()
+history: History = st.session_state.history
+
+# FINANTHROPE_DEBUG_TOTALS=1 checks the running sums against a full recompute on every rerun
+DEBUG_TOTALS = os.environ.get("FINANTHROPE_DEBUG_TOTALS", "").lower() not in ("", "0", "false", "no")
+
+def clear_row_widgets():
+    """Drop per-row widget state so replaced rows are not overridden by stale values."""
+    for k in [k for k in st.session_state if str(k).startswith(("sel-", "amt-", "custom-", "cur-", "freq-"))]:
+        del st.session_state[k]
+
 # Reset
 with st.expander("⚙️ " + (labels[L]["reset"]), expanded=False):
     if st.button(labels[L]["reset"]):
+        before = {k: st.session_state[k] for k in default_state}
         for k in default_state.keys():
             st.session_state[k] = []
+        history.replace(before, {k: st.session_state[k] for k in default_state})
+        st.session_state.running_totals = RunningTotals(basis=(RATES.version, REPORT))
         st.rerun()
 
+# Import a previously exported budget
+with st.expander("📥 " + labels[L]["import"], expanded=False):
+    uploaded = st.file_uploader(labels[L]["import_file"], type=["json", "jsonl", "csv", COMPACT_EXTENSION[1:]], key="import-file")
+    if uploaded is not None:
+        # Parse each upload once, not on every rerun
+        parsed = st.session_state.get("import-parsed")
+        if parsed is None or parsed[0] != uploaded.file_id:
+            try:
+                if uploaded.name.lower().endswith(".csv"):
+                    budgets = [categorize_statement(uploaded)]
+                elif is_compact(uploaded.name):
+                    budgets = load_compact(uploaded)
+                else:
+                    budgets = load_budgets(uploaded)
+                parsed = (uploaded.file_id, budgets, None)
+            except (BudgetImportError, StatementImportError, CurrencyError) as e:
+                parsed = (uploaded.file_id, [], str(e))
+            st.session_state["import-parsed"] = parsed
+        _, budgets, error = parsed
+        if error:
+            st.error(f'{labels[L]["import_error"]}: {error}')
+        elif budgets:
+            pick = 0
+            if len(budgets) > 1:
+                pick = st.selectbox(labels[L]["import_pick"], range(len(budgets)), format_func=lambda i: f"#{i + 1}")
+            if st.button(labels[L]["import_btn"], key="import-btn"):
+                clear_row_widgets()
+                before = {k: st.session_state[k] for k in default_state}
+                st.session_state.update({SECTION_KEYS[s]: rows_from_dicts(rows) for s, rows in budgets[pick].items()})
+                history.replace(before, {k: st.session_state[k] for k in default_state})
+                st.session_state.running_totals = RunningTotals.from_sections(budgets[pick], RATES, REPORT)
+                st.rerun()
+
+# -----------------------------
+# Partial reruns
+# -----------------------------
+# Each section, the summary card and the downloads inside it are keyed
+# fragments. Edits rerun their own section plus the downloads (the payload
+# changed), or the whole summary card when the totals changed too, and the
+# undo bar so its buttons follow the history.
+SUMMARY_FRAGMENT = "summary"
+DOWNLOADS_FRAGMENT = "downloads"
+HISTORY_FRAGMENT = "history"
+
+def section_fragment_key(state_key: str) -> str:
+    return f"section-{state_key}"
+
+def rerun_after_edit(state_key: str, totals_changed: bool):
+    st.rerun(scope=[
+        section_fragment_key(state_key), SUMMARY_FRAGMENT if totals_changed else DOWNLOADS_FRAGMENT, HISTORY_FRAGMENT,
+    ])
+
+# Row widgets are keyed by Row.id, not by position, so adding or deleting a
+# row leaves the other rows' widgets (and their state) untouched
+def row_widget_key(prefix: str, state_key: str, row: Row) -> str:
+    return f"{prefix}-{state_key}-{row.id}"
+
+def row_index(state_key: str, row_id: int):
+    """Current position of a row, or None if it is gone (e.g. undone)."""
+    for i, r in enumerate(st.session_state[state_key]):
+        if r.id == row_id:
+            return i
+    return None
+
+def on_amount_change(state_key: str, row_id: int):
+    i = row_index(state_key, row_id)
+    if i is not None:
+        row = st.session_state[state_key][i]
+        rerun_after_edit(state_key, st.session_state[row_widget_key("amt", state_key, row)] != row.montant)
+
+def on_currency_change(state_key: str, row_id: int):
+    i = row_index(state_key, row_id)
+    if i is not None:
+        row = st.session_state[state_key][i]
+        changed = st.session_state[row_widget_key("cur", state_key, row)] != (row.currency or DEFAULT_CURRENCY)
+        rerun_after_edit(state_key, changed and row.montant != 0)
+
+def on_frequency_change(state_key: str, row_id: int):
+    i = row_index(state_key, row_id)
+    if i is not None:
+        row = st.session_state[state_key][i]
+        changed = st.session_state[row_widget_key("freq", state_key, row)] != (row.frequency or DEFAULT_FREQUENCY)
+        rerun_after_edit(state_key, changed and row.montant != 0)
+
+def on_add_row(state_key: str, section_key: str):
+    # New rows are entered in the reporting currency
+    currency = None if REPORT == DEFAULT_CURRENCY else REPORT
+    rows = st.session_state[state_key]
+    rows.append(Row(registry.section(L, section_key).default_key, currency=currency))
+    history.insert(state_key, len(rows) - 1, rows[-1])
+    rerun_after_edit(state_key, False)
+
+def on_remove_row(state_key: str, section_key: str, row_id: int):
+    i = row_index(state_key, row_id)
+    if i is None:
+        return
+    removed = st.session_state[state_key].pop(i)
+    history.delete(state_key, i, removed)
+    running_totals.add(section_key, -to_report(removed.montant, removed.currency, removed.frequency))
+    rerun_after_edit(state_key, removed.montant != 0)
+
+def on_grid_change(state_key: str, section_key: str, editor_key: str):
+    """Recompute the section total from the editor's delta to pick the rerun scope."""
+    delta = st.session_state[editor_key]
+    base_rows = st.session_state[f"grid-base-{state_key}"]["rows"]
+    deleted = set(delta.get("deleted_rows", ()))
+    edited = {int(i): change for i, change in delta.get("edited_rows", {}).items()}
+    total = sum(
+        to_report(
+            float(edited.get(i, {}).get("montant", r.montant) or 0.0),
+            edited.get(i, {}).get("currency", r.currency),
+            frequency_from_label(edited[i]["frequency"]) if "frequency" in edited.get(i, {}) else r.frequency,
+        )
+        for i, r in enumerate(base_rows) if i not in deleted
+    )
+    total += sum(
+        to_report(float(r.get("montant") or 0.0), r.get("currency") or REPORT, frequency_from_label(r.get("frequency")))
+        for r in delta.get("added_rows", ())
+    )
+    rerun_after_edit(state_key, abs(total - running_totals.section_totals[section_key]) > 1e-9)
+
+def on_history(redo: bool):
+    """Undo or redo one step, then rebuild everything from the restored rows."""
+    if (history.redo if redo else history.undo)(st.session_state):
+        clear_row_widgets()
+        st.session_state.running_totals = RunningTotals.from_sections(sections_from_state(st.session_state), RATES, REPORT)
+    st.rerun(scope="app")
+
 # -----------------------------
 # Section renderer
 # -----------------------------
-def render_section(title: str, desc: str, state_key: str, section_key_for_labels: str):
+def render_section_rows(title: str, desc: str, state_key: str, section_key_for_labels: str):
     st.markdown(f"### {title}")
     if desc:
         st.caption(desc)
 
-    rows: List[Dict] = st.session_state[state_key]
+    rows: List[Row] = st.session_state[state_key]
 
     if len(rows) == 0:
         st.info(labels[L]["no_rows"])
 
-    to_delete = None
     for i, row in enumerate(rows):
-        c1, c2, c3 = st.columns([4, 3, 1])
+        before = row.fields()
+        if MULTI_CURRENCY:
+            c1, c2, c_cur, c_freq, c3 = st.columns([3.4, 2, 1.1, 1.5, 1])
+        else:
+            c1, c2, c_freq, c3 = st.columns([4, 2.4, 1.6, 1])
 
         # ---- Type + custom label when "autre" / "other" ----
         with c1:
-            current_label = label_from_key(section_key_for_labels, row.get("type", ""))
-            opts = options_for(section_key_for_labels)
+            sec = registry.section(L, section_key_for_labels)
 
             sel = st.selectbox(
                 f'{labels[L]["type"]} {state_key}-{i}',
-                opts,
-                index=opts.index(current_label) if current_label in opts else 0,
-                key=f"sel-{state_key}-{i}",
+                sec.options,
+                index=sec.index(row.type),
+                key=row_widget_key("sel", state_key, row),
+                on_change=rerun_after_edit, args=(state_key, False),
             )
-            row["type"] = key_from_label(section_key_for_labels, sel)
+            row.type = sec.key(sel)
 
-            if row["type"] == "autre":
+            if row.type == "autre":
                 placeholder = "Précisez la catégorie" if L == "fr" else "Specify category"
                 custom_val = st.text_input(
                     f"{placeholder} {state_key}-{i}",
-                    value=row.get("custom_label", ""),
-                    key=f"custom-{state_key}-{i}",
+                    value=row.custom_label or "",
+                    key=row_widget_key("custom", state_key, row),
+                    on_change=rerun_after_edit, args=(state_key, False),
                 )
-                row["custom_label"] = custom_val
+                row.custom_label = custom_val
             else:
                 # Clean up if user changes from "autre" to something else
-                row.pop("custom_label", None)
+                row.custom_label = None
 
         # ---- Amount ----
         with c2:
             amt = st.number_input(
                 f'{labels[L]["amount"]} {state_key}-{i}',
                 min_value=0.0, step=0.01, format="%.2f",
-                value=float(row.get("montant", 0.0)),
-                key=f"amt-{state_key}-{i}",
+                value=row.montant,
+                key=row_widget_key("amt", state_key, row),
+                on_change=on_amount_change, args=(state_key, row.id),
             )
-            row["montant"] = amt
+            running_totals.add(section_key_for_labels, to_report(amt - row.montant, row.currency, row.frequency))
+            row.montant = amt
+
+        # ---- Currency (only with a rate file) ----
+        if MULTI_CURRENCY:
+            with c_cur:
+                old = row.currency or DEFAULT_CURRENCY
+                cur = st.selectbox(
+                    f'{labels[L]["currency"]} {state_key}-{i}',
+                    RATES.codes,
+                    index=RATES.codes.index(old) if old in RATES.codes else 0,
+                    key=row_widget_key("cur", state_key, row),
+                    on_change=on_currency_change, args=(state_key, row.id),
+                )
+                if cur != old:
+                    running_totals.add(
+                        section_key_for_labels,
+                        to_report(row.montant, cur, row.frequency) - to_report(row.montant, old, row.frequency),
+                    )
+                    row.currency = None if cur == DEFAULT_CURRENCY else cur
+
+        # ---- Frequency (totals use the monthly equivalent) ----
+        with c_freq:
+            old = row.frequency or DEFAULT_FREQUENCY
+            freq = st.selectbox(
+                f'{labels[L]["frequency"]} {state_key}-{i}',
+                FREQUENCIES,
+                index=FREQUENCIES.index(old) if old in FREQUENCIES else 0,
+                format_func=fmt_frequency,
+                key=row_widget_key("freq", state_key, row),
+                help=labels[L]["frequency_help"],
+                on_change=on_frequency_change, args=(state_key, row.id),
+            )
+            if freq != old:
+                running_totals.add(
+                    section_key_for_labels,
+                    to_report(row.montant, row.currency, freq) - to_report(row.montant, row.currency, old),
+                )
+                row.frequency = None if freq == DEFAULT_FREQUENCY else freq
+
+        # One undo step per row per rerun, whatever the widgets changed
+        history.edit(state_key, i, before, row.fields())
 
         # ---- Remove row ----
         with c3:
-            if st.button(labels[L]["remove"], key=f"rm-{state_key}-{i}"):
-                to_delete = i
-
-    if to_delete is not None:
-        del rows[to_delete]
-        st.session_state[state_key] = rows
-        st.rerun()
+            st.button(labels[L]["remove"], key=row_widget_key("rm", state_key, row),
+                      on_click=on_remove_row, args=(state_key, section_key_for_labels, row.id))
 
     cols = st.columns([1, 3])
     with cols[0]:
-        if st.button(labels[L]["add"], key=f"add-{state_key}"):
-            # default to first defined key in that section
-            default_key = list(budgetLabels[L][section_key_for_labels].keys())[0]
-            rows.append({"type": default_key, "montant": 0.0})
-            st.session_state[state_key] = rows
-            st.rerun()
+        # New rows default to the first defined key in that section
+        st.button(labels[L]["add"], key=f"add-{state_key}",
+                  on_click=on_add_row, args=(state_key, section_key_for_labels))
     with cols[1]:
-        section_total = sum(float(r.get("montant", 0.0)) for r in rows)
-        st.markdown(f"**{labels[L]['section_total']}**: {section_total:,.2f} {labels[L]['euros']}")
+        # Filled in by render_section_block, from the running totals
+        return st.empty()
+
+# -----------------------------
+# Grid renderer (one st.data_editor per section)
+# -----------------------------
+def render_section_grid(title: str, desc: str, state_key: str, section_key_for_labels: str):
+    import pandas as pd
+
+    st.markdown(f"### {title}")
+    if desc:
+        st.caption(desc)
+
+    # data_editor keeps its edits as a delta against the data it was first given,
+    # so that base snapshot stays fixed until the rows change outside the grid
+    # (reset, row mode, language switch); then the editor is re-keyed.
+    rows: List[Row] = st.session_state[state_key]
+    base_key = f"grid-base-{state_key}"
+    base = st.session_state.get(base_key)
+    if base is None or base["lang"] != L or base["last"] != rows:
+        version = base["version"] + 1 if base else 0
+        base = {"rows": [r.copy() for r in rows], "last": None, "lang": L, "version": version}
+        st.session_state[base_key] = base
+
+    sec = registry.section(L, section_key_for_labels)
+    opts = sec.options
+    df = pd.DataFrame({
+        "type": pd.Series([opts[sec.index(r.type)] for r in base["rows"]], dtype="object"),
+        "custom_label": pd.Series([r.custom_label or "" for r in base["rows"]], dtype="object"),
+        "montant": pd.Series([r.montant for r in base["rows"]], dtype="float64"),
+    })
+    if MULTI_CURRENCY:
+        df["currency"] = pd.Series([r.currency or DEFAULT_CURRENCY for r in base["rows"]], dtype="object")
+    freq_names = [fmt_frequency(f) for f in FREQUENCIES]
+    df["frequency"] = pd.Series([fmt_frequency(r.frequency or DEFAULT_FREQUENCY) for r in base["rows"]], dtype="object")
+
+    editor_key = f"grid-{state_key}-{base['version']}"
+    edited = st.data_editor(
+        df,
+        key=editor_key,
+        on_change=on_grid_change, args=(state_key, section_key_for_labels, editor_key),
+        num_rows="dynamic",
+        hide_index=True,
+        column_config={
+            "type": st.column_config.SelectboxColumn(labels[L]["type"], options=opts, required=True, default=opts[0]),
+            "custom_label": st.column_config.TextColumn(labels[L]["custom_label"]),
+            "montant": st.column_config.NumberColumn(
+                labels[L]["amount"] if MULTI_CURRENCY else f'{labels[L]["amount"]} ({CUR})',
+                min_value=0.0, step=0.01, format="%.2f", default=0.0,
+            ),
+            "currency": st.column_config.SelectboxColumn(labels[L]["currency"], options=RATES.codes, required=True, default=REPORT),
+            "frequency": st.column_config.SelectboxColumn(
+                labels[L]["frequency"], options=freq_names, required=True, default=freq_names[0],
+                help=labels[L]["frequency_help"],
+            ),
+        },
+    )
+
+    # Write the whole section back in one assignment
+    types = [sec.key(t) for t in edited["type"].fillna(opts[0])]
+    amounts = edited["montant"].fillna(0.0).clip(lower=0.0).astype(float).tolist()
+    customs = edited["custom_label"].fillna("").astype(str).tolist()
+    if MULTI_CURRENCY:
+        currencies = [None if c == DEFAULT_CURRENCY else c for c in edited["currency"].fillna(REPORT)]
+    else:
+        currencies = [None] * len(amounts)
+    codes = [freq_names.index(f) if f in freq_names else 0 for f in edited["frequency"].fillna(freq_names[0])]
+    frequencies = [FREQUENCIES[c] if c else None for c in codes]
+    # Rows from the base snapshot keep their id (the editor keeps their index
+    # labels); added rows get fresh ones
+    base_rows = base["rows"]
+    deleted = set(st.session_state.get(editor_key, {}).get("deleted_rows", ()))
+    ids = [base_rows[j].id if j < len(base_rows) and j not in deleted else None for j in edited.index.tolist()]
+    new_rows = [
+        Row(t, a, c if t == "autre" else None, cur, f, row_id)
+        for t, a, c, cur, f, row_id in zip(types, amounts, customs, currencies, frequencies, ids)
+    ]
+    if new_rows != rows:
+        history.replace({state_key: rows}, {state_key: new_rows})
+    st.session_state[state_key] = new_rows
+    monthly = RATES.convert(amounts, currencies, REPORT) * MONTHLY_FACTORS[codes]
+    running_totals.set(section_key_for_labels, float(monthly.sum()))
+    # Row mode edits dicts in place, so compare against a copy next time
+    base["last"] = [r.copy() for r in new_rows]
+
+    return st.empty()
 
 # -----------------------------
 # Layout
 # -----------------------------
+def render_section_block(title: str, desc: str, state_key: str, section_key: str):
+    with timings.stage("render_section"):
+        slot = render_section(title, desc, state_key, section_key)
+    section_total = running_totals.section_totals[section_key]
+    slot.markdown(f"**{labels[L]['section_total']}**: {section_total:,.2f} {CUR}")
+
+def section_fragment(state_key: str):
+    key = section_fragment_key(state_key)
+    return st.fragment(timed_fragment(key)(render_section_block), key=key)
+
 left, right = st.columns([7, 5], gap="large")
 
 with left:
+    grid_mode = st.toggle(labels[L]["grid_mode"], key="grid_mode")
+    render_section = render_section_grid if grid_mode else render_section_rows
     with st.container():
-        render_section(labels[L]["revenus"], labels[L]["revenus_desc"], SECTION_KEYS["revenus"], "revenus")
+        section_fragment("revenus")(labels[L]["revenus"], labels[L]["revenus_desc"], SECTION_KEYS["revenus"], "revenus")
         st.divider()
-        render_section(labels[L]["dep_q"], labels[L]["dep_q_desc"], SECTION_KEYS["depensesQuotidiennes"], "depensesQuotidiennes")
+        section_fragment("dep_q")(labels[L]["dep_q"], labels[L]["dep_q_desc"], SECTION_KEYS["depensesQuotidiennes"], "depensesQuotidiennes")
         st.divider()
-        render_section(labels[L]["dep_a"], labels[L]["dep_a_desc"], SECTION_KEYS["depensesAdministratives"], "depensesAdministratives")
+        section_fragment("dep_a")(labels[L]["dep_a"], labels[L]["dep_a_desc"], SECTION_KEYS["depensesAdministratives"], "depensesAdministratives")
         st.divider()
-        render_section(labels[L]["dep_f"], labels[L]["dep_f_desc"], SECTION_KEYS["depensesFamiliales"], "depensesFamiliales")
+        section_fragment("dep_f")(labels[L]["dep_f"], labels[L]["dep_f_desc"], SECTION_KEYS["depensesFamiliales"], "depensesFamiliales")
         st.divider()
-        render_section(labels[L]["credits"], labels[L]["credits_desc"], SECTION_KEYS["credits"], "credits")
+        section_fragment("credits")(labels[L]["credits"], labels[L]["credits_desc"], SECTION_KEYS["credits"], "credits")
         st.divider()
-        render_section(labels[L]["impots"], labels[L]["impots_desc"], SECTION_KEYS["impots"], "impots")
+        section_fragment("impots")(labels[L]["impots"], labels[L]["impots_desc"], SECTION_KEYS["impots"], "impots")
+
+startup_profile.mark("sections")
+
+# -----------------------------
+# Undo bar
+# -----------------------------
+# Rendered after the sections, so it sees the step an edit just recorded
+@st.fragment(key=HISTORY_FRAGMENT)
+@timed_fragment(HISTORY_FRAGMENT)
+def render_history():
+    c_undo, c_redo, _ = st.columns([1, 1, 2])
+    with c_undo:
+        st.button("↶ " + labels[L]["undo"], key="undo", disabled=not history.can_undo,
+                  on_click=on_history, args=(False,))
+    with c_redo:
+        st.button("↷ " + labels[L]["redo"], key="redo", disabled=not history.can_redo,
+                  on_click=on_history, args=(True,))
 
 # -----------------------------
 # Summary card
 # -----------------------------
-def total_for(state_key: str) -> float:
-    return sum(float(r.get("montant", 0.0)) for r in st.session_state[state_key])
-
-total_revenus = total_for("revenus")
-total_quotidiennes = total_for("dep_q")
-total_admin = total_for("dep_a")
-total_familiales = total_for("dep_f")
-total_credits = total_for("credits")
-total_impots = total_for("impots")
-total_depenses = total_quotidiennes + total_admin + total_familiales + total_credits + total_impots
-capacite_epargne = total_revenus - total_depenses
-delta_pct = (capacite_epargne / total_revenus * 100) if total_revenus > 0 else 0.0
+@st.fragment(key=SUMMARY_FRAGMENT)
+@timed_fragment(SUMMARY_FRAGMENT)
+def render_summary():
+    global running_totals
+    with timings.stage("totals"):
+        if DEBUG_TOTALS:
+            sections = sections_from_state(st.session_state)
+            drift = running_totals.check(sections, RATES, REPORT)
+            if drift:
+                st.warning(f"Running totals drifted from recompute: {drift}")
+                st.session_state.running_totals = running_totals = RunningTotals.from_sections(sections, RATES, REPORT)
+        budget = running_totals.totals()
 
-with right:
     st.markdown('<div class="summary-card">', unsafe_allow_html=True)
     st.subheader(labels[L]["totals"])
+    # Running totals are monthly; the annual view scales the same sums
+    period = st.radio(
+        labels[L]["period"],
+        ["monthly", "annual"],
+        horizontal=True,
+        format_func=lambda x: labels[L][f"period_{x}"],
+        key="summary-period",
+    )
+    shown = budget.annual() if period == "annual" else budget
+
+    total_revenus = shown.revenus
+    total_depenses = shown.depenses
+    capacite_epargne = shown.capacite_epargne
+    delta_pct = shown.delta_pct
     c1, c2, c3 = st.columns([1, 1, 1])
     with c1:
-        st.metric(labels[L]["total_rev"], f"{total_revenus:,.2f} {labels[L]['euros']}")
+        st.metric(labels[L]["total_rev"], f"{total_revenus:,.2f} {CUR}")
     with c2:
-        st.metric(labels[L]["total_dep"], f"{total_depenses:,.2f} {labels[L]['euros']}")
+        st.metric(labels[L]["total_dep"], f"{total_depenses:,.2f} {CUR}")
     with c3:
         st.metric(
             labels[L]["capacity"],
-            f"{capacite_epargne:,.2f} {labels[L]['euros']}",
+            f"{capacite_epargne:,.2f} {CUR}",
             delta=f"{delta_pct:.1f}%" if total_revenus > 0 else None
         )
 
@@ -680,64 +751,156 @@ with right:
     st.caption(f"{tag} {color}")
 
     st.markdown(f"#### {labels[L]['breakdown']}")
-    dep_map = [
-        (labels[L]["dep_q"], total_quotidiennes),
-        (labels[L]["dep_a"], total_admin),
-        (labels[L]["dep_f"], total_familiales),
-        (labels[L]["credits"], total_credits),
-        (labels[L]["impots"], total_impots),
-    ]
-    denom = total_depenses if total_depenses > 0 else 1.0
-    for name, val in dep_map:
-        pct = min(1.0, float(val) / denom)
-        st.write(f"{name} — {val:,.2f} {labels[L]['euros']} ({int(round(pct*100))}%)")
+    for section_key in EXPENSE_SECTIONS:
+        name = labels[L][SECTION_KEYS[section_key]]
+        val = shown.section_totals[section_key]
+        pct = min(1.0, shown.shares[section_key])
+        st.write(f"{name} — {val:,.2f} {CUR} ({int(round(pct*100))}%)")
         st.progress(pct)
 
-    # ------- Downloads -------
+    # ------- Projection -------
+    projection = None
+    with st.expander("📈 " + labels[L]["projection"]):
+        if st.toggle(labels[L]["projection_show"], key="proj-on"):
+            pc1, pc2 = st.columns(2)
+            with pc1:
+                years = st.slider(labels[L]["proj_years"], 1, MAX_YEARS, 10, key="proj-years")
+                growth = st.slider(labels[L]["proj_income_growth"], -5.0, 10.0, 2.0, 0.5, key="proj-growth")
+                initial = st.number_input(labels[L]["proj_initial"], min_value=0.0, step=100.0, key="proj-initial")
+            with pc2:
+                ret = st.slider(labels[L]["proj_return"], -5.0, 10.0, 3.0, 0.5, key="proj-return")
+                shock = st.slider(labels[L]["proj_shock"], 0, 100, 10, key="proj-shock")
+            st.caption(labels[L]["proj_inflation"])
+            infl_cols = st.columns(len(EXPENSE_SECTIONS))
+            inflation = []
+            for col, section_key in zip(infl_cols, EXPENSE_SECTIONS):
+                with col:
+                    rate = st.number_input(
+                        labels[L][SECTION_KEYS[section_key]], value=DEFAULT_INFLATION[section_key] * 100,
+                        step=0.5, key=f"proj-infl-{section_key}",
+                    )
+                inflation.append((section_key, rate / 100))
+            params = ProjectionParams(
+                years=years, initial_savings=float(initial), income_growth=growth / 100,
+                return_rate=ret / 100, shock_probability=shock / 100, inflation=tuple(inflation),
+            )
+            with timings.stage("projection"):
+                projection = run_projection(
+                    budget.revenus,
+                    tuple((s, budget.section_totals[s]) for s in EXPENSE_SECTIONS),
+                    params,
+                )
+            bands = projection["percentiles"]
+            st.line_chart({f"P{p}": bands[p] for p in ("5", "50", "95")})
+            st.caption(f"{labels[L]['proj_negative']}: {projection['prob_negative']*100:.1f}%")
+    # Read by the downloads fragment, which can rerun without this one
+    st.session_state["projection-result"] = projection
+
+    render_downloads()
+    st.markdown('</div>', unsafe_allow_html=True)
+
+# ------- Downloads -------
+PDF_POLL_SECONDS = 0.5
+
+def render_pdf_status(pdf_key: str):
+    """Polled while a render is in flight; one full rerun swaps in the download button."""
+    job = pdf_jobs.get(pdf_key)
+    if job is None or job.state == "failed" or pdf_key in pdf_cache:
+        st.rerun()
+    label = labels[L]["pdf_queued"] if job.state == "queued" else labels[L]["pdf_rendering"]
+    st.caption(f"⏳ {label} ({job.elapsed:.0f}s)")
+
+@st.fragment(key=DOWNLOADS_FRAGMENT)
+@timed_fragment(DOWNLOADS_FRAGMENT)
+def render_downloads():
+    with timings.stage("totals"):
+        sections = sections_from_state(st.session_state)
+        # Foreign-currency rows keep their amount and gain the converted one
+        export_sections, _ = with_converted(sections, RATES, REPORT)
     payload = {
         "lang": L,
-        "sections": {
-            "revenus": st.session_state["revenus"],
-            "depensesQuotidiennes": st.session_state["dep_q"],
-            "depensesAdministratives": st.session_state["dep_a"],
-            "depensesFamiliales": st.session_state["dep_f"],
-            "credits": st.session_state["credits"],
-            "impots": st.session_state["impots"],
-        },
-        "totals": {
-            "revenus": total_revenus,
-            "depenses": total_depenses,
-            "capacite_epargne": capacite_epargne,
-            "quotidiennes": total_quotidiennes,
-            "administratives": total_admin,
-            "familiales": total_familiales,
-            "credits": total_credits,
-            "impots": total_impots,
-        },
+        "currency": REPORT,
+        "sections": export_sections,
+        "totals": running_totals.totals().as_payload_totals(),
     }
+    used = {r.get("currency") or DEFAULT_CURRENCY for rows in sections.values() for r in rows}
+    if used - {REPORT}:
+        payload["rates"] = RATES.subset(used | {REPORT})
+    projection = st.session_state.get("projection-result")
+    if projection is not None:
+        payload["projection"] = projection
+
+    # One digest per rerun keys every download of this payload
+    with timings.stage("digest"):
+        digest = payload_digest(payload, L)
 
     col_dl1, col_dl2 = st.columns([1, 1])
     with col_dl1:
         st.markdown('<div class="calm-json">', unsafe_allow_html=True)
+        # Encoded only when clicked (on a separate thread), then cached by digest
         st.download_button(
             labels[L]["download"],
-            data=json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8"),
+            data=lambda: export_cache.get_or_build(f"json:{digest}", lambda: export_json(payload)),
             file_name="finanthrope_budget.json",
             mime="application/json",
         )
+        st.download_button(
+            labels[L]["download_compact"],
+            data=lambda: export_cache.get_or_build(f"compact:{digest}", lambda: encode_compact(payload)),
+            file_name="finanthrope_budget" + COMPACT_EXTENSION,
+            mime=COMPACT_MIME,
+            help=labels[L]["download_compact_help"],
+        )
         st.markdown('</div>', unsafe_allow_html=True)
 
     with col_dl2:
         st.markdown('<div class="gold-pdf">', unsafe_allow_html=True)
-        st.download_button(
-            label=labels[L]["download_pdf"],
-            data=create_pdf(payload, labels, L),
-            file_name="finanthrope_resume.pdf" if L == "fr" else "finanthrope_summary.pdf",
-            mime="application/pdf"
-        )
+        # Only render the PDF on request, on the shared executor; unchanged
+        # budgets are served from the cache
+        pdf_bytes = pdf_cache.get(digest)
+        if pdf_bytes is None:
+            job = pdf_jobs.get(digest)
+            if job is not None and job.state == "failed":
+                st.error(f'{labels[L]["pdf_failed"]}: {job.error}')
+            if (job is None or job.state == "failed") and st.button(labels[L]["prepare_pdf"], key="prepare-pdf"):
+                job = pdf_jobs.submit(digest, payload, L)
+                if job is None:
+                    st.warning(labels[L]["pdf_busy"])
+            if job is not None and job.state != "failed":
+                st.fragment(render_pdf_status, run_every=PDF_POLL_SECONDS, key="pdf-status")(digest)
+        else:
+            st.download_button(
+                label=labels[L]["download_pdf"],
+                data=pdf_bytes,
+                file_name="finanthrope_resume.pdf" if L == "fr" else "finanthrope_summary.pdf",
+                mime="application/pdf"
+            )
         st.markdown('</div>', unsafe_allow_html=True)
 
-    st.markdown('</div>', unsafe_allow_html=True)
+    # Queue the budget for the next batched write (skipped when unchanged)
+    if budget_store is not None:
+        with timings.stage("store"):
+            budget_store.save(st.session_state["store-user"], sections)
+
+with right:
+    render_history()
+    render_summary()
 
 # Footer
 st.markdown("<br><small>© Finanthrope · Streamlit</small>", unsafe_allow_html=True)
+
+startup_profile.mark("summary")
+if startup_profile.enabled:
+    startup_profile.emit()
+    st.session_state["startup_profiled"] = True
+
+# Diagnostics: only when instrumented, and shown with ?diag=1
+if timings.enabled:
+    record_timings(timings)
+    if st.query_params.get("diag"):
+        with st.expander("🩺 " + labels[L]["diagnostics"]):
+            st.dataframe(
+                [{"rerun": r["rerun"], "fragment": r.get("fragment"), "total": r["total_ms"], **r["stages"]}
+                 for r in reversed(st.session_state["timing-history"])],
+                hide_index=True,
+            )
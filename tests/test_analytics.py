@@ -0,0 +1,35 @@
+# tests/test_analytics.py
+import json
+
+import pytest
+
+from analytics import BudgetMatrix, load_matrix
+
+GOOD = {"lang": "fr", "sections": {"revenus": [{"type": "salaire", "montant": 2000.0}]}}
+
+MALFORMED = [
+    {"sections": {"revenus": ["oops"]}},
+    {"sections": {"revenus": {"type": "salaire", "montant": 1.0}}},
+    {"sections": {"revenus": [{"type": ["salaire"], "montant": 1.0}]}},
+    {"sections": {"revenus": [{"type": "salaire", "montant": 1.0, "currency": ["USD"]}]}},
+    {"sections": {"revenus": [{"type": "salaire", "montant": 1.0, "frequency": {}}]}},
+    {"sections": {"revenus": [{"type": "salaire", "montant": 1.0, "frequency": "daily"}]}},
+    {"sections": []},
+]
+
+
+@pytest.mark.parametrize("bad", MALFORMED)
+def test_malformed_payload_is_skipped(bad):
+    m = BudgetMatrix.from_payloads([("a", GOOD), ("bad", bad), ("b", GOOD)])
+    assert m.names == ["a", "b"]
+    assert m.skipped == 1
+    assert m.totals[:, 0].tolist() == [2000.0, 2000.0]
+
+
+def test_malformed_export_next_to_good_ones(tmp_path):
+    (tmp_path / "a.json").write_text(json.dumps(GOOD), encoding="utf-8")
+    (tmp_path / "b.jsonl").write_text("\n".join(json.dumps(p) for p in [GOOD] + MALFORMED), encoding="utf-8")
+    (tmp_path / "c.json").write_text("{broken", encoding="utf-8")
+    m = load_matrix([str(tmp_path)])
+    assert len(m) == 2
+    assert m.skipped == len(MALFORMED) + 1
@@ -0,0 +1,68 @@
+# tests/test_budget_export.py
+import gzip
+import io
+import json
+
+import pytest
+
+from budget_export import MAGIC, _HEADER_LEN, decode_compact, encode_compact, load_compact
+from budget_io import BudgetImportError
+
+PAYLOAD = {
+    "lang": "fr",
+    "sections": {
+        "revenus": [{"type": "salaire", "montant": 2000.0}],
+        "depensesQuotidiennes": [{"type": "autre", "montant": 12.5, "custom_label": "x"}],
+    },
+}
+
+
+def compact(header, columns: bytes = b"") -> bytes:
+    head = json.dumps(header).encode("utf-8")
+    return gzip.compress(MAGIC + _HEADER_LEN.pack(len(head)) + head + columns, mtime=0)
+
+
+def test_round_trip():
+    data = encode_compact(PAYLOAD)
+    assert decode_compact(data) == PAYLOAD
+    assert load_compact(io.BytesIO(data))[0]["revenus"] == [{"type": "salaire", "montant": 2000.0}]
+
+
+def corrupt_deflate() -> bytes:
+    data = bytearray(encode_compact(PAYLOAD))
+    data[12:20] = b"\xff" * 8  # inside the deflate stream, after the gzip header
+    return bytes(data)
+
+
+CORRUPT = {
+    "not gzip": b"hello",
+    "truncated gzip": encode_compact(PAYLOAD)[:-12],
+    "corrupt deflate": corrupt_deflate(),
+    "bad magic": gzip.compress(b"XXXX" + b"\0" * 8),
+    "header not json": gzip.compress(MAGIC + _HEADER_LEN.pack(3) + b"{x}"),
+    "header is a list": compact([]),
+    "sections is a list": compact({"sections": []}),
+    "section meta is a list": compact({"sections": {"revenus": []}}),
+    "rows not a number": compact({"sections": {"revenus": {"rows": "two", "types": ["salaire"]}}}),
+    "rows negative": compact({"sections": {"revenus": {"rows": -1, "types": ["salaire"]}}}),
+    "types not a list": compact({"sections": {"revenus": {"rows": 0, "types": "salaire"}}}),
+    "custom is a list": compact({"sections": {"revenus": {"rows": 0, "types": [], "custom": ["x"]}}}),
+    "custom index out of range": compact({"sections": {"revenus": {"rows": 0, "types": [], "custom": {"3": "x"}}}}),
+    "truncated columns": compact({"sections": {"revenus": {"rows": 5, "types": ["salaire"]}}}),
+    "currency vocab not a list": compact({"sections": {"revenus": {"rows": 0, "types": [], "currencies": "EUR"}}}),
+}
+
+
+@pytest.mark.parametrize("name", CORRUPT)
+def test_corrupt_compact_raises_import_error(name):
+    with pytest.raises(BudgetImportError):
+        load_compact(io.BytesIO(CORRUPT[name]))
+    with pytest.raises(BudgetImportError):
+        decode_compact(CORRUPT[name])
+
+
+def test_unhashable_type_is_rejected():
+    types = [["salaire"]]
+    data = compact({"sections": {"revenus": {"rows": 1, "types": types}}}, b"\0\0" + b"\0" * 8)
+    with pytest.raises(BudgetImportError):
+        load_compact(io.BytesIO(data))
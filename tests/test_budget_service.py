@@ -0,0 +1,56 @@
+# tests/test_budget_service.py
+import http.client
+import json
+import threading
+
+import pytest
+
+import budget_service
+from budget_service import BudgetServer
+
+ROWS = {"revenus": [{"type": "salaire", "montant": 2000.0}]}
+
+
+@pytest.fixture
+def server():
+    srv = BudgetServer(("127.0.0.1", 0))
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def post(server, path, body):
+    conn = http.client.HTTPConnection(*server.server_address[:2], timeout=10)
+    try:
+        conn.request("POST", path, body=json.dumps(body).encode("utf-8"))
+        resp = conn.getresponse()
+        return resp.status, json.loads(resp.read())
+    finally:
+        conn.close()
+
+
+def test_totals(server):
+    status, body = post(server, "/totals", {"sections": ROWS, "currency": "EUR"})
+    assert status == 200
+    assert body["totals"]["revenus"] == 2000.0
+
+
+@pytest.mark.parametrize("body", [
+    {"sections": {"revenus": [{"type": ["salaire"], "montant": 1.0}]}},
+    {"sections": ROWS, "currency": ["x"]},
+    {"sections": ROWS, "currency": "JPY"},
+])
+def test_invalid_payload_is_400(server, body):
+    status, reply = post(server, "/totals", body)
+    assert status == 400
+    assert reply["error"]
+
+
+def test_unexpected_error_is_500(server, monkeypatch):
+    def broken(payload):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(budget_service, "compute", broken)
+    status, reply = post(server, "/totals", {"sections": ROWS})
+    assert status == 500
+    assert reply == {"error": "internal error"}